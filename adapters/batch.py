@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BATCH_OPS = ("insert", "update", "delete")
+
+
+def validate_batch_op(index: int, op: Dict[str, Any]) -> None:
+    kind = op.get("op")
+    if kind not in BATCH_OPS:
+        raise ValueError(f"Op {index}: 'op' must be one of {BATCH_OPS}, got {kind!r}")
+    if not op.get("table"):
+        raise ValueError(f"Op {index}: 'table' is required")
+    if kind in ("insert", "update") and not op.get("data"):
+        raise ValueError(f"Op {index}: '{kind}' needs a non-empty 'data' dict")
+    if kind in ("update", "delete") and not op.get("filters"):
+        raise ValueError(f"Op {index}: '{kind}' needs a non-empty 'filters' dict")
+
+
+def batch_op_key(op: Dict[str, Any]) -> Tuple:
+    """(table, op, column shape) - ops with the same key share one statement."""
+    return (
+        op["table"],
+        op["op"],
+        tuple(sorted(op.get("data") or ())),
+        tuple(sorted(op.get("filters") or ())),
+    )
+
+
+def group_batch_ops(operations: List[Dict[str, Any]]) -> Iterator[Tuple[Tuple, List[int]]]:
+    """
+    Validate ops and yield (key, indices) for runs of consecutive ops that
+    share a key. Only consecutive ops are merged so the batch keeps the
+    caller's ordering (an insert followed by an update of the same row
+    still runs in that order).
+    """
+    for index, op in enumerate(operations):
+        validate_batch_op(index, op)
+
+    current_key, indices = None, []
+    for index, op in enumerate(operations):
+        key = batch_op_key(op)
+        if indices and key != current_key:
+            yield current_key, indices
+            indices = []
+        current_key = key
+        indices.append(index)
+    if indices:
+        yield current_key, indices
+
+
+def batch_failure(
+    kind: str, table: str, indices: List[int], error: Exception, tx_id: Optional[str]
+) -> ValueError:
+    """
+    Error for a failed statement of a batch. On its own the batch is rolled
+    back; inside the caller's transaction nothing is undone until the caller
+    rolls that transaction back.
+    """
+    if tx_id is None:
+        outcome = "Batch rolled back"
+    else:
+        outcome = (
+            f"Batch failed inside transaction {tx_id}, which is still open "
+            f"and not rolled back (call rollback_transaction)"
+        )
+    return ValueError(
+        f"{outcome}: {kind} on {table} failed for ops {indices[0]}-{indices[-1]}: {error}"
+    )
@@ -0,0 +1,86 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+
+class QueryCancelled(Exception):
+    """Raised when a tool call's deadline passes or the call is cancelled."""
+
+
+class QueryControl:
+    """
+    Deadline and cancellation state of one tool call.
+
+    Adapters translate remaining_ms() into their native statement timeout and
+    register an interrupt callback (e.g. psycopg2's connection.cancel()) while
+    a statement runs, so cancel() can stop the query from another thread and
+    free its pooled connection.
+    """
+
+    def __init__(self, timeout_ms: Optional[int] = None):
+        self.deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self._cancelled = threading.Event()
+        self._interrupts: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining_ms(self) -> Optional[int]:
+        if self.deadline is None:
+            return None
+        return max(1, int((self.deadline - time.monotonic()) * 1000))
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise QueryCancelled("Query cancelled")
+        if self.expired():
+            raise QueryCancelled("Query deadline exceeded")
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled.set()
+            interrupts = list(self._interrupts)
+        for interrupt in interrupts:
+            try:
+                interrupt()
+            except Exception:
+                pass
+
+    @contextmanager
+    def interrupt_with(self, interrupt: Callable[[], None]):
+        """Register interrupt for the duration of a statement."""
+        with self._lock:
+            self._interrupts.append(interrupt)
+            cancelled = self.cancelled
+        if cancelled:
+            interrupt()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interrupts.remove(interrupt)
+
+
+_current_control: ContextVar[Optional[QueryControl]] = ContextVar(
+    "query_control", default=None
+)
+
+
+def current_control() -> Optional[QueryControl]:
+    return _current_control.get()
+
+
+@contextmanager
+def use_control(control: QueryControl):
+    token = _current_control.set(control)
+    try:
+        yield control
+    finally:
+        _current_control.reset(token)
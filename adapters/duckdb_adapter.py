@@ -0,0 +1,1070 @@
+import datetime
+import decimal
+import hashlib
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+import pyarrow
+import pyarrow.compute
+from sqlalchemy.engine import make_url
+
+from adapters.base import DatabaseAdapter
+from adapters.batch import batch_failure, group_batch_ops
+from adapters.deadlines import QueryCancelled, current_control
+from adapters.text_search import best_ms, check_columns, check_search_query, sample_term, speedup_report
+from adapters.timeseries import check_downsample_args, parse_bucket, reduce_points
+from adapters.transactions import TransactionRegistry
+from adapters.vector_search import (
+    BENCHMARK_QUERIES,
+    INDEX_DIR,
+    SCAN_BLOCK_ROWS,
+    IVFIndex,
+    as_vector,
+    benchmark_index,
+    check_vector_args,
+    collect_vectors,
+    index_path,
+    load_index,
+    nearest,
+    query_vector,
+    require_numpy,
+    vector_block,
+)
+from security.validator import validate_sql
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][\w$]*$")
+# allowed_directories matches path prefixes, so data/../x would escape it
+_PARENT_DIR = re.compile(r"\.\.[/\\]")
+
+ATTACH_MODES = ("scan", "snapshot")
+# Schemas whose tables are named <alias>.<table> rather than <alias>.<schema>.<table>
+DEFAULT_SCHEMAS = ("main", "public")
+# Table arguments ending in these are read as files (FROM 'path')
+FILE_SUFFIXES = (
+    ".csv", ".tsv", ".csv.gz", ".tsv.gz", ".parquet",
+    ".json", ".json.gz", ".ndjson", ".jsonl",
+)
+
+
+def _python_type(data_type: pyarrow.DataType) -> Optional[type]:
+    if pyarrow.types.is_boolean(data_type):
+        return bool
+    if pyarrow.types.is_integer(data_type):
+        return int
+    if pyarrow.types.is_floating(data_type):
+        return float
+    if pyarrow.types.is_decimal(data_type):
+        return decimal.Decimal
+    if pyarrow.types.is_string(data_type) or pyarrow.types.is_large_string(data_type):
+        return str
+    if pyarrow.types.is_binary(data_type) or pyarrow.types.is_large_binary(data_type):
+        return bytes
+    if pyarrow.types.is_timestamp(data_type):
+        return datetime.datetime
+    if pyarrow.types.is_date(data_type):
+        return datetime.date
+    if pyarrow.types.is_time(data_type):
+        return datetime.time
+    if _is_list(data_type):
+        return list
+    if pyarrow.types.is_struct(data_type) or pyarrow.types.is_map(data_type):
+        return dict
+    return None
+
+
+def _is_list(data_type: pyarrow.DataType) -> bool:
+    return (
+        pyarrow.types.is_list(data_type)
+        or pyarrow.types.is_large_list(data_type)
+        or pyarrow.types.is_fixed_size_list(data_type)
+    )
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class DuckDBAdapter(DatabaseAdapter):
+    """
+    Embedded DuckDB database for analytics: columnar, vectorized and
+    parallel on every core. Besides its own tables it reads CSV / Parquet /
+    JSON files directly (FROM 'data/*.parquet') and serves SQLite files,
+    Postgres databases and other DuckDB files attached under an alias,
+    scanned in place or copied into a local snapshot at connect time.
+    Once those are attached the database is locked down: queries reach no
+    file outside data_dir (none at all without one) and install no
+    extensions.
+
+    Results come out of DuckDB as Arrow tables / record batches, converted
+    to rows a whole batch at a time; exports never leave DuckDB (COPY).
+    Each call runs on its own cursor of the one shared database.
+    """
+
+    # Seconds an open transaction may sit unused before it is rolled back
+    TRANSACTION_IDLE_TIMEOUT = 60.0
+
+    def __init__(
+        self,
+        db_url: str,
+        attach: Optional[Dict[str, str]] = None,
+        attach_mode: str = "scan",
+        data_dir: Optional[str] = None,
+    ):
+        self.db_url = db_url
+        self.data_dir = os.path.abspath(data_dir) if data_dir else None
+        self.attach = dict(attach or {})
+        self.attach_mode = attach_mode
+        for alias in self.attach:
+            if not _IDENTIFIER.match(alias):
+                raise ValueError(f"Invalid attach alias: {alias!r}")
+        if attach_mode not in ATTACH_MODES:
+            raise ValueError(f"Invalid attach mode: {attach_mode!r}. Use one of {', '.join(ATTACH_MODES)}")
+        self.path = make_url(db_url).database or ":memory:"
+        self.conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._database: Optional[str] = None
+        self._column_types: Dict[str, Dict[str, Optional[type]]] = {}
+        self._table_stats: Dict[str, tuple] = {}
+        self._transactions = TransactionRegistry(
+            on_expire=self._discard_transaction,
+            idle_timeout=self.TRANSACTION_IDLE_TIMEOUT,
+        )
+
+    # ---------------- Connection ----------------
+
+    def connect(self) -> None:
+        self.conn = duckdb.connect(self.path)
+        cursor = self.conn.cursor()
+        try:
+            self._database = cursor.execute("SELECT current_database()").fetchone()[0]
+            for alias, url in self.attach.items():
+                if self.attach_mode == "snapshot":
+                    self._snapshot(cursor, alias, url)
+                else:
+                    self._attach(cursor, alias, url)
+            self._lock_down(cursor)
+        finally:
+            cursor.close()
+
+    def _lock_down(self, cursor) -> None:
+        """
+        Without this any single SELECT could read the server's files
+        (read_text('/etc/passwd')) or fetch extensions. Attached databases
+        stay readable; lock_configuration keeps the settings from being
+        changed back.
+        """
+        allowed = [os.path.join(self.data_dir, "")] if self.data_dir else []
+        cursor.execute("SET allowed_directories = ?", [allowed])
+        cursor.execute("SET autoinstall_known_extensions = false")
+        cursor.execute("SET autoload_known_extensions = false")
+        cursor.execute("SET enable_external_access = false")
+        cursor.execute("SET lock_configuration = true")
+
+    def _attach(self, cursor, alias: str, url: str) -> None:
+        """ATTACH a SQLite file, Postgres database or DuckDB file read-only."""
+        source = make_url(url)
+        backend = source.get_backend_name()
+        if backend == "sqlite":
+            kind, target = "sqlite", source.database
+        elif backend == "postgresql":
+            # The postgres scanner takes a libpq URI, without SQLAlchemy's +driver
+            kind, target = "postgres", source.set(drivername="postgresql").render_as_string(hide_password=False)
+        elif backend == "duckdb":
+            kind, target = "duckdb", source.database
+        else:
+            raise ValueError(
+                f"Cannot attach {backend} databases. Expected sqlite:///path, "
+                f"postgresql://... or duckdb:///path"
+            )
+        if not target:
+            raise ValueError(f"Attach URL for {alias} names no database")
+        cursor.execute(f"ATTACH {_quote_literal(target)} AS {alias} (TYPE {kind}, READ_ONLY)")
+
+    def _snapshot(self, cursor, alias: str, url: str) -> None:
+        """
+        Copy the source's tables into the local schema alias (so they keep
+        the <alias>.<table> names of scan mode) and detach it again: queries
+        run on DuckDB storage and never reach the source. Refreshed on
+        every connect.
+        """
+        source = f"_source_{alias}"
+        self._attach(cursor, source, url)
+        try:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {alias}")
+            tables = cursor.execute(
+                "SELECT table_schema, table_name FROM information_schema.tables "
+                "WHERE table_catalog = ? AND table_type = 'BASE TABLE'",
+                [source],
+            ).fetchall()
+            for schema, name in tables:
+                target = name if schema in DEFAULT_SCHEMAS else f"{schema}_{name}"
+                cursor.execute(
+                    f'CREATE OR REPLACE TABLE {alias}."{target}" AS FROM {source}."{schema}"."{name}"'
+                )
+        finally:
+            cursor.execute(f"DETACH {source}")
+
+    def close(self) -> None:
+        self._transactions.close_all()
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def health_check(self) -> bool:
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute("SELECT 1").fetchall()
+            return True
+        except Exception:
+            return False
+
+    # ---------------- Capabilities ----------------
+
+    def open_transactions(self) -> int:
+        return len(self._transactions)
+
+    def concurrency_limits(self) -> Dict[str, int]:
+        """Every query already runs on all cores, so few run side by side."""
+        return {"read": 4, "write": 2, "schema": 2}
+
+    def capabilities(self) -> Dict[str, bool]:
+        return {
+            "read": True,
+            "write": True,
+            "transactions": True,
+            "schema_introspection": True,
+            "aggregation": True,
+            # COPY ... TO can only write under data_dir
+            "copy_to_file": self.data_dir is not None,
+        }
+
+    # ---------------- Schema ----------------
+
+    def _qualified(self, catalog: str, schema: str, name: str) -> str:
+        """How a table is named in queries: t, schema.t, alias.t or alias.schema.t."""
+        if catalog == self._database:
+            return name if schema == "main" else f"{schema}.{name}"
+        if schema in DEFAULT_SCHEMAS:
+            return f"{catalog}.{name}"
+        return f"{catalog}.{schema}.{name}"
+
+    def _catalog_tables(self, cursor) -> List[Tuple[str, str, str]]:
+        """(catalog, schema, name) of tables and views, without FTS index internals."""
+        return cursor.execute(
+            "SELECT table_catalog, table_schema, table_name FROM information_schema.tables "
+            "WHERE table_schema NOT LIKE 'fts\\_%' ESCAPE '\\' "
+            "ORDER BY table_catalog <> current_database(), table_catalog, table_schema, table_name"
+        ).fetchall()
+
+    def _locate(self, cursor, table: str) -> Tuple[str, str, str]:
+        for catalog, schema, name in self._catalog_tables(cursor):
+            if self._qualified(catalog, schema, name) == table:
+                return catalog, schema, name
+        raise ValueError(f"Table not found: {table}")
+
+    def _relation(self, table: str) -> str:
+        """table as a FROM item: files (by suffix) become a quoted path DuckDB reads directly."""
+        if table.lower().endswith(FILE_SUFFIXES):
+            return _quote_literal(table)
+        return table
+
+    def get_schema(self) -> Dict[str, Any]:
+        schema: Dict[str, List[str]] = {}
+        with self._read_cursor() as cursor:
+            for catalog, schema_name, name in self._catalog_tables(cursor):
+                schema[self._qualified(catalog, schema_name, name)] = []
+            columns = cursor.execute(
+                "SELECT table_catalog, table_schema, table_name, column_name "
+                "FROM information_schema.columns ORDER BY ordinal_position"
+            ).fetchall()
+        for catalog, schema_name, name, column in columns:
+            table = self._qualified(catalog, schema_name, name)
+            if table in schema:
+                schema[table].append(column)
+        return schema
+
+    def get_tables(self) -> List[str]:
+        with self._read_cursor() as cursor:
+            return [self._qualified(*row) for row in self._catalog_tables(cursor)]
+
+    def get_columns(self, table: str) -> List[str]:
+        return list(self.get_column_types(table))
+
+    def get_indexes(self, table: str) -> Any:
+        with self._read_cursor() as cursor:
+            catalog, schema, name = self._locate(cursor, table)
+            rows = cursor.execute(
+                "SELECT index_name, expressions, is_unique FROM duckdb_indexes() "
+                "WHERE database_name = ? AND schema_name = ? AND table_name = ?",
+                [catalog, schema, name],
+            ).fetchall()
+        return [
+            {
+                "name": index_name,
+                "column_names": [e.strip() for e in (expressions or "").strip("[]").split(",") if e.strip()],
+                "unique": is_unique,
+            }
+            for index_name, expressions, is_unique in rows
+        ]
+
+    def get_column_types(self, table: str) -> Dict[str, Optional[type]]:
+        """Python type per column (None when unknown) from the Arrow schema, cached per table."""
+        if table not in self._column_types:
+            with self._read_cursor() as cursor:
+                schema = self._arrow_schema(cursor, self._relation(table))
+            self._column_types[table] = {field.name: _python_type(field.type) for field in schema}
+        return self._column_types[table]
+
+    def _arrow_schema(self, cursor, relation: str) -> pyarrow.Schema:
+        return cursor.execute(f"SELECT * FROM {relation} LIMIT 0").to_arrow_table().schema
+
+    def describe_schema(self, max_tables: int = 200) -> Dict[str, Any]:
+        """DuckDB column types and the primary / foreign keys of duckdb_constraints(), plus row estimates."""
+        with self._read_cursor() as cursor:
+            tables = self._catalog_tables(cursor)
+            columns = cursor.execute(
+                "SELECT table_catalog, table_schema, table_name, column_name, data_type "
+                "FROM information_schema.columns ORDER BY ordinal_position"
+            ).fetchall()
+            constraints = cursor.execute(
+                "SELECT database_name, schema_name, table_name, constraint_type, "
+                "constraint_column_names, referenced_table, referenced_column_names "
+                "FROM duckdb_constraints() WHERE constraint_type IN ('PRIMARY KEY', 'FOREIGN KEY')"
+            ).fetchall()
+
+        described = {}
+        for catalog, schema, name in tables[:max_tables]:
+            described[self._qualified(catalog, schema, name)] = {
+                "columns": {},
+                "primary_key": [],
+                "foreign_keys": [],
+            }
+        for catalog, schema, name, column, data_type in columns:
+            entry = described.get(self._qualified(catalog, schema, name))
+            if entry is not None:
+                entry["columns"][column] = data_type
+        for catalog, schema, name, kind, key, referenced, referenced_key in constraints:
+            entry = described.get(self._qualified(catalog, schema, name))
+            if entry is None:
+                continue
+            if kind == "PRIMARY KEY":
+                entry["primary_key"] = list(key)
+            else:
+                entry["foreign_keys"].append(
+                    f"{', '.join(key)} -> {referenced}({', '.join(referenced_key)})"
+                )
+        for table, entry in described.items():
+            try:
+                entry["estimated_rows"] = self.get_table_stats(table).get("estimated_rows")
+            except Exception:
+                entry["estimated_rows"] = None
+        return {"tables": described, "total_tables": len(tables)}
+
+    # ---------------- Statistics ----------------
+
+    # Statistics are refreshed at most this often
+    STATS_CACHE_SECONDS = 60.0
+
+    def get_table_stats(self, table: str, *, refresh: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        cached = self._table_stats.get(table)
+        if refresh or cached is None or now - cached[0] > self.STATS_CACHE_SECONDS:
+            cached = (now, self._collect_table_stats(table))
+            self._table_stats[table] = cached
+        return {**cached[1], "age_seconds": round(now - cached[0], 1)}
+
+    def _collect_table_stats(self, table: str) -> Dict[str, Any]:
+        """
+        Row count from duckdb_tables(): exact for DuckDB storage, unknown for
+        attached SQLite / Postgres tables. DuckDB exposes no per-column
+        estimates without reading the data, so none are reported.
+        """
+        with self._read_cursor() as cursor:
+            catalog, schema, name = self._locate(cursor, table)
+            found = cursor.execute(
+                "SELECT estimated_size, column_count FROM duckdb_tables() "
+                "WHERE database_name = ? AND schema_name = ? AND table_name = ?",
+                [catalog, schema, name],
+            ).fetchone()
+        rows = found[0] if found and catalog == self._database else None
+        return {
+            "table": table,
+            "estimated_rows": rows,
+            "column_count": found[1] if found else None,
+            "source": "duckdb_tables",
+            "analyzed": rows is not None,
+        }
+
+    def sample_rows(self, table: str, n: int = 10) -> List[Dict[str, Any]]:
+        """Reservoir sample; a vectorized pass without sorting the table."""
+        with self._read_cursor() as cursor:
+            return cursor.execute(
+                f"SELECT * FROM {self._relation(table)} USING SAMPLE {int(n)} ROWS"
+            ).to_arrow_table().to_pylist()
+
+    # ---------------- Query ----------------
+
+    @contextmanager
+    def _read_cursor(self):
+        """
+        A cursor (DuckDB connection to the shared database) bound to the
+        current tool call's deadline. DuckDB has no statement timeout, so a
+        timer interrupts the running query when the remaining time runs out;
+        cancelling the call interrupts it at once.
+        """
+        control = current_control()
+        cursor = self.conn.cursor()
+        try:
+            if control is None:
+                yield cursor
+                return
+            control.check()
+            remaining = control.remaining_ms()
+            timer = threading.Timer(remaining / 1000, cursor.interrupt) if remaining else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+            try:
+                with control.interrupt_with(cursor.interrupt):
+                    yield cursor
+            except QueryCancelled:
+                raise
+            except Exception as e:
+                if control.cancelled or control.expired():
+                    raise QueryCancelled(
+                        "Query cancelled" if control.cancelled else "Query deadline exceeded"
+                    ) from e
+                raise
+            finally:
+                if timer:
+                    timer.cancel()
+        finally:
+            cursor.close()
+
+    def validate_query(self, query: str) -> None:
+        """
+        The shared SQL check, then DuckDB's own parser: exactly one SELECT
+        (FROM-first queries, DESCRIBE, SUMMARIZE and SHOW parse as one).
+        Keeps COPY, ATTACH, INSTALL, SET, ... out of the read tools.
+        """
+        validate_sql(query, allow_dml=False)
+        if _PARENT_DIR.search(query):
+            raise ValueError("Paths with .. segments are not allowed")
+        try:
+            statements = duckdb.extract_statements(query)
+        except duckdb.Error as e:
+            raise ValueError(f"Invalid query: {e}") from e
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only a single SELECT statement can run as a query")
+
+    def execute_arrow(self, query: str, *, params=None, limit=None) -> pyarrow.Table:
+        """execute_query's result as an Arrow table, without converting it to rows."""
+        self.validate_query(query)
+
+        if limit:
+            query = f"{query} LIMIT {limit}"
+
+        with self._read_cursor() as cursor:
+            return cursor.execute(query, params or {}).to_arrow_table()
+
+    def execute_query(self, query: str, *, params=None, limit=None):
+        """SQL with $name parameters; tables, attached aliases and files (FROM 'x.parquet')."""
+        return self.execute_arrow(query, params=params, limit=limit).to_pylist()
+
+    def explain_query(self, query: str):
+        # EXPLAIN ANALYZE runs its statement, so only plain reads are explained
+        self.validate_query(query)
+        with self._read_cursor() as cursor:
+            return cursor.execute(f"EXPLAIN {query}").fetchall()
+
+    # ---------------- Transactions ----------------
+
+    def begin_transaction(self) -> str:
+        """Open a dedicated cursor, begin on it and return its tx_id."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.begin()
+        except Exception:
+            cursor.close()
+            raise
+        return self._transactions.open({"cursor": cursor})
+
+    def commit(self, tx_id: Optional[str] = None):
+        handle = self._transactions.pop(self._transactions.resolve(tx_id))
+        try:
+            handle["cursor"].commit()
+        finally:
+            handle["cursor"].close()
+
+    def rollback(self, tx_id: Optional[str] = None):
+        handle = self._transactions.pop(self._transactions.resolve(tx_id))
+        self._discard_transaction(handle)
+
+    def _discard_transaction(self, handle: Dict[str, Any]) -> None:
+        try:
+            handle["cursor"].rollback()
+        finally:
+            handle["cursor"].close()
+
+    @contextmanager
+    def _write_cursor(self, tx_id: Optional[str] = None):
+        """
+        Cursor for a write: the transaction's cursor when tx_id is given,
+        otherwise a fresh one committing on its own.
+        """
+        if tx_id is not None:
+            with self._transactions.use(tx_id) as handle:
+                yield handle["cursor"]
+            return
+        cursor = self.conn.cursor()
+        try:
+            cursor.begin()
+            try:
+                yield cursor
+            except Exception:
+                cursor.rollback()
+                raise
+            cursor.commit()
+        finally:
+            cursor.close()
+
+    def _run_write(self, work, tx_id: Optional[str] = None):
+        """Run work(cursor) on the write cursor for tx_id and return its result."""
+        with self._write_cursor(tx_id) as cursor:
+            return work(cursor)
+
+    # ---------------- Writes ----------------
+
+    def _insert_sql(self, table: str, columns) -> str:
+        keys = ", ".join(columns)
+        values = ", ".join([f"${k}" for k in columns])
+        return f"INSERT INTO {table} ({keys}) VALUES ({values})"
+
+    def _update_sql(self, table: str, columns, filter_columns) -> str:
+        set_clause = ", ".join([f"{k}=${k}" for k in columns])
+        where = " AND ".join([f"{k}=$_f_{k}" for k in filter_columns])
+        return f"UPDATE {table} SET {set_clause} WHERE {where}"
+
+    def _update_params(self, filters: Dict[str, Any], data: Dict[str, Any]):
+        return data | {f"_f_{k}": v for k, v in filters.items()}
+
+    def _delete_sql(self, table: str, filter_columns) -> str:
+        where = " AND ".join([f"{k}=${k}" for k in filter_columns])
+        return f"DELETE FROM {table} WHERE {where}"
+
+    def insert(self, table: str, data: Dict[str, Any], *, tx_id=None):
+        query = self._insert_sql(table, data.keys())
+        self._run_write(lambda cursor: cursor.execute(query, data), tx_id)
+
+    def bulk_insert(self, table: str, data: List[Dict[str, Any]], *, tx_id=None):
+        if not data:
+            return
+        self._run_write(lambda cursor: self._load_chunk(cursor, table, data), tx_id)
+
+    def update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any], *, tx_id=None):
+        query = self._update_sql(table, data.keys(), filters.keys())
+        params = self._update_params(filters, data)
+        self._run_write(lambda cursor: cursor.execute(query, params), tx_id)
+
+    def delete(self, table: str, filters: Dict[str, Any], *, tx_id=None):
+        query = self._delete_sql(table, filters.keys())
+        self._run_write(lambda cursor: cursor.execute(query, filters), tx_id)
+
+    # ---------------- Batch ----------------
+
+    def apply_batch(self, operations: List[Dict[str, Any]], *, tx_id=None) -> Dict[str, Any]:
+        """
+        Run heterogeneous insert / update / delete ops in one transaction.
+        Consecutive ops with the same (table, op, columns) share one
+        statement, run once per op (DuckDB's executemany reports no row
+        counts). Without tx_id any failure rolls the whole batch back.
+        """
+        groups = list(group_batch_ops(operations))
+
+        def work(cursor):
+            results: List[Dict[str, Any]] = [None] * len(operations)
+            statements = []
+            for n, ((table, kind, columns, filter_columns), indices) in enumerate(groups):
+                ops = [operations[i] for i in indices]
+                if kind == "insert":
+                    query = self._insert_sql(table, columns)
+                    params = [op["data"] for op in ops]
+                elif kind == "update":
+                    query = self._update_sql(table, columns, filter_columns)
+                    params = [self._update_params(op["filters"], op["data"]) for op in ops]
+                else:
+                    query = self._delete_sql(table, filter_columns)
+                    params = [op["filters"] for op in ops]
+
+                try:
+                    rowcount = sum(cursor.execute(query, p).fetchone()[0] for p in params)
+                except Exception as e:
+                    raise batch_failure(kind, table, indices, e, tx_id) from e
+
+                statements.append({"table": table, "op": kind, "ops": len(indices), "rowcount": rowcount})
+                for i in indices:
+                    results[i] = {"index": i, "op": kind, "table": table, "status": "ok", "statement": n}
+
+            return {"applied": len(operations), "statements": statements, "results": results}
+
+        return self._run_write(work, tx_id)
+
+    # ---------------- Upsert ----------------
+
+    def upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        conflict_keys: List[str],
+        chunk_size: int = 50000,
+        *,
+        tx_id=None,
+    ) -> Dict[str, int]:
+        """
+        Insert-or-update through INSERT ... SELECT ... ON CONFLICT from an
+        Arrow chunk, all chunks in a single transaction. conflict_keys must
+        be a primary key or unique constraint. Rows repeating the same
+        conflict key are collapsed (last one wins).
+        """
+        if not rows:
+            return {"inserted": 0, "updated": 0, "skipped": 0}
+        if not conflict_keys:
+            raise ValueError("conflict_keys must name at least one column")
+
+        columns = list(rows[0].keys())
+        for key in conflict_keys:
+            if key not in columns:
+                raise ValueError(f"Conflict key '{key}' missing from rows")
+        for row in rows:
+            if set(row) != set(columns):
+                raise ValueError("All rows must have the same columns")
+
+        unique_rows = list({
+            tuple(row[k] for k in conflict_keys): row for row in rows
+        }.values())
+
+        # With only key columns there is nothing to update: existing rows are skipped
+        existing_count = "updated" if set(columns) - set(conflict_keys) else "skipped"
+
+        def work(cursor):
+            counts = {"inserted": 0, "updated": 0, "skipped": 0}
+            for start in range(0, len(unique_rows), chunk_size):
+                chunk = unique_rows[start:start + chunk_size]
+                inserted, existing = self._upsert_chunk(cursor, table, columns, conflict_keys, chunk)
+                counts["inserted"] += inserted
+                counts[existing_count] += existing
+            return counts
+
+        return self._run_write(work, tx_id)
+
+    def _upsert_chunk(self, cursor, table, columns, conflict_keys, chunk):
+        updates = [c for c in columns if c not in conflict_keys]
+        if updates:
+            action = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+        else:
+            action = "DO NOTHING"
+        match = " AND ".join(f"t.{k} = c.{k}" for k in conflict_keys)
+        with self._registered(cursor, chunk) as name:
+            existing = cursor.execute(
+                f"SELECT COUNT(*) FROM {table} AS t JOIN {name} AS c ON {match}"
+            ).fetchone()[0]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {name} "
+                f"ON CONFLICT ({', '.join(conflict_keys)}) {action}"
+            )
+        return len(chunk) - existing, existing
+
+    # ---------------- Bulk load ----------------
+
+    def bulk_load(self, table: str, chunks, *, tx_id=None) -> int:
+        """
+        Load an iterable of row chunks in one transaction, consuming one
+        chunk at a time. Rows within a chunk must share the same columns.
+        """
+        def work(cursor):
+            loaded = 0
+            for chunk in chunks:
+                if chunk:
+                    loaded += self._load_chunk(cursor, table, chunk)
+            return loaded
+
+        return self._run_write(work, tx_id)
+
+    @contextmanager
+    def _registered(self, cursor, chunk: List[Dict[str, Any]]):
+        """The chunk as an Arrow table registered on cursor; yields its name."""
+        cursor.register("_chunk", pyarrow.Table.from_pylist(chunk))
+        try:
+            yield "_chunk"
+        finally:
+            cursor.unregister("_chunk")
+
+    def _load_chunk(self, cursor, table: str, chunk: List[Dict[str, Any]]) -> int:
+        """
+        INSERT ... SELECT from the chunk as an Arrow table, a columnar
+        append; chunks Arrow cannot type (mixed value types in a column)
+        fall back to executemany.
+        """
+        columns = ", ".join(chunk[0].keys())
+        try:
+            with self._registered(cursor, chunk) as name:
+                cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {name}")
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            cursor.executemany(self._insert_sql(table, chunk[0].keys()), chunk)
+        return len(chunk)
+
+    # ---------------- Aggregation ----------------
+
+    def aggregate(self, table: str, pipeline: str, *, limit=None, **options):
+        # Mongo cursor options (allow_disk_use, fields, ...) don't apply to SQL
+        return self.execute_query(pipeline, limit=limit)
+
+    # ---------------- Streaming ----------------
+
+    def fetch_many(self, query: str, batch_size: int = 1000):
+        """Arrow record batches of batch_size rows, each converted to rows as a whole."""
+        self.validate_query(query)
+        control = current_control()
+        with self._read_cursor() as cursor:
+            for batch in cursor.execute(query).to_arrow_reader(batch_size):
+                if control:
+                    control.check()
+                yield batch.to_pylist()
+
+    # COPY options per export file format
+    COPY_FORMATS = {
+        "csv": "FORMAT csv, HEADER",
+        "ndjson": "FORMAT json",
+        "parquet": "FORMAT parquet",
+    }
+
+    def copy_to_file(self, query: str, path: str, file_format: str) -> Dict[str, Any]:
+        """
+        Write a query's result to path with COPY ... TO: DuckDB encodes and
+        writes the file itself, in parallel, and no row passes through
+        Python. See capabilities()["copy_to_file"].
+        """
+        self.validate_query(query)
+        if _PARENT_DIR.search(path):
+            raise ValueError("Paths with .. segments are not allowed")
+        with self._read_cursor() as cursor:
+            schema = {
+                row[0]: row[1] for row in cursor.execute(f"DESCRIBE {query}").fetchall()
+            }
+            rows = cursor.execute(
+                f"COPY ({query}) TO {_quote_literal(path)} ({self.COPY_FORMATS[file_format]})"
+            ).fetchone()[0]
+        return {"rows": rows, "schema": schema}
+
+    # ---------------- Time series ----------------
+
+    def downsample(
+        self,
+        table: str,
+        time_column: str,
+        value_columns: List[str],
+        bucket: str,
+        agg: str = "avg",
+        *,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        max_points: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        check_downsample_args(time_column, value_columns, agg)
+        count, unit = parse_bucket(bucket)
+        conditions, params = [], {}
+        if start is not None:
+            conditions.append(f"{time_column} >= $start")
+            params["start"] = start
+        if end is not None:
+            conditions.append(f"{time_column} < $end")
+            params["end"] = end
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        aggregates = ", ".join(f"{agg.upper()}({c}) AS {c}" for c in value_columns)
+        query = (
+            f"SELECT {self._bucket_expression(time_column, count, unit)} AS bucket, "
+            f"{aggregates}, COUNT(*) AS samples FROM {self._relation(table)}{where} "
+            f"GROUP BY 1 ORDER BY 1"
+        )
+        with self._read_cursor() as cursor:
+            rows = cursor.execute(query, params).to_arrow_table().to_pylist()
+        return reduce_points(rows, value_columns[0], max_points)
+
+    def _bucket_expression(self, column: str, count: int, unit: str) -> str:
+        """date_trunc for single units, time_bucket for multiples (week buckets start Monday)."""
+        if count == 1:
+            return f"date_trunc('{unit}', {column})"
+        return f"time_bucket(INTERVAL '{count} {unit}s', {column})"
+
+    # ---------------- Full-text search ----------------
+
+    # Case-insensitive pattern match of the fallback scan
+    LIKE_OPERATOR = "ILIKE"
+
+    def search_text(self, table: str, columns: List[str], query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        check_columns(columns)
+        check_search_query(query)
+        with self._read_cursor() as cursor:
+            if self._has_text_index(cursor, table):
+                return self._fts_search(cursor, table, columns, query, limit)
+            return self._like_search(cursor, self._relation(table), columns, query, limit)
+
+    def create_text_index(self, table: str, columns: List[str], sample_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        The fts extension's BM25 index. It is not maintained on writes, so
+        an existing index is rebuilt (overwritten) rather than kept.
+        """
+        check_columns(columns)
+        start = time.monotonic()
+        with self._read_cursor() as cursor:
+            catalog, schema, name = self._locate(cursor, table)
+            key = self._primary_key(cursor, catalog, schema, name)
+        if catalog != self._database or schema != "main":
+            raise ValueError("DuckDB full-text indexes only cover tables in the database's main schema")
+        if key is None:
+            raise ValueError(f"A full-text index needs a single-column primary key on {table}")
+
+        fields = ", ".join(_quote_literal(c) for c in columns)
+        self._run_write(lambda cursor: cursor.execute(
+            f"PRAGMA create_fts_index({_quote_literal(table)}, {_quote_literal(key)}, {fields}, overwrite=1)"
+        ))
+        report = {
+            "table": table,
+            "columns": columns,
+            "index": self._text_index_schema(table),
+            "created": True,
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        term = sample_query or sample_term(
+            [row.get(c) for row in self.sample_rows(table, 20) for c in columns]
+        )
+        if term:
+            with self._read_cursor() as cursor:
+                fts_ms, fts_rows = best_ms(lambda: self._fts_search(cursor, table, columns, term, 20))
+                like_ms, like_rows = best_ms(lambda: self._like_search(cursor, table, columns, term, 20))
+            report.update(speedup_report(term, fts_ms, like_ms, len(fts_rows), len(like_rows)))
+        return report
+
+    def _text_index_schema(self, table: str) -> str:
+        """Schema the fts extension keeps a table's index in."""
+        return f"fts_main_{table}"
+
+    def _has_text_index(self, cursor, table: str) -> bool:
+        return cursor.execute(
+            "SELECT COUNT(*) FROM duckdb_schemas() WHERE database_name = current_database() AND schema_name = ?",
+            [self._text_index_schema(table)],
+        ).fetchone()[0] > 0
+
+    def _fts_search(self, cursor, table: str, columns: List[str], query: str, limit: int):
+        key = self._primary_key(cursor, *self._locate(cursor, table))
+        score = (
+            f"{self._text_index_schema(table)}.match_bm25({key}, $query, "
+            f"fields := {_quote_literal(','.join(columns))})"
+        )
+        return cursor.execute(
+            f"SELECT * FROM (SELECT *, {score} AS _rank FROM {table}) "
+            f"WHERE _rank IS NOT NULL ORDER BY _rank DESC LIMIT {int(limit)}",
+            {"query": query},
+        ).to_arrow_table().to_pylist()
+
+    def _like_search(self, cursor, relation: str, columns: List[str], query: str, limit: int):
+        """Substring scan; _rank is the number of matching columns."""
+        matches = [f"{c} {self.LIKE_OPERATOR} $pattern" for c in columns]
+        rank = " + ".join(f"(CASE WHEN {m} THEN 1 ELSE 0 END)" for m in matches)
+        return cursor.execute(
+            f"SELECT *, {rank} AS _rank FROM {relation} "
+            f"WHERE {' OR '.join(matches)} ORDER BY _rank DESC LIMIT {int(limit)}",
+            {"pattern": f"%{query}%"},
+        ).to_arrow_table().to_pylist()
+
+    # ---------------- Vector search ----------------
+
+    # DuckDB list function scoring each metric (list_distance is negated)
+    VECTOR_FUNCTIONS = {
+        "cosine": "list_cosine_similarity",
+        "dot": "list_inner_product",
+        "l2": "list_distance",
+    }
+    # Index candidates per requested row when filters may reject some of them
+    VECTOR_FILTER_OVERSAMPLING = 10
+
+    def vector_search(
+        self,
+        table: str,
+        column: str,
+        embedding: List[float],
+        k: int = 10,
+        *,
+        filters: Optional[Dict[str, Any]] = None,
+        metric: str = "cosine",
+        exact: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        LIST / ARRAY columns are scored in SQL with DuckDB's list functions
+        unless an IVF index from create_vector_index() exists (and exact is
+        off). Float32 blobs and JSON arrays are scored with NumPy over
+        Arrow batches, or through the index.
+        """
+        check_vector_args(column, metric, k)
+        filters = filters or {}
+        if filters:
+            check_columns(list(filters))
+        relation = self._relation(table)
+        with self._read_cursor() as cursor:
+            schema = self._arrow_schema(cursor, relation)
+            if column not in schema.names:
+                raise ValueError(f"Column not found: {column}")
+            key = None if relation != table else self._row_key(cursor, table)
+            index = None
+            if key and not exact:
+                index = load_index(self._vector_index_path(table, column, metric))
+                if index and index.meta.get("key_column") != key:
+                    index = None
+            if index is None and _is_list(schema.field(column).type):
+                return self._scored_search(cursor, relation, column, embedding, k, filters, metric)
+            query = query_vector(embedding)
+            return nearest(
+                query, k, metric, column,
+                blocks=lambda after: self._vector_blocks(cursor, relation, column, key, filters, after, len(query)),
+                fetch=(lambda keys: self._rows_by_key(cursor, table, key, keys, filters)) if key else None,
+                index=index,
+                oversampling=self.VECTOR_FILTER_OVERSAMPLING if filters else 1,
+            )
+
+    def create_vector_index(self, table: str, column: str, metric: str = "cosine") -> Dict[str, Any]:
+        """
+        An IVF index file of the column's vectors, keyed by the primary key
+        or rowid: rows deleted or changed later are rescored from the table,
+        rows appended later are scanned exactly, anything else needs a
+        rebuild.
+        """
+        check_vector_args(column, metric, 1)
+        start = time.monotonic()
+        with self._read_cursor() as cursor:
+            key = self._row_key(cursor, table)
+            if key is None:
+                raise ValueError(f"A vector index needs a primary key or rowid on {table}")
+            keys, matrix = collect_vectors(self._vector_blocks(cursor, table, column, key, {}, None))
+        index = IVFIndex.build(
+            self._vector_index_path(table, column, metric), keys, matrix, metric,
+            {"table": table, "column": column, "key_column": key},
+        )
+        report = {
+            "table": table,
+            "column": column,
+            "metric": metric,
+            "kind": "ivf",
+            "index": index.path,
+            "vectors": index.meta["vectors"],
+            "lists": index.meta["lists"],
+            "probes": index.probes(),
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        queries = [as_vector(row.get(column)) for row in self.sample_rows(table, BENCHMARK_QUERIES)]
+        report.update(benchmark_index(
+            lambda query, exact: self.vector_search(table, column, query, metric=metric, exact=exact),
+            [query for query in queries if query is not None],
+        ))
+        return report
+
+    def _scored_search(self, cursor, relation, column, embedding, k, filters, metric):
+        vector = f"{column}::FLOAT[]"
+        score = f"{self.VECTOR_FUNCTIONS[metric]}({vector}, $_embedding::FLOAT[])"
+        if metric == "l2":
+            score = f"-{score}"
+        # The list functions reject vectors of another length
+        conditions = [f"len({vector}) = {len(embedding)}", *(f"{c} = $_f_{c}" for c in filters)]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        params["_embedding"] = [float(x) for x in embedding]
+        return cursor.execute(
+            f"SELECT * EXCLUDE ({column}), {score} AS _score FROM {relation} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY _score DESC LIMIT {int(k)}",
+            params,
+        ).to_arrow_table().to_pylist()
+
+    def _primary_key(self, cursor, catalog: str, schema: str, name: str) -> Optional[str]:
+        found = cursor.execute(
+            "SELECT constraint_column_names FROM duckdb_constraints() "
+            "WHERE database_name = ? AND schema_name = ? AND table_name = ? "
+            "AND constraint_type = 'PRIMARY KEY'",
+            [catalog, schema, name],
+        ).fetchone()
+        return found[0][0] if found and len(found[0]) == 1 else None
+
+    def _row_key(self, cursor, table: str) -> Optional[str]:
+        """A single-column primary key, else rowid for tables in DuckDB storage."""
+        catalog, schema, name = self._locate(cursor, table)
+        key = self._primary_key(cursor, catalog, schema, name)
+        if key is None and catalog == self._database:
+            return "rowid"
+        return key
+
+    def _vector_index_root(self) -> str:
+        """Next to the database file (<file>.vectors); under INDEX_DIR for in-memory databases."""
+        if self.path != ":memory:":
+            return f"{self.path}.vectors"
+        return os.path.join(INDEX_DIR, hashlib.sha1(self.db_url.encode()).hexdigest()[:12])
+
+    def _vector_index_path(self, table: str, column: str, metric: str) -> str:
+        return index_path(self._vector_index_root(), table, column, metric)
+
+    def _vector_blocks(self, cursor, relation, column, key, filters, after, dim=None):
+        """
+        (matrix, keys) per SCAN_BLOCK_ROWS-row Arrow batch of the rows
+        matching filters (with key above `after` unless it is None);
+        without a key, (matrix, rows).
+        """
+        conditions = [f"{c} = $_f_{c}" for c in filters]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        if after is not None:
+            conditions.append(f"{key} > $_after")
+            params["_after"] = after
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        control = current_control()
+        reader = cursor.execute(
+            f"SELECT {f'{key}, {column}' if key else '*'} FROM {relation}{where}", params
+        ).to_arrow_reader(SCAN_BLOCK_ROWS)
+        for batch in reader:
+            if control:
+                control.check()
+            if key:
+                yield self._arrow_block(batch.column(1), batch.column(0).to_pylist(), dim)
+            else:
+                rows = batch.to_pylist()
+                yield vector_block([row.get(column) for row in rows], rows, dim)
+
+    def _arrow_block(self, values: pyarrow.Array, keys: List[Any], dim: Optional[int]):
+        """vector_block for an Arrow column; equal-length lists become the matrix without per-row conversion."""
+        if _is_list(values.type) and len(values) and values.null_count == 0:
+            lengths = pyarrow.compute.list_value_length(values)
+            bounds = pyarrow.compute.min_max(lengths)
+            shortest, longest = bounds["min"].as_py(), bounds["max"].as_py()
+            if shortest == longest and shortest and dim in (None, shortest):
+                np = require_numpy()
+                matrix = values.flatten().to_numpy(zero_copy_only=False).astype(np.float32)
+                return matrix.reshape(len(values), -1), keys
+        return vector_block(values.to_pylist(), keys, dim)
+
+    def _rows_by_key(self, cursor, table, key, keys, filters) -> Dict[Any, Dict[str, Any]]:
+        if not keys:
+            return {}
+        conditions = [f"{key} IN (SELECT UNNEST($_keys))", *(f"{c} = $_f_{c}" for c in filters)]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        params["_keys"] = list(keys)
+        rows = {}
+        result = cursor.execute(
+            f"SELECT {key} AS _vector_key, * FROM {table} WHERE {' AND '.join(conditions)}", params
+        )
+        for row in result.to_arrow_table().to_pylist():
+            rows[row.pop("_vector_key")] = row
+        return rows
+
+    # DuckDB parallelizes each scan itself, so parallel_scan stays the
+    # single-stream base version.
+
+    def raw_client(self):
+        return self.conn
@@ -1,12 +1,219 @@
-from pymongo import MongoClient
-from typing import Any, Dict, List
+import bson
+from pymongo import (
+    DeleteMany,
+    DeleteOne,
+    InsertOne,
+    MongoClient,
+    ReplaceOne,
+    UpdateMany,
+    UpdateOne,
+)
+from pymongo.errors import BulkWriteError
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from adapters.base import DatabaseAdapter
+from adapters.batch import group_batch_ops
+from adapters.deadlines import QueryCancelled, current_control
+from adapters.parallel_scan import merge_partitions
+from adapters.text_search import best_ms, check_columns, check_search_query, sample_term, speedup_report, text_index_name
+from adapters.timeseries import check_downsample_args, parse_bucket, reduce_points
+from adapters.transactions import TransactionRegistry
+from adapters.vector_search import (
+    BENCHMARK_QUERIES,
+    INDEX_DIR,
+    SCAN_BLOCK_ROWS,
+    IVFIndex,
+    as_vector,
+    benchmark_index,
+    check_vector_args,
+    collect_vectors,
+    index_path,
+    load_index,
+    nearest,
+    query_vector,
+    vector_block,
+)
+from contextlib import contextmanager
+from datetime import datetime
 from urllib.parse import quote_plus, urlparse, urlunparse
+import functools
+import os
 import re
+import time
+
+
+# Stages that map each input document to exactly one output document without
+# looking at its neighbours. A $limit can be moved in front of these safely.
+ONE_TO_ONE_STAGES = {
+    "$project", "$addFields", "$set", "$unset",
+    "$replaceRoot", "$replaceWith", "$lookup",
+}
+
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Server-side minimum for maxStalenessSeconds
+MIN_MAX_STALENESS_SECONDS = 90
+
+
+def read_preference(mode: str, max_staleness_seconds: Optional[int] = None):
+    """
+    Build a pymongo read preference from its connection-string name.
+    max_staleness_seconds keeps lagging secondaries out of server selection.
+    """
+    if mode not in READ_PREFERENCES:
+        raise ValueError(
+            f"Unknown read_preference: {mode}. Expected one of: {', '.join(READ_PREFERENCES)}"
+        )
+    if mode == "primary":
+        return Primary()
+    if max_staleness_seconds is None:
+        return READ_PREFERENCES[mode]()
+    if max_staleness_seconds < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"max_staleness_seconds must be at least {MIN_MAX_STALENESS_SECONDS}")
+    return READ_PREFERENCES[mode](max_staleness=int(max_staleness_seconds))
+
+
+def optimize_pipeline(
+    pipeline: List[Dict[str, Any]],
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Push a caller supplied row limit / field subset into an aggregation pipeline.
+
+    $limit is injected right after the last stage that changes cardinality or
+    order, so expensive per-document stages ($lookup etc.) only run on the rows
+    that are returned. $project goes last because earlier stages may reference
+    fields outside the subset; the server's dependency analysis pushes it down
+    to the query layer from there.
+    """
+    stages = list(pipeline or [])
+
+    if limit:
+        cut = len(stages)
+        while cut > 0 and next(iter(stages[cut - 1]), None) in ONE_TO_ONE_STAGES:
+            cut -= 1
+        previous = stages[cut - 1] if cut > 0 else {}
+        if "$limit" in previous:
+            stages[cut - 1] = {"$limit": min(previous["$limit"], limit)}
+        else:
+            stages.insert(cut, {"$limit": limit})
+
+    if fields:
+        projection = {f: 1 for f in fields}
+        if "_id" not in projection:
+            projection["_id"] = 0
+        stages.append({"$project": projection})
+
+    return stages
+
+
+# Server limits for a single write command.
+MAX_WRITE_BATCH_BYTES = 16 * 1024 * 1024
+MAX_WRITE_BATCH_OPS = 100_000
+
+
+def build_write_op(op: Dict[str, Any]):
+    """
+    Convert a plain dict into a pymongo write model.
+
+    {"op": "insert", "document": {...}}
+    {"op": "update", "filter": {...}, "update": {...}, "upsert": False, "many": False}
+    {"op": "replace", "filter": {...}, "replacement": {...}, "upsert": False}
+    {"op": "delete", "filter": {...}, "many": False}
+    """
+    kind = op.get("op")
+    if kind == "insert":
+        return InsertOne(op["document"])
+    if kind == "update":
+        update = op["update"]
+        # Plain field/value dicts are treated as $set, like update();
+        # lists are aggregation pipeline updates and pass through as is
+        if isinstance(update, dict) and not any(k.startswith("$") for k in update):
+            update = {"$set": update}
+        model = UpdateMany if op.get("many") else UpdateOne
+        return model(op["filter"], update, upsert=op.get("upsert", False))
+    if kind == "replace":
+        return ReplaceOne(op["filter"], op["replacement"], upsert=op.get("upsert", False))
+    if kind == "delete":
+        model = DeleteMany if op.get("many") else DeleteOne
+        return model(op["filter"])
+    raise ValueError(f"Unsupported bulk write op: {kind}")
+
+
+def estimate_op_size(op: Dict[str, Any]) -> int:
+    """
+    Approximate BSON size of a write op, used for chunking: the whole op
+    encoded (wrapped, since pipeline updates are lists) plus command overhead.
+    """
+    return len(bson.encode({"op": op})) + 64
+
+
+def chunk_write_ops(
+    ops: List[Any],
+    size_of=estimate_op_size,
+    max_ops: int = MAX_WRITE_BATCH_OPS,
+    max_bytes: int = MAX_WRITE_BATCH_BYTES,
+) -> Iterator[tuple]:
+    """Yield (offset, chunk) pairs that stay under the op-count and byte limits."""
+    chunk, offset, chunk_bytes = [], 0, 0
+    for index, op in enumerate(ops):
+        size = size_of(op)
+        if chunk and (len(chunk) >= max_ops or chunk_bytes + size > max_bytes):
+            yield offset, chunk
+            chunk, offset, chunk_bytes = [], index, 0
+        chunk.append(op)
+        chunk_bytes += size
+    if chunk:
+        yield offset, chunk
+
+
+def iter_batches(cursor: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Group a document cursor into lists of at most batch_size documents."""
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def id_type_bracket(value: Any) -> str:
+    """
+    The BSON comparison bracket of an _id: $gte / $lt only match values of
+    their own bracket. All numeric types share one.
+    """
+    if isinstance(value, (int, float, bson.Decimal128)) and not isinstance(value, bool):
+        return "number"
+    return type(value).__name__
 
 
 class MongoAdapter(DatabaseAdapter):
+    # Seconds an open transaction may sit unused before it is aborted
+    TRANSACTION_IDLE_TIMEOUT = 60.0
+
     def __init__(self, db_url: str):
+        self._transactions = TransactionRegistry(
+            on_expire=self._discard_transaction,
+            idle_timeout=self.TRANSACTION_IDLE_TIMEOUT,
+        )
+        self._transactions_supported: Optional[bool] = None
+        self._table_stats: Dict[str, tuple] = {}
         # Auto-encode credentials if they contain special characters
         db_url = self._encode_mongodb_uri(db_url)
         self.client = MongoClient(db_url)
@@ -77,6 +284,7 @@ class MongoAdapter(DatabaseAdapter):
         self.client.admin.command("ping")
 
     def close(self):
+        self._transactions.close_all()
         self.client.close()
 
     def health_check(self) -> bool:
@@ -88,13 +296,21 @@ class MongoAdapter(DatabaseAdapter):
 
     # ---------------- Capabilities ----------------
 
+    def open_transactions(self) -> int:
+        return len(self._transactions)
+
+    def concurrency_limits(self):
+        """Well under pymongo's default maxPoolSize of 100"""
+        return {"read": 16, "write": 8, "schema": 2}
+
     def capabilities(self):
         return {
             "read": True,
             "write": True,
-            "transactions": False,
+            "transactions": self._supports_transactions(),
             "schema_introspection": False,
             "aggregation": True,
+            "bulk_write": True,
         }
 
     # ---------------- Schema ----------------
@@ -112,6 +328,52 @@ class MongoAdapter(DatabaseAdapter):
     def get_indexes(self, table: str):
         return self.db[table].index_information()
 
+    # Collection statistics are refreshed at most this often
+    STATS_CACHE_SECONDS = 60.0
+
+    def get_table_stats(self, table: str, *, refresh: bool = False):
+        now = time.monotonic()
+        cached = self._table_stats.get(table)
+        if refresh or cached is None or now - cached[0] > self.STATS_CACHE_SECONDS:
+            cached = (now, self._collect_table_stats(table))
+            self._table_stats[table] = cached
+        return {**cached[1], "age_seconds": round(now - cached[0], 1)}
+
+    def _collect_table_stats(self, table: str) -> Dict[str, Any]:
+        """estimatedDocumentCount (collection metadata) plus $collStats storage sizes."""
+        collection = self.db[table]
+        stats = {
+            "table": table,
+            "estimated_rows": collection.estimated_document_count(),
+            "source": "estimatedDocumentCount",
+        }
+        try:
+            storage = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+        except Exception:
+            # Missing privilege, views, or servers without $collStats
+            return stats
+        stats.update(
+            total_bytes=storage.get("totalSize"),
+            data_bytes=storage.get("size"),
+            storage_bytes=storage.get("storageSize"),
+            avg_document_bytes=storage.get("avgObjSize"),
+            index_bytes=storage.get("totalIndexSize"),
+            indexes=storage.get("nindexes"),
+            source="estimatedDocumentCount / $collStats",
+        )
+        return stats
+
+    def sample_rows(self, table: str, n: int = 10):
+        """$sample picks random documents with a random cursor when n is small relative to the collection."""
+        cursor = self._read_collection(table).aggregate([{"$sample": {"size": n}}])
+        with self._guarded(cursor):
+            return list(cursor)
+
+    def get_column_types(self, table: str):
+        """Schemaless: types of a sampled document's fields."""
+        sample = self.db[table].find_one()
+        return {k: type(v) for k, v in sample.items()} if sample else {}
+
     # ---------------- Query ----------------
 
     def validate_query(self, query: Any):
@@ -144,58 +406,741 @@ class MongoAdapter(DatabaseAdapter):
         if "collection" not in query:
             raise ValueError("Query dictionary must include 'collection' key")
         
-        collection = self.db[query["collection"]]
-        cursor = collection.find(query.get("filter", {}))
-        if limit:
-            cursor = cursor.limit(limit)
-        return list(cursor)
+        cursor = self._find_cursor(query, limit=limit)
+        with self._guarded(cursor):
+            return list(cursor)
 
     def explain_query(self, query):
-        collection = self.db[query["collection"]]
-        return collection.find(query.get("filter", {})).explain()
+        return self._find_cursor(query).explain()
+
+    # ---------------- Find options ----------------
+
+    def _normalize_sort(self, sort: Any) -> List[tuple]:
+        """Accept {'field': 1}, [['field', -1]] or 'field' and return pymongo key specs."""
+        if isinstance(sort, str):
+            return [(sort, 1)]
+        if isinstance(sort, dict):
+            return [(k, int(v)) for k, v in sort.items()]
+        return [(item[0], int(item[1])) for item in sort]
+
+    def _resolve_hint(self, collection: str, hint: Any) -> Any:
+        """Validate a hint against the collection's existing indexes."""
+        indexes = self.get_indexes(collection)
+        if isinstance(hint, str):
+            if hint not in indexes:
+                raise ValueError(
+                    f"Hint '{hint}' does not match an index on {collection}. "
+                    f"Available indexes: {list(indexes)}"
+                )
+            return hint
+
+        key = self._normalize_sort(hint)
+        if not any(list(map(tuple, info["key"])) == key for info in indexes.values()):
+            raise ValueError(
+                f"Hint {key} does not match an index on {collection}. "
+                f"Available indexes: {list(indexes)}"
+            )
+        return key
+
+    def _find_cursor(self, query: Dict[str, Any], limit: Optional[int] = None):
+        """
+        Build a find() cursor from a query dict.
+        Supported keys: collection, filter, projection, sort, skip, limit,
+        hint, collation, max_time_ms, batch_size, read_preference
+        (e.g. 'secondaryPreferred'), max_staleness_seconds.
+        """
+        if "collection" not in query:
+            raise ValueError("Query dictionary must include 'collection' key")
+
+        name = query["collection"]
+        projection = query.get("projection")
+        if isinstance(projection, (list, tuple)):
+            projection = {field: 1 for field in projection}
+
+        collection = self._read_collection(
+            name, query.get("read_preference"), query.get("max_staleness_seconds")
+        )
+        cursor = collection.find(query.get("filter", {}), projection)
+
+        if query.get("sort"):
+            cursor = cursor.sort(self._normalize_sort(query["sort"]))
+        if query.get("skip"):
+            cursor = cursor.skip(int(query["skip"]))
+
+        limit = limit or query.get("limit")
+        if limit:
+            cursor = cursor.limit(int(limit))
+
+        if query.get("hint"):
+            cursor = cursor.hint(self._resolve_hint(name, query["hint"]))
+        if query.get("collation"):
+            cursor = cursor.collation(query["collation"])
+        max_time_ms = self._max_time_ms(query.get("max_time_ms"))
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        if query.get("batch_size"):
+            cursor = cursor.batch_size(int(query["batch_size"]))
+
+        control = current_control()
+        if control:
+            cursor = cursor.comment(self._operation_tag(control))
+        return cursor
+
+    def _read_collection(
+        self,
+        name: str,
+        mode: Optional[str] = None,
+        max_staleness_seconds: Optional[int] = None,
+    ):
+        """Collection handle for a read, routed per call by read preference."""
+        collection = self.db[name]
+        if mode is None:
+            return collection
+        return collection.with_options(
+            read_preference=read_preference(mode, max_staleness_seconds)
+        )
+
+    # ---------------- Deadlines ----------------
+
+    def _max_time_ms(self, max_time_ms: Optional[int]) -> Optional[int]:
+        """Cap a query's maxTimeMS at the time left on the current tool call."""
+        control = current_control()
+        remaining = control.remaining_ms() if control else None
+        if remaining and max_time_ms:
+            return min(int(max_time_ms), remaining)
+        return remaining or (int(max_time_ms) if max_time_ms else None)
+
+    def _operation_tag(self, control) -> str:
+        """Comment attached to the call's operations so killOp can find them."""
+        return f"mcp-query-{id(control):x}"
+
+    def _kill_operations(self, tag: str) -> None:
+        ops = self.client.admin.aggregate([
+            {"$currentOp": {}},
+            {"$match": {"command.comment": tag}},
+        ])
+        for op in ops:
+            self.client.admin.command("killOp", op=op["opid"])
+
+    @contextmanager
+    def _guarded(self, cursor):
+        """
+        Close cursor when done. While it is open, cancelling the tool call
+        kills its server-side operation; MaxTimeMSExpired and killed
+        operations surface as QueryCancelled.
+        """
+        control = current_control()
+        try:
+            if control is None:
+                yield cursor
+                return
+            control.check()
+            tag = self._operation_tag(control)
+            try:
+                with control.interrupt_with(lambda: self._kill_operations(tag)):
+                    yield cursor
+            except QueryCancelled:
+                raise
+            except Exception as e:
+                if control.cancelled or control.expired():
+                    raise QueryCancelled(
+                        "Query cancelled" if control.cancelled else "Query deadline exceeded"
+                    ) from e
+                raise
+        finally:
+            cursor.close()
+
+    def _stream(self, cursor, batch_size: int):
+        """iter_batches with a deadline/cancellation check between batches."""
+        control = current_control()
+        with self._guarded(cursor):
+            for batch in iter_batches(cursor, batch_size):
+                if control:
+                    control.check()
+                yield batch
 
     # ---------------- Writes ----------------
 
-    def insert(self, table: str, data: Dict[str, Any]):
-        return self.db[table].insert_one(data).inserted_id
+    def insert(self, table: str, data: Dict[str, Any], *, tx_id=None):
+        with self._session(tx_id) as session:
+            return self.db[table].insert_one(data, session=session).inserted_id
+
+    def bulk_insert(self, table: str, data: List[Dict[str, Any]], *, tx_id=None):
+        inserted_ids = []
+        with self._session(tx_id) as session:
+            for _, chunk in chunk_write_ops(data, size_of=lambda doc: len(bson.encode(doc))):
+                result = self.db[table].insert_many(chunk, ordered=False, session=session)
+                inserted_ids.extend(result.inserted_ids)
+        return inserted_ids
+
+    def update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any], *, tx_id=None):
+        with self._session(tx_id) as session:
+            return self.db[table].update_many(filters, {"$set": data}, session=session)
+
+    def delete(self, table: str, filters: Dict[str, Any], *, tx_id=None):
+        with self._session(tx_id) as session:
+            return self.db[table].delete_many(filters, session=session)
 
-    def bulk_insert(self, table: str, data: List[Dict[str, Any]]):
-        return self.db[table].insert_many(data).inserted_ids
+    def bulk_load(self, table: str, chunks, *, tx_id=None) -> int:
+        loaded = 0
+        with self._session(tx_id) as session:
+            for chunk in chunks:
+                if chunk:
+                    result = self.db[table].insert_many(chunk, ordered=False, session=session)
+                    loaded += len(result.inserted_ids)
+        return loaded
 
-    def update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any]):
-        return self.db[table].update_many(filters, {"$set": data})
+    def bulk_write(
+        self,
+        table: str,
+        operations: List[Dict[str, Any]],
+        *,
+        ordered: bool = False,
+        tx_id=None,
+    ) -> Dict[str, Any]:
+        """
+        Apply mixed insert / update / replace / delete ops through bulk_write.
+
+        Ops are split into chunks under the 16MB / 100k-op command limits.
+        With ordered=False the server may apply ops in parallel and keeps going
+        after a failure; errors are reported with their index in `operations`.
+        """
+        summary = {
+            "inserted": 0,
+            "matched": 0,
+            "modified": 0,
+            "deleted": 0,
+            "upserted": 0,
+            "errors": [],
+        }
+        collection = self.db[table]
 
-    def delete(self, table: str, filters: Dict[str, Any]):
-        return self.db[table].delete_many(filters)
+        with self._session(tx_id) as session:
+            for offset, chunk in chunk_write_ops(operations):
+                if not self._bulk_write_chunk(
+                    collection, offset, chunk, ordered, session, summary
+                ):
+                    break
+
+        return summary
+
+    def _bulk_write_chunk(self, collection, offset, chunk, ordered, session, summary) -> bool:
+        """Apply one chunk and fold its result into summary. Returns False to stop."""
+        requests = [build_write_op(op) for op in chunk]
+        try:
+            result = collection.bulk_write(
+                requests, ordered=ordered, session=session
+            ).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            for error in result.get("writeErrors", []):
+                summary["errors"].append({
+                    "index": offset + error["index"],
+                    "code": error.get("code"),
+                    "message": error.get("errmsg"),
+                })
+
+        summary["inserted"] += result.get("nInserted", 0)
+        summary["matched"] += result.get("nMatched", 0)
+        summary["modified"] += result.get("nModified", 0)
+        summary["deleted"] += result.get("nRemoved", 0)
+        summary["upserted"] += result.get("nUpserted", 0)
+
+        return not (ordered and summary["errors"])
+
+    def upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        conflict_keys: List[str],
+        *,
+        tx_id=None,
+    ) -> Dict[str, int]:
+        if not conflict_keys:
+            raise ValueError("conflict_keys must name at least one field")
+
+        operations = [
+            {
+                "op": "update",
+                "filter": {k: row[k] for k in conflict_keys},
+                "update": {"$set": row},
+                "upsert": True,
+            }
+            for row in rows
+        ]
+        result = self.bulk_write(table, operations, ordered=False, tx_id=tx_id)
+        if result["errors"]:
+            raise ValueError(f"Upsert failed for some documents: {result['errors']}")
+        return {"inserted": result["upserted"], "updated": result["matched"]}
+
+    def apply_batch(self, operations: List[Dict[str, Any]], *, tx_id=None) -> Dict[str, Any]:
+        """
+        Run insert / update / delete ops as ordered bulk_write calls, one per
+        run of consecutive ops on the same collection. Uses a transaction of
+        its own when none is given and the deployment supports it; without
+        transactions, ops before a failure stay applied.
+        """
+        runs = []
+        for (table, _, _, _), indices in group_batch_ops(operations):
+            if runs and runs[-1][0] == table:
+                runs[-1][1].extend(indices)
+            else:
+                runs.append((table, list(indices)))
+
+        own_tx = tx_id is None and self._supports_transactions()
+        if own_tx:
+            tx_id = self.begin_transaction()
+
+        results = [
+            {"index": i, "op": op["op"], "table": op["table"], "status": "skipped"}
+            for i, op in enumerate(operations)
+        ]
+        statements = []
+        error = None
+        try:
+            for n, (table, indices) in enumerate(runs):
+                writes = [self._batch_write_op(operations[i]) for i in indices]
+                summary = self.bulk_write(table, writes, ordered=True, tx_id=tx_id)
+                errors = summary.pop("errors")
+                statements.append({"table": table, "ops": len(indices), **summary})
+
+                # Ordered writes stop at the first error
+                stop = errors[0]["index"] if errors else len(indices)
+                for i in indices[:stop]:
+                    results[i].update(status="ok", statement=n)
+                if errors:
+                    error = errors[0]["message"]
+                    results[indices[stop]].update(status="error", statement=n, error=error)
+                    break
+        except Exception:
+            if own_tx:
+                self.rollback(tx_id)
+            raise
+
+        if own_tx:
+            if error:
+                self.rollback(tx_id)
+            else:
+                self.commit(tx_id)
+
+        return {
+            "applied": 0 if error and own_tx else sum(r["status"] == "ok" for r in results),
+            "rolled_back": bool(error and own_tx),
+            "statements": statements,
+            "results": results,
+        }
+
+    def _batch_write_op(self, op: Dict[str, Any]) -> Dict[str, Any]:
+        if op["op"] == "insert":
+            return {"op": "insert", "document": op["data"]}
+        if op["op"] == "update":
+            return {"op": "update", "filter": op["filters"], "update": op["data"], "many": True}
+        return {"op": "delete", "filter": op["filters"], "many": True}
 
     # ---------------- Aggregation ----------------
 
-    def aggregate(self, table: str, pipeline: List[Dict[str, Any]]):
-        return list(self.db[table].aggregate(pipeline))
+    def aggregate(
+        self,
+        table: str,
+        pipeline: List[Dict[str, Any]],
+        *,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        allow_disk_use: bool = False,
+        batch_size: int = 1000,
+        max_time_ms: Optional[int] = None,
+        read_preference: Optional[str] = None,
+    ):
+        results = []
+        for batch in self.aggregate_many(
+            table,
+            pipeline,
+            fields=fields,
+            limit=limit,
+            allow_disk_use=allow_disk_use,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+            read_preference=read_preference,
+        ):
+            results.extend(batch)
+        return results
+
+    def aggregate_many(
+        self,
+        table: str,
+        pipeline: List[Dict[str, Any]],
+        *,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        allow_disk_use: bool = False,
+        batch_size: int = 1000,
+        max_time_ms: Optional[int] = None,
+        read_preference: Optional[str] = None,
+    ):
+        """Run an aggregation pipeline and yield the results in batches."""
+        options = {"allowDiskUse": allow_disk_use, "batchSize": batch_size}
+        max_time_ms = self._max_time_ms(max_time_ms)
+        if max_time_ms:
+            options["maxTimeMS"] = max_time_ms
+        control = current_control()
+        if control:
+            control.check()
+            options["comment"] = self._operation_tag(control)
+
+        # $out / $merge stages are sent to the primary by the server regardless
+        cursor = self._read_collection(table, read_preference).aggregate(
+            optimize_pipeline(pipeline, fields=fields, limit=limit),
+            **options,
+        )
+        yield from self._stream(cursor, batch_size)
 
     # ---------------- Streaming ----------------
 
     def fetch_many(self, query: Dict[str, Any], batch_size: int = 1000):
-        cursor = self.db[query["collection"]].find(
-            query.get("filter", {})
-        ).batch_size(batch_size)
-        for doc in cursor:
-            yield doc
+        """
+        Yield batches of documents.
+        A query with a 'pipeline' key is streamed through aggregate_many.
+        """
+        if "pipeline" in query:
+            yield from self.aggregate_many(
+                query["collection"],
+                query["pipeline"],
+                allow_disk_use=query.get("allow_disk_use", False),
+                batch_size=batch_size,
+                max_time_ms=query.get("max_time_ms"),
+                read_preference=query.get("read_preference"),
+            )
+            return
+
+        cursor = self._find_cursor(query).batch_size(batch_size)
+        yield from self._stream(cursor, batch_size)
+
+    # ---------------- Time series ----------------
+
+    def downsample(
+        self,
+        table: str,
+        time_column: str,
+        value_columns: List[str],
+        bucket: str,
+        agg: str = "avg",
+        *,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        max_points: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """$dateTrunc + $group (MongoDB 5.0+); start / end are ISO timestamps."""
+        check_downsample_args(time_column, value_columns, agg)
+        count, unit = parse_bucket(bucket)
+        time_range: Dict[str, Any] = {"$ne": None}
+        if start is not None:
+            time_range["$gte"] = datetime.fromisoformat(start)
+        if end is not None:
+            time_range["$lt"] = datetime.fromisoformat(end)
+
+        truncate = {"date": f"${time_column}", "unit": unit, "binSize": count}
+        if unit == "week":
+            truncate["startOfWeek"] = "monday"
+        if agg == "count":
+            accumulators = {
+                c: {"$sum": {"$cond": [{"$ne": [{"$ifNull": [f"${c}", None]}, None]}, 1, 0]}}
+                for c in value_columns
+            }
+        else:
+            accumulators = {c: {f"${agg}": f"${c}"} for c in value_columns}
+
+        pipeline = [
+            {"$match": {time_column: time_range}},
+            {"$group": {"_id": {"$dateTrunc": truncate}, **accumulators, "samples": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "bucket": "$_id", **{c: 1 for c in value_columns}, "samples": 1}},
+        ]
+        rows = [doc for batch in self.aggregate_many(table, pipeline) for doc in batch]
+        return reduce_points(rows, value_columns[0], max_points)
+
+    # ---------------- Full-text search ----------------
+
+    def search_text(self, table: str, columns: List[str], query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        $text with textScore ranking when the collection has a text index
+        (which covers its own fields, whatever columns says); otherwise a
+        case-insensitive $regex over columns.
+        """
+        check_columns(columns)
+        check_search_query(query)
+        if self._text_index(table):
+            return self._fts_search(table, query, limit)
+        return self._like_search(table, columns, query, limit)
+
+    def create_text_index(self, table: str, columns: List[str], sample_query: Optional[str] = None) -> Dict[str, Any]:
+        """A collection can have only one text index; an existing one is kept."""
+        check_columns(columns)
+        start = time.monotonic()
+        existing = self._text_index(table)
+        if existing is None:
+            self.db[table].create_index(
+                [(c, "text") for c in columns], name=text_index_name(table, columns)
+            )
+        report = {
+            "table": table,
+            "columns": columns,
+            "index": existing or text_index_name(table, columns),
+            "created": existing is None,
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        term = sample_query or sample_term(
+            [doc.get(c) for doc in self.sample_rows(table, 20) for c in columns]
+        )
+        if term:
+            fts_ms, fts_docs = best_ms(lambda: self._fts_search(table, term, 20))
+            like_ms, like_docs = best_ms(lambda: self._like_search(table, columns, term, 20))
+            report.update(speedup_report(term, fts_ms, like_ms, len(fts_docs), len(like_docs)))
+        return report
+
+    def _text_index(self, table: str) -> Optional[str]:
+        """Name of the collection's text index, if it has one."""
+        for name, info in self.db[table].index_information().items():
+            if any(kind == "text" for _, kind in info["key"]):
+                return name
+        return None
+
+    def _fts_search(self, table: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        cursor = self._find_cursor({
+            "collection": table,
+            "filter": {"$text": {"$search": query}},
+            "projection": {"_rank": {"$meta": "textScore"}},
+        }, limit).sort([("_rank", {"$meta": "textScore"})])
+        with self._guarded(cursor):
+            return list(cursor)
+
+    def _like_search(self, table: str, columns: List[str], query: str, limit: int) -> List[Dict[str, Any]]:
+        """Unanchored regex (a collection scan); _rank is the number of matching fields."""
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        cursor = self._find_cursor({
+            "collection": table,
+            "filter": {"$or": [{c: {"$regex": pattern.pattern, "$options": "i"}} for c in columns]},
+        }, limit)
+        with self._guarded(cursor):
+            docs = list(cursor)
+        for doc in docs:
+            doc["_rank"] = sum(1 for c in columns if pattern.search(str(doc.get(c, ""))))
+        return sorted(docs, key=lambda doc: -doc["_rank"])
+
+    # ---------------- Vector search ----------------
+
+    # Index candidates per requested document when filters may reject some of them
+    VECTOR_FILTER_OVERSAMPLING = 10
+
+    def vector_search(
+        self,
+        table: str,
+        column: str,
+        embedding: List[float],
+        k: int = 10,
+        *,
+        filters: Optional[Dict[str, Any]] = None,
+        metric: str = "cosine",
+        exact: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        NumPy scoring of the field's arrays (or float32 BinData), batch by
+        batch or through the IVF index create_vector_index() writes; filters
+        is a find() filter. ($vectorSearch needs Atlas Search, so it is not
+        used.)
+        """
+        check_vector_args(column, metric, k)
+        filters = filters or {}
+        query = query_vector(embedding)
+        index = None if exact else load_index(self._vector_index_path(table, column, metric))
+
+        def index_key(value):
+            """Index files hold ObjectIds as hex strings."""
+            if index and index.meta.get("key_type") == "objectid" and isinstance(value, str):
+                return bson.ObjectId(value)
+            return value
+
+        return nearest(
+            query, k, metric, column,
+            blocks=lambda after: self._vector_blocks(table, column, filters, index_key(after), len(query)),
+            fetch=lambda ids: self._docs_by_id(table, [index_key(i) for i in ids], filters),
+            index=index,
+            oversampling=self.VECTOR_FILTER_OVERSAMPLING if filters else 1,
+        )
+
+    def create_vector_index(self, table: str, column: str, metric: str = "cosine") -> Dict[str, Any]:
+        """
+        IVF index file of the field's vectors by _id. Documents deleted or
+        changed later are rescored from the collection; documents added
+        later are found when _ids are ObjectIds or integers.
+        """
+        check_vector_args(column, metric, 1)
+        start = time.monotonic()
+        ids, matrix = collect_vectors(self._vector_blocks(table, column, {}, None))
+        meta = {"table": table, "column": column, "key_column": "_id"}
+        if ids and all(isinstance(i, bson.ObjectId) for i in ids):
+            ids = [str(i) for i in ids]
+            meta.update({"key_type": "objectid", "max_key": max(ids)})
+        index = IVFIndex.build(self._vector_index_path(table, column, metric), ids, matrix, metric, meta)
+        report = {
+            "table": table,
+            "column": column,
+            "metric": metric,
+            "kind": "ivf",
+            "index": index.path,
+            "vectors": index.meta["vectors"],
+            "lists": index.meta["lists"],
+            "probes": index.probes(),
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        queries = [as_vector(doc.get(column)) for doc in self.sample_rows(table, BENCHMARK_QUERIES)]
+        report.update(benchmark_index(
+            lambda query, exact: self.vector_search(table, column, query, metric=metric, exact=exact),
+            [query for query in queries if query is not None],
+        ))
+        return report
+
+    def _vector_index_path(self, table: str, column: str, metric: str) -> str:
+        return index_path(os.path.join(INDEX_DIR, f"mongo-{self.db.name}"), table, column, metric)
+
+    def _vector_blocks(self, table, column, filters, after, dim=None):
+        """(matrix, _ids) per SCAN_BLOCK_ROWS documents matching filters (with _id above `after`)."""
+        if after is not None:
+            filters = {"$and": [filters, {"_id": {"$gt": after}}]}
+        cursor = self._find_cursor({
+            "collection": table,
+            "filter": filters,
+            "projection": {column: 1},
+        }).batch_size(SCAN_BLOCK_ROWS)
+        for docs in self._stream(cursor, SCAN_BLOCK_ROWS):
+            yield vector_block([doc.get(column) for doc in docs], [doc["_id"] for doc in docs], dim)
+
+    def _docs_by_id(self, table, ids, filters) -> Dict[Any, Dict[str, Any]]:
+        if not ids:
+            return {}
+        cursor = self._find_cursor({
+            "collection": table,
+            "filter": {"$and": [filters, {"_id": {"$in": ids}}]},
+        })
+        with self._guarded(cursor):
+            return {doc["_id"]: doc for doc in cursor}
+
+    # ---------------- Parallel scans ----------------
+
+    # Upper bound on a scan's degree of parallelism
+    MAX_SCAN_PARALLELISM = 16
+    # _id values sampled per partition to place the range boundaries
+    SCAN_SAMPLES_PER_PARTITION = 100
+
+    def parallel_scan(self, query: Dict[str, Any], *, parallelism: int = 4, ordered: bool = False, batch_size: int = 1000):
+        """
+        Read a {'collection', 'filter'} query as _id ranges, each its own
+        cursor. Boundaries come from $bucketAuto over a $sample of _ids, so
+        planning never scans the collection. ordered=True yields documents
+        in _id order. Pipelines are read with one cursor.
+        """
+        if "pipeline" in query:
+            return self.fetch_many(query, batch_size=batch_size)
+        if "collection" not in query:
+            raise ValueError("Query dictionary must include 'collection' key")
+        parallelism = max(
+            1, min(parallelism, self.MAX_SCAN_PARALLELISM, self.concurrency_limits()["read"])
+        )
+        ranges = self._id_ranges(query["collection"], parallelism)
+        partitions = []
+        for id_range in ranges:
+            part = dict(query)
+            if id_range:
+                part["filter"] = {"$and": [query.get("filter", {}), {"_id": id_range}]}
+            if ordered:
+                part["sort"] = [("_id", 1)]
+            partitions.append(functools.partial(self.fetch_many, part, batch_size))
+        return merge_partitions(partitions, parallelism, ordered)
+
+    def _id_ranges(self, collection: str, parts: int) -> List[Dict[str, Any]]:
+        """
+        _id conditions splitting the collection into about `parts` ranges.
+        _ids sort by type bracket first, so if the smallest and largest
+        share one, every _id does; otherwise range bounds would silently
+        skip the _ids of other types, and one unbounded range is used.
+        """
+        if parts <= 1:
+            return [{}]
+        ends = [
+            next(iter(self.db[collection].find({}, {"_id": 1}).sort("_id", direction).limit(1)), None)
+            for direction in (1, -1)
+        ]
+        if None in ends or id_type_bracket(ends[0]["_id"]) != id_type_bracket(ends[1]["_id"]):
+            return [{}]
+        buckets = list(self.db[collection].aggregate([
+            {"$sample": {"size": parts * self.SCAN_SAMPLES_PER_PARTITION}},
+            {"$bucketAuto": {"groupBy": "$_id", "buckets": parts}},
+        ]))
+        cuts = [bucket["_id"]["min"] for bucket in buckets[1:]]
+        if not cuts:
+            return [{}]
+        bounds = [None, *cuts, None]
+        return [
+            {
+                **({"$gte": low} if low is not None else {}),
+                **({"$lt": high} if high is not None else {}),
+            }
+            for low, high in zip(bounds[:-1], bounds[1:])
+        ]
 
     def raw_client(self):
         return self.client
 
     # ---------------- Transactions ----------------
 
-    def begin_transaction(self):
-        # MongoDB transactions require replica sets
-        # For simplicity, we'll use a no-op implementation
-        pass
+    def _supports_transactions(self) -> bool:
+        """Transactions need a replica set member or a mongos router."""
+        if self._transactions_supported is None:
+            try:
+                hello = self.client.admin.command("hello")
+                self._transactions_supported = bool(
+                    hello.get("logicalSessionTimeoutMinutes") is not None
+                    and (hello.get("setName") or hello.get("msg") == "isdbgrid")
+                )
+            except Exception:
+                self._transactions_supported = False
+        return self._transactions_supported
 
-    def commit(self):
-        # MongoDB transactions require replica sets
-        pass
+    def begin_transaction(self) -> str:
+        if not self._supports_transactions():
+            raise ValueError(
+                "MongoDB transactions require a replica set or sharded cluster"
+            )
+        session = self.client.start_session()
+        try:
+            session.start_transaction()
+        except Exception:
+            session.end_session()
+            raise
+        return self._transactions.open(session)
+
+    def commit(self, tx_id: Optional[str] = None):
+        session = self._transactions.pop(self._transactions.resolve(tx_id))
+        try:
+            session.commit_transaction()
+        finally:
+            session.end_session()
 
-    def rollback(self):
-        # MongoDB transactions require replica sets
-        pass
+    def rollback(self, tx_id: Optional[str] = None):
+        session = self._transactions.pop(self._transactions.resolve(tx_id))
+        self._discard_transaction(session)
+
+    def _discard_transaction(self, session) -> None:
+        try:
+            if session.in_transaction:
+                session.abort_transaction()
+        finally:
+            session.end_session()
+
+    @contextmanager
+    def _session(self, tx_id: Optional[str] = None):
+        """Session of transaction tx_id, or None for a standalone write."""
+        if tx_id is None:
+            yield None
+        else:
+            with self._transactions.use(tx_id) as session:
+                yield session
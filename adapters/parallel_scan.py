@@ -0,0 +1,156 @@
+import contextvars
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Batches a partition may read ahead of the consumer
+PREFETCH_BATCHES = 4
+
+_DONE = object()
+
+_TABLE_SCAN = re.compile(
+    r"^\s*(?:select\s+\*\s+from\s+)?([A-Za-z_][\w$]*(?:\.[A-Za-z_][\w$]*)?)\s*;?\s*$",
+    re.IGNORECASE,
+)
+
+Partition = Callable[[], Iterator[List[Dict[str, Any]]]]
+
+# claim(n) -> (granted, give_back): extra admission slots for scan workers
+SlotClaim = Callable[[int], Tuple[int, Callable[[], None]]]
+
+_slot_claim: ContextVar[Optional[SlotClaim]] = ContextVar("scan_slot_claim", default=None)
+
+
+@contextmanager
+def use_slot_claim(claim: Optional[SlotClaim]):
+    """Make claim() the source of extra scan workers for the current tool call (None: unlimited)."""
+    token = _slot_claim.set(claim)
+    try:
+        yield claim
+    finally:
+        _slot_claim.reset(token)
+
+
+def scan_table(query: Any) -> str:
+    """Table a SQL parallel scan reads: a bare table name or SELECT * FROM <table>."""
+    match = _TABLE_SCAN.match(query) if isinstance(query, str) else None
+    if not match:
+        raise ValueError(
+            "Parallel scans read whole tables: pass a table name or 'SELECT * FROM <table>'"
+        )
+    return match.group(1)
+
+
+def integer_ranges(low: int, high: int, parts: int) -> List[tuple]:
+    """
+    (lower, upper) bounds splitting [low, high] into about `parts` ranges;
+    the first has no lower and the last no upper bound (None), so rows added
+    outside [low, high] after planning are still read.
+    """
+    parts = max(1, min(parts, high - low + 1))
+    step = (high - low + 1) / parts
+    cuts = [low + round(step * i) for i in range(1, parts)]
+    bounds = [None, *cuts, None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def range_condition(column: str, lower, upper, literal: Callable[[Any], str] = str):
+    """SQL condition for lower <= column < upper (either bound may be None), or None."""
+    conditions = []
+    if lower is not None:
+        conditions.append(f"{column} >= {literal(lower)}")
+    if upper is not None:
+        conditions.append(f"{column} < {literal(upper)}")
+    return " AND ".join(conditions) or None
+
+
+def merge_partitions(
+    partitions: List[Partition],
+    parallelism: int,
+    ordered: bool = False,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read partitions on up to `parallelism` threads and yield their batches.
+    Each thread holds a connection, so inside a tool call every thread
+    beyond the first needs a free admission slot of its own; with fewer
+    free, the scan runs on fewer threads.
+
+    ordered=True yields partition 0's batches, then partition 1's, ... (later
+    partitions read ahead up to PREFETCH_BATCHES batches each); otherwise
+    batches are yielded as they arrive. The workers run in a copy of the
+    caller's context, so they share its tool call's deadline and
+    cancellation. Closing the generator early stops the workers.
+    """
+    if len(partitions) == 1:
+        yield from partitions[0]()
+        return
+
+    claim = _slot_claim.get()
+    give_back = None
+    if claim is not None:
+        extra, give_back = claim(parallelism - 1)
+        parallelism = 1 + extra
+    try:
+        yield from _merge(partitions, parallelism, ordered)
+    finally:
+        if give_back is not None:
+            give_back()
+
+
+def _merge(partitions: List[Partition], parallelism: int, ordered: bool) -> Iterator[List[Dict[str, Any]]]:
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(PREFETCH_BATCHES) for _ in partitions]
+    else:
+        shared = queue.Queue(PREFETCH_BATCHES * parallelism)
+        queues = [shared] * len(partitions)
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work(index: int) -> None:
+        q = queues[index]
+        try:
+            if stop.is_set():
+                return
+            batches = partitions[index]()
+            try:
+                for batch in batches:
+                    if not put(q, batch):
+                        return
+            finally:
+                batches.close()
+            put(q, _DONE)
+        except BaseException as e:
+            put(q, e)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="parallel-scan")
+    try:
+        for index in range(len(partitions)):
+            executor.submit(contextvars.copy_context().run, work, index)
+
+        remaining = len(partitions)
+        current = 0
+        while remaining:
+            item = queues[current].get()
+            if item is _DONE:
+                remaining -= 1
+                if ordered:
+                    current += 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,87 @@
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.engine import Engine
-from typing import Any, Dict, List
+import functools
+import hashlib
+import io
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from sqlalchemy import bindparam, create_engine, text, inspect
+from sqlalchemy.engine import Engine, make_url
+from typing import Any, Dict, List, Optional
 from adapters.base import DatabaseAdapter
+from adapters.batch import batch_failure, group_batch_ops
+from adapters.parallel_scan import integer_ranges, merge_partitions, range_condition, scan_table
+from adapters.text_search import best_ms, check_columns, check_search_query, sample_term, speedup_report, text_index_name
+from adapters.timeseries import check_downsample_args, parse_bucket, reduce_points
+from adapters.vector_search import (
+    BENCHMARK_QUERIES,
+    INDEX_DIR,
+    SCAN_BLOCK_ROWS,
+    IVFIndex,
+    as_vector,
+    benchmark_index,
+    check_vector_args,
+    collect_vectors,
+    index_path,
+    load_index,
+    nearest,
+    query_vector,
+    vector_block,
+    vector_index_name,
+)
+from adapters.deadlines import QueryCancelled, current_control
+from adapters.replicas import ReplicaRouter
+from adapters.transactions import TransactionRegistry
 from security.validator import validate_sql
 
 
+def copy_text_field(value: Any) -> str:
+    """
+    Encode a value for the tab-separated, backslash-escaped text format
+    shared by Postgres COPY and MySQL LOAD DATA.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\0", "\\0")
+    )
+
+
 class PostgresAdapter(DatabaseAdapter):
-    def __init__(self, db_url: str):
+    # Seconds an open transaction may sit unused before it is rolled back
+    TRANSACTION_IDLE_TIMEOUT = 60.0
+    POOL_SIZE = 10
+    MAX_OVERFLOW = 20
+
+    def __init__(
+        self,
+        db_url: str,
+        replica_urls: Optional[List[str]] = None,
+        replica_strategy: str = "round_robin",
+        max_replica_lag: Optional[float] = 30.0,
+    ):
         self.db_url = db_url
         self.engine: Engine | None = None
+        self.replica_urls = list(replica_urls or [])
+        self.replica_strategy = replica_strategy
+        self.max_replica_lag = max_replica_lag
+        self.replicas: Optional[ReplicaRouter] = None
+        self._column_types: Dict[str, Dict[str, Optional[type]]] = {}
+        self._table_stats: Dict[str, tuple] = {}
+        self._transactions = TransactionRegistry(
+            on_expire=self._discard_transaction,
+            idle_timeout=self.TRANSACTION_IDLE_TIMEOUT,
+        )
 
     # ---------------- Connection ----------------
 
@@ -16,11 +89,43 @@ class PostgresAdapter(DatabaseAdapter):
         self.engine = create_engine(
             self.db_url,
             pool_pre_ping=True,
-            pool_size=10,
-            max_overflow=20,
+            pool_size=self.POOL_SIZE,
+            max_overflow=self.MAX_OVERFLOW,
         )
+        self._connect_replicas()
+
+    def _connect_replicas(self) -> None:
+        if not self.replica_urls:
+            return
+        self.replicas = ReplicaRouter(
+            {url: self._create_replica_engine(url) for url in self.replica_urls},
+            lag_probe=self._replica_lag,
+            strategy=self.replica_strategy,
+            max_lag=self.max_replica_lag,
+        )
+
+    def _create_replica_engine(self, url: str) -> Engine:
+        return create_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=self.POOL_SIZE,
+            max_overflow=self.MAX_OVERFLOW,
+        )
+
+    def _replica_lag(self, conn) -> Optional[float]:
+        """Seconds the standby's replay is behind; 0 when caught up or not a standby."""
+        return float(conn.execute(text(
+            "SELECT CASE "
+            "WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+            "END"
+        )).scalar())
 
     def close(self) -> None:
+        self._transactions.close_all()
+        if self.replicas:
+            self.replicas.dispose()
         if self.engine:
             self.engine.dispose()
 
@@ -34,6 +139,13 @@ class PostgresAdapter(DatabaseAdapter):
 
     # ---------------- Capabilities ----------------
 
+    def open_transactions(self) -> int:
+        return len(self._transactions)
+
+    def concurrency_limits(self) -> Dict[str, int]:
+        """Reads fill the steady pool; writes and schema calls use the overflow."""
+        return {"read": self.POOL_SIZE, "write": self.POOL_SIZE // 2, "schema": 2}
+
     def capabilities(self) -> Dict[str, bool]:
         return {
             "read": True,
@@ -41,29 +153,258 @@ class PostgresAdapter(DatabaseAdapter):
             "transactions": True,
             "schema_introspection": True,
             "aggregation": True,
+            "copy_export": self.engine.dialect.driver == "psycopg2",
         }
 
     # ---------------- Schema ----------------
 
+    def _table_names(self, inspector) -> List[str]:
+        """Tables shown to clients; subclasses hide internal ones."""
+        return inspector.get_table_names()
+
     def get_schema(self) -> Dict[str, Any]:
-        inspector = inspect(self.engine)
-        schema = {}
-        for table in inspector.get_table_names():
-            schema[table] = self.get_columns(table)
-        return schema
+        with self._connect_reader() as conn:
+            inspector = inspect(conn)
+            return {
+                table: [c["name"] for c in inspector.get_columns(table)]
+                for table in self._table_names(inspector)
+            }
 
     def get_tables(self) -> List[str]:
-        return inspect(self.engine).get_table_names()
+        with self._connect_reader() as conn:
+            return self._table_names(inspect(conn))
 
     def get_columns(self, table: str) -> List[str]:
-        inspector = inspect(self.engine)
-        return [c["name"] for c in inspector.get_columns(table)]
+        with self._connect_reader() as conn:
+            return [c["name"] for c in inspect(conn).get_columns(table)]
 
     def get_indexes(self, table: str) -> Any:
-        return inspect(self.engine).get_indexes(table)
+        with self._connect_reader() as conn:
+            return inspect(conn).get_indexes(table)
+
+    def get_column_types(self, table: str) -> Dict[str, Optional[type]]:
+        """Python type per column (None when unknown), cached per table."""
+        if table not in self._column_types:
+            types = {}
+            with self._connect_reader() as conn:
+                columns = inspect(conn).get_columns(table)
+            for column in columns:
+                try:
+                    types[column["name"]] = column["type"].python_type
+                except NotImplementedError:
+                    types[column["name"]] = None
+            self._column_types[table] = types
+        return self._column_types[table]
+
+    def describe_schema(self, max_tables: int = 200) -> Dict[str, Any]:
+        """SQL column types, primary and foreign keys from one inspector, plus row estimates."""
+        with self._connect_reader() as conn:
+            inspector = inspect(conn)
+            tables = self._table_names(inspector)
+            described = {}
+            for table in tables[:max_tables]:
+                described[table] = {
+                    "columns": {
+                        c["name"]: str(c["type"]) for c in inspector.get_columns(table)
+                    },
+                    "primary_key": inspector.get_pk_constraint(table).get("constrained_columns") or [],
+                    "foreign_keys": [
+                        f"{', '.join(fk['constrained_columns'])} -> "
+                        f"{fk['referred_table']}({', '.join(fk['referred_columns'])})"
+                        for fk in inspector.get_foreign_keys(table)
+                    ],
+                }
+        for table, entry in described.items():
+            try:
+                entry["estimated_rows"] = self.get_table_stats(table).get("estimated_rows")
+            except Exception:
+                entry["estimated_rows"] = None
+        return {"tables": described, "total_tables": len(tables)}
+
+    # ---------------- Statistics ----------------
+
+    # Catalog statistics are refreshed at most this often
+    STATS_CACHE_SECONDS = 60.0
+    # Up to this many (estimated) rows, sampling simply shuffles the table
+    SMALL_TABLE_ROWS = 10000
+    # Random keys / sampled fraction drawn per wanted row
+    SAMPLE_OVERSAMPLING = 4
+    # First TABLESAMPLE percentage for tables without statistics (never analyzed)
+    UNANALYZED_SAMPLE_PERCENT = 1.0
+
+    def get_table_stats(self, table: str, *, refresh: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        cached = self._table_stats.get(table)
+        if refresh or cached is None or now - cached[0] > self.STATS_CACHE_SECONDS:
+            cached = (now, self._collect_table_stats(table))
+            self._table_stats[table] = cached
+        return {**cached[1], "age_seconds": round(now - cached[0], 1)}
+
+    def _collect_table_stats(self, table: str) -> Dict[str, Any]:
+        """pg_class row / page estimates and pg_stats column statistics (as of the last ANALYZE)."""
+        with self._read_conn() as conn:
+            row = conn.execute(text(
+                "SELECT c.reltuples, pg_total_relation_size(c.oid) AS total_bytes, "
+                "pg_relation_size(c.oid) AS table_bytes "
+                "FROM pg_class c WHERE c.oid = to_regclass(:table)"
+            ), {"table": table}).mappings().first()
+            if row is None:
+                raise ValueError(f"Table not found: {table}")
+            columns = conn.execute(text(
+                "SELECT s.attname, s.null_frac, s.n_distinct, s.avg_width "
+                "FROM pg_stats s "
+                "JOIN pg_namespace n ON n.nspname = s.schemaname "
+                "JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename "
+                "WHERE c.oid = to_regclass(:table)"
+            ), {"table": table}).mappings().all()
+
+        # reltuples is -1 until the table is first vacuumed / analyzed
+        rows = int(row["reltuples"]) if row["reltuples"] >= 0 else None
+        return {
+            "table": table,
+            "estimated_rows": rows,
+            "total_bytes": row["total_bytes"],
+            "table_bytes": row["table_bytes"],
+            "columns": {
+                c["attname"]: {
+                    "null_fraction": c["null_frac"],
+                    # Negative n_distinct is a fraction of the row count
+                    "distinct_estimate": (
+                        round(c["n_distinct"]) if c["n_distinct"] >= 0
+                        else round(-c["n_distinct"] * rows) if rows else None
+                    ),
+                    "avg_width_bytes": c["avg_width"],
+                }
+                for c in columns
+            },
+            "source": "pg_class / pg_stats",
+            "analyzed": rows is not None,
+        }
+
+    def sample_rows(self, table: str, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        TABLESAMPLE SYSTEM reads only a fraction of the pages; small tables are
+        shuffled. Without statistics the size is unknown, so sampling starts
+        at UNANALYZED_SAMPLE_PERCENT and only grows while too few rows come back.
+        """
+        rows = self.get_table_stats(table).get("estimated_rows")
+        with self._read_conn() as conn:
+            if rows and rows <= self.SMALL_TABLE_ROWS:
+                return self._shuffled_rows(conn, table, n)
+            if rows:
+                percent = min(100.0, 100.0 * n * self.SAMPLE_OVERSAMPLING / rows)
+            else:
+                percent = self.UNANALYZED_SAMPLE_PERCENT
+            while True:
+                # Shuffle so the rows don't all come from the first sampled pages
+                result = conn.execute(text(
+                    f"SELECT * FROM (SELECT * FROM {table} TABLESAMPLE SYSTEM ({percent})) s "
+                    f"ORDER BY random() LIMIT :n"
+                ), {"n": n})
+                sample = [dict(row._mapping) for row in result]
+                if len(sample) >= n or percent >= 100.0:
+                    return sample
+                percent = min(100.0, percent * self.SAMPLE_OVERSAMPLING)
+
+    def _shuffled_rows(self, conn, table: str, n: int) -> List[Dict[str, Any]]:
+        result = conn.execute(text(f"SELECT * FROM {table} ORDER BY random() LIMIT :n"), {"n": n})
+        return [dict(row._mapping) for row in result]
+
+    def _sample_by_key(self, conn, table: str, key: str, n: int) -> List[Dict[str, Any]]:
+        """
+        Sample through random lookups of an integer key: n * oversampling
+        values drawn between MIN(key) and MAX(key), both index lookups, and
+        n of the rows found picked at random (a LIMIT would keep the lowest
+        keys). Gaps in the key space only reduce how many rows come back.
+        """
+        # Separate subqueries: SQLite only uses the index for a lone MIN / MAX
+        low, high = conn.execute(text(
+            f"SELECT (SELECT MIN({key}) FROM {table}), (SELECT MAX({key}) FROM {table})"
+        )).one()
+        if low is None:
+            return []
+        span = high - low + 1
+        keys = random.sample(range(low, high + 1), min(span, n * self.SAMPLE_OVERSAMPLING))
+        query = text(f"SELECT * FROM {table} WHERE {key} IN :keys").bindparams(
+            bindparam("keys", expanding=True)
+        )
+        found = [dict(row._mapping) for row in conn.execute(query, {"keys": keys})]
+        return random.sample(found, min(n, len(found)))
+
+    def _integer_key(self, conn, table: str) -> Optional[str]:
+        """The table's single-column integer primary key, if it has one."""
+        key = inspect(conn).get_pk_constraint(table).get("constrained_columns") or []
+        if len(key) != 1:
+            return None
+        return key[0] if self.get_column_types(table).get(key[0]) is int else None
 
     # ---------------- Query ----------------
 
+    def _reader(self) -> Engine:
+        """Engine that serves read-only calls: a healthy replica if any, else the primary."""
+        if self.replicas:
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica
+        return self.engine
+
+    def _connect_reader(self):
+        """
+        Open a read connection. A replica that cannot be reached is taken
+        out of rotation and the read moves to the next replica / primary.
+        """
+        engine = self._reader()
+        try:
+            return engine.connect()
+        except Exception as e:
+            if not (self.replicas and self.replicas.owns(engine)):
+                raise
+            self.replicas.mark_down(engine, e)
+            return self._connect_reader()
+
+    @contextmanager
+    def _read_conn(self):
+        """
+        Reader connection bound to the current tool call's deadline: the
+        remaining time becomes a statement timeout, and cancelling the call
+        interrupts the running statement.
+        """
+        control = current_control()
+        with self._connect_reader() as conn:
+            if control is None:
+                yield conn
+                return
+            control.check()
+            try:
+                with self._deadline_scope(conn, control), \
+                        control.interrupt_with(lambda: self._interrupt(conn)):
+                    yield conn
+            except QueryCancelled:
+                raise
+            except Exception as e:
+                if control.cancelled or control.expired():
+                    raise QueryCancelled(
+                        "Query cancelled" if control.cancelled else "Query deadline exceeded"
+                    ) from e
+                raise
+
+    @contextmanager
+    def _deadline_scope(self, conn, control):
+        """SET LOCAL statement_timeout; reset when the connection's transaction ends"""
+        remaining = control.remaining_ms()
+        if remaining:
+            conn.execute(
+                text("SELECT set_config('statement_timeout', :ms, true)"),
+                {"ms": str(remaining)},
+            )
+        yield
+
+    def _interrupt(self, conn) -> None:
+        """Cancel the statement running on conn (called from another thread)."""
+        dbapi_connection = conn.connection.dbapi_connection
+        if hasattr(dbapi_connection, "cancel"):
+            dbapi_connection.cancel()
+
     def validate_query(self, query: str) -> None:
         validate_sql(query, allow_dml=False)
 
@@ -73,71 +414,717 @@ class PostgresAdapter(DatabaseAdapter):
         if limit:
             query = f"{query} LIMIT {limit}"
 
-        with self.engine.connect() as conn:
+        with self._read_conn() as conn:
             result = conn.execute(text(query), params or {})
             return [dict(row._mapping) for row in result]
 
     def explain_query(self, query: str):
-        with self.engine.connect() as conn:
+        with self._read_conn() as conn:
             return conn.execute(text(f"EXPLAIN {query}")).fetchall()
 
     # ---------------- Transactions ----------------
 
-    def begin_transaction(self):
-        self._tx = self.engine.begin()
+    def begin_transaction(self) -> str:
+        """Check out a dedicated connection, begin on it and return its tx_id."""
+        conn = self.engine.connect()
+        try:
+            tx = conn.begin()
+        except Exception:
+            conn.close()
+            raise
+        return self._transactions.open({"conn": conn, "tx": tx})
 
-    def commit(self):
-        self._tx.commit()
+    def commit(self, tx_id: Optional[str] = None):
+        handle = self._transactions.pop(self._transactions.resolve(tx_id))
+        try:
+            handle["tx"].commit()
+        finally:
+            handle["conn"].close()
+
+    def rollback(self, tx_id: Optional[str] = None):
+        handle = self._transactions.pop(self._transactions.resolve(tx_id))
+        self._discard_transaction(handle)
+
+    def _discard_transaction(self, handle: Dict[str, Any]) -> None:
+        try:
+            handle["tx"].rollback()
+        finally:
+            handle["conn"].close()
 
-    def rollback(self):
-        self._tx.rollback()
+    @contextmanager
+    def _write_conn(self, tx_id: Optional[str] = None):
+        """
+        Connection for a write: the transaction's bound connection when
+        tx_id is given, otherwise a fresh auto-committing one.
+        """
+        if tx_id is None:
+            with self.engine.begin() as conn:
+                yield conn
+        else:
+            with self._transactions.use(tx_id) as handle:
+                yield handle["conn"]
+
+    def _run_write(self, work, tx_id: Optional[str] = None, *, replayable: bool = True):
+        """
+        Run work(conn) on the write connection for tx_id and return its result.
+        replayable=False marks work that must not be run a second time after a
+        failed attempt; it only matters where writes are grouped (SQLite).
+        """
+        with self._write_conn(tx_id) as conn:
+            return work(conn)
 
     # ---------------- Writes ----------------
 
-    def insert(self, table: str, data: Dict[str, Any]):
-        keys = ", ".join(data.keys())
-        values = ", ".join([f":{k}" for k in data])
-        query = f"INSERT INTO {table} ({keys}) VALUES ({values})"
-        with self.engine.begin() as conn:
-            conn.execute(text(query), data)
+    def _insert_sql(self, table: str, columns) -> str:
+        keys = ", ".join(columns)
+        values = ", ".join([f":{k}" for k in columns])
+        return f"INSERT INTO {table} ({keys}) VALUES ({values})"
+
+    def _update_sql(self, table: str, columns, filter_columns) -> str:
+        set_clause = ", ".join([f"{k}=:{k}" for k in columns])
+        where = " AND ".join([f"{k}=:_f_{k}" for k in filter_columns])
+        return f"UPDATE {table} SET {set_clause} WHERE {where}"
+
+    def _update_params(self, filters: Dict[str, Any], data: Dict[str, Any]):
+        return data | {f"_f_{k}": v for k, v in filters.items()}
 
-    def bulk_insert(self, table: str, data: List[Dict[str, Any]]):
+    def _delete_sql(self, table: str, filter_columns) -> str:
+        where = " AND ".join([f"{k}=:{k}" for k in filter_columns])
+        return f"DELETE FROM {table} WHERE {where}"
+
+    def insert(self, table: str, data: Dict[str, Any], *, tx_id=None):
+        query = self._insert_sql(table, data.keys())
+        self._run_write(lambda conn: conn.execute(text(query), data), tx_id)
+
+    def bulk_insert(self, table: str, data: List[Dict[str, Any]], *, tx_id=None):
         if not data:
             return
-        self.insert(table, data[0])  # SQLAlchemy auto-optimizes bulk
+        query = self._insert_sql(table, data[0].keys())
+        # A list of parameter sets runs as one executemany
+        self._run_write(lambda conn: conn.execute(text(query), data), tx_id)
+
+    def update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any], *, tx_id=None):
+        query = self._update_sql(table, data.keys(), filters.keys())
+        params = self._update_params(filters, data)
+        self._run_write(lambda conn: conn.execute(text(query), params), tx_id)
+
+    def delete(self, table: str, filters: Dict[str, Any], *, tx_id=None):
+        query = self._delete_sql(table, filters.keys())
+        self._run_write(lambda conn: conn.execute(text(query), filters), tx_id)
+
+    # ---------------- Batch ----------------
+
+    def apply_batch(self, operations: List[Dict[str, Any]], *, tx_id=None) -> Dict[str, Any]:
+        """
+        Run heterogeneous insert / update / delete ops in one transaction.
+        Consecutive ops with the same (table, op, columns) run as a single
+        executemany. Without tx_id any failure rolls the whole batch back.
+        """
+        groups = list(group_batch_ops(operations))
+
+        def work(conn):
+            results: List[Dict[str, Any]] = [None] * len(operations)
+            statements = []
+            for n, ((table, kind, columns, filter_columns), indices) in enumerate(groups):
+                ops = [operations[i] for i in indices]
+                if kind == "insert":
+                    query = self._insert_sql(table, columns)
+                    params = [op["data"] for op in ops]
+                elif kind == "update":
+                    query = self._update_sql(table, columns, filter_columns)
+                    params = [self._update_params(op["filters"], op["data"]) for op in ops]
+                else:
+                    query = self._delete_sql(table, filter_columns)
+                    params = [op["filters"] for op in ops]
+
+                try:
+                    rowcount = conn.execute(text(query), params).rowcount
+                except Exception as e:
+                    raise batch_failure(kind, table, indices, e, tx_id) from e
+
+                statements.append({"table": table, "op": kind, "ops": len(indices), "rowcount": rowcount})
+                for i in indices:
+                    results[i] = {"index": i, "op": kind, "table": table, "status": "ok", "statement": n}
+
+            return {"applied": len(operations), "statements": statements, "results": results}
+
+        return self._run_write(work, tx_id)
+
+    # ---------------- Upsert ----------------
+
+    # Upper bound on bind parameters in one statement
+    MAX_BIND_PARAMS = 65535
+
+    def upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        conflict_keys: List[str],
+        chunk_size: int = 1000,
+        *,
+        tx_id=None,
+    ) -> Dict[str, int]:
+        """
+        Batched insert-or-update, one multi-row statement per chunk,
+        all chunks in a single transaction.
+        Rows repeating the same conflict key are collapsed (last one wins).
+        """
+        if not rows:
+            return {"inserted": 0, "updated": 0, "skipped": 0}
+        if not conflict_keys:
+            raise ValueError("conflict_keys must name at least one column")
+
+        columns = list(rows[0].keys())
+        for key in conflict_keys:
+            if key not in columns:
+                raise ValueError(f"Conflict key '{key}' missing from rows")
+        for row in rows:
+            if set(row) != set(columns):
+                raise ValueError("All rows must have the same columns")
 
-    def update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any]):
-        set_clause = ", ".join([f"{k}=:{k}" for k in data])
-        where = " AND ".join([f"{k}=:_f_{k}" for k in filters])
+        unique_rows = list({
+            tuple(row[k] for k in conflict_keys): row for row in rows
+        }.values())
 
-        params = data | {f"_f_{k}": v for k, v in filters.items()}
+        chunk_size = max(1, min(chunk_size, self.MAX_BIND_PARAMS // len(columns)))
 
-        query = f"UPDATE {table} SET {set_clause} WHERE {where}"
-        with self.engine.begin() as conn:
-            conn.execute(text(query), params)
+        # With only key columns there is nothing to update: existing rows are skipped
+        existing_count = "updated" if set(columns) - set(conflict_keys) else "skipped"
 
-    def delete(self, table: str, filters: Dict[str, Any]):
-        where = " AND ".join([f"{k}=:{k}" for k in filters])
-        query = f"DELETE FROM {table} WHERE {where}"
-        with self.engine.begin() as conn:
-            conn.execute(text(query), filters)
+        def work(conn):
+            counts = {"inserted": 0, "updated": 0, "skipped": 0}
+            for start in range(0, len(unique_rows), chunk_size):
+                chunk = unique_rows[start:start + chunk_size]
+                inserted, existing = self._upsert_chunk(
+                    conn, table, columns, conflict_keys, chunk
+                )
+                counts["inserted"] += inserted
+                counts[existing_count] += existing
+            return counts
+
+        return self._run_write(work, tx_id)
+
+    def _values_clause(self, columns: List[str], chunk: List[Dict[str, Any]]):
+        """Build a multi-row VALUES clause and its bind parameters."""
+        groups = []
+        params = {}
+        for i, row in enumerate(chunk):
+            names = []
+            for j, column in enumerate(columns):
+                params[f"v{i}_{j}"] = row[column]
+                names.append(f":v{i}_{j}")
+            groups.append(f"({', '.join(names)})")
+        return ", ".join(groups), params
+
+    def _count_existing(self, conn, table, conflict_keys, chunk) -> int:
+        """
+        Count rows of the chunk that already exist, matched on conflict_keys:
+        one IN list (a row-value IN for composite keys) rather than an OR per
+        row, which would hit SQLite's 1000-deep expression limit.
+        """
+        if len(conflict_keys) == 1:
+            key = conflict_keys[0]
+            query = text(f"SELECT COUNT(*) FROM {table} WHERE {key} IN :keys").bindparams(
+                bindparam("keys", expanding=True)
+            )
+            return conn.execute(query, {"keys": [row[key] for row in chunk]}).scalar()
+        tuples = []
+        params = {}
+        for i, row in enumerate(chunk):
+            names = []
+            for j, key in enumerate(conflict_keys):
+                params[f"k{i}_{j}"] = row[key]
+                names.append(f":k{i}_{j}")
+            tuples.append(f"({', '.join(names)})")
+        query = (
+            f"SELECT COUNT(*) FROM {table} WHERE ({', '.join(conflict_keys)}) "
+            f"IN ({self._row_values(tuples)})"
+        )
+        return conn.execute(text(query), params).scalar()
+
+    def _row_values(self, tuples: List[str]) -> str:
+        """Right-hand side of a row-value IN."""
+        return "VALUES " + ", ".join(tuples)
+
+    def _upsert_chunk(self, conn, table, columns, conflict_keys, chunk):
+        values, params = self._values_clause(columns, chunk)
+        updates = [c for c in columns if c not in conflict_keys]
+        if updates:
+            action = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+        else:
+            action = "DO NOTHING"
+
+        # xmax is 0 only for freshly inserted tuples
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+            f"ON CONFLICT ({', '.join(conflict_keys)}) {action} "
+            f"RETURNING (xmax = 0) AS inserted"
+        )
+        # DO NOTHING returns only the inserted rows; the rest already existed
+        returned = conn.execute(text(query), params).fetchall()
+        inserted = sum(1 for row in returned if row.inserted)
+        return inserted, len(chunk) - inserted
+
+    # ---------------- Bulk load ----------------
+
+    def bulk_load(self, table: str, chunks, *, tx_id=None) -> int:
+        """
+        Load an iterable of row chunks in one transaction, consuming one
+        chunk at a time. Rows within a chunk must share the same columns.
+        """
+        def work(conn):
+            loaded = 0
+            for chunk in chunks:
+                if chunk:
+                    loaded += self._load_chunk(conn, table, chunk)
+            return loaded
+
+        # chunks may be a one-shot generator; a replay would load nothing
+        return self._run_write(work, tx_id, replayable=False)
+
+    def _insert_chunk(self, conn, table: str, chunk: List[Dict[str, Any]]) -> int:
+        conn.execute(text(self._insert_sql(table, chunk[0].keys())), chunk)
+        return len(chunk)
+
+    def _load_chunk(self, conn, table: str, chunk: List[Dict[str, Any]]) -> int:
+        """COPY FROM STDIN on psycopg2, executemany otherwise"""
+        if conn.dialect.driver != "psycopg2":
+            return self._insert_chunk(conn, table, chunk)
+
+        columns = list(chunk[0].keys())
+        buffer = io.StringIO()
+        for row in chunk:
+            buffer.write("\t".join(copy_text_field(row[c]) for c in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer
+            )
+        finally:
+            cursor.close()
+        return len(chunk)
 
     # ---------------- Aggregation ----------------
 
-    def aggregate(self, table: str, pipeline: str):
-        return self.execute_query(pipeline)
+    def aggregate(self, table: str, pipeline: str, *, limit=None, **options):
+        # Mongo cursor options (allow_disk_use, fields, ...) don't apply to SQL
+        return self.execute_query(pipeline, limit=limit)
 
     # ---------------- Streaming ----------------
 
     def fetch_many(self, query: str, batch_size: int = 1000):
         self.validate_query(query)
-        with self.engine.connect() as conn:
+        control = current_control()
+        with self._read_conn() as conn:
             result = conn.execution_options(stream_results=True).execute(text(query))
             while True:
+                if control:
+                    control.check()
                 rows = result.fetchmany(batch_size)
                 if not rows:
                     break
                 yield [dict(r._mapping) for r in rows]
 
+    def copy_to_csv(self, query: str, fileobj) -> Dict[str, Any]:
+        """
+        Stream a query's result into fileobj with COPY ... TO STDOUT (CSV with
+        header). Requires psycopg2; see capabilities()["copy_export"].
+        """
+        self.validate_query(query)
+        with self._read_conn() as conn:
+            columns = list(conn.execute(text(f"SELECT * FROM ({query}) AS q LIMIT 0")).keys())
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", fileobj
+                )
+                rows = cursor.rowcount
+            finally:
+                cursor.close()
+        return {"rows": rows if rows >= 0 else None, "columns": columns}
+
+    # ---------------- Time series ----------------
+
+    def downsample(
+        self,
+        table: str,
+        time_column: str,
+        value_columns: List[str],
+        bucket: str,
+        agg: str = "avg",
+        *,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        max_points: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        check_downsample_args(time_column, value_columns, agg)
+        count, unit = parse_bucket(bucket)
+        conditions, params = [], {}
+        if start is not None:
+            conditions.append(f"{time_column} >= :start")
+            params["start"] = start
+        if end is not None:
+            conditions.append(f"{time_column} < :end")
+            params["end"] = end
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        aggregates = ", ".join(f"{agg.upper()}({c}) AS {c}" for c in value_columns)
+        query = (
+            f"SELECT {self._bucket_expression(time_column, count, unit)} AS bucket, "
+            f"{aggregates}, COUNT(*) AS samples FROM {table}{where} GROUP BY 1 ORDER BY 1"
+        )
+        with self._read_conn() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(text(query), params)]
+        return reduce_points(rows, value_columns[0], max_points)
+
+    def _bucket_expression(self, column: str, count: int, unit: str) -> str:
+        """date_trunc for single units, date_bin (PostgreSQL 14+) for multiples; weeks start Monday."""
+        if count == 1:
+            return f"date_trunc('{unit}', {column})"
+        return f"date_bin(INTERVAL '{count} {unit}s', {column}, '2000-01-03')"
+
+    # ---------------- Full-text search ----------------
+
+    # Text search configuration of the tsvector index and queries
+    TEXT_SEARCH_CONFIG = "english"
+    # Case-insensitive pattern match of the fallback scan
+    LIKE_OPERATOR = "ILIKE"
+
+    def search_text(self, table: str, columns: List[str], query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        check_columns(columns)
+        check_search_query(query)
+        with self._read_conn() as conn:
+            if self._has_text_index(conn, table, columns):
+                return self._fts_search(conn, table, columns, query, limit)
+            return self._like_search(conn, table, columns, query, limit)
+
+    def create_text_index(self, table: str, columns: List[str], sample_query: Optional[str] = None) -> Dict[str, Any]:
+        check_columns(columns)
+        start = time.monotonic()
+
+        def build(conn):
+            if self._has_text_index(conn, table, columns):
+                return False
+            self._build_text_index(conn, table, columns)
+            return True
+
+        created = self._run_index_build(build)
+        report = {
+            "table": table,
+            "columns": columns,
+            "index": text_index_name(table, columns),
+            "created": created,
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        term = (sample_query or "").strip() or sample_term(
+            [row.get(c) for row in self.sample_rows(table, 20) for c in columns]
+        )
+        if term:
+            with self._read_conn() as conn:
+                fts_ms, fts_rows = best_ms(lambda: self._fts_search(conn, table, columns, term, 20))
+                like_ms, like_rows = best_ms(lambda: self._like_search(conn, table, columns, term, 20))
+            report.update(speedup_report(term, fts_ms, like_ms, len(fts_rows), len(like_rows)))
+        return report
+
+    def _text_vector(self, columns: List[str]) -> str:
+        """The indexed expression; searches must repeat it exactly to use the GIN index."""
+        document = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+        return f"to_tsvector('{self.TEXT_SEARCH_CONFIG}', {document})"
+
+    def _has_text_index(self, conn, table: str, columns: List[str]) -> bool:
+        return self._valid_index(conn, text_index_name(table, columns))
+
+    def _build_text_index(self, conn, table: str, columns: List[str]) -> None:
+        name = text_index_name(table, columns)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY {name} ON {table} USING GIN ({self._text_vector(columns)})"
+        ))
+
+    def _valid_index(self, conn, name: str) -> bool:
+        """Whether index name exists and is usable; a failed concurrent build leaves it invalid."""
+        return bool(conn.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name},
+        ).scalar())
+
+    def _run_index_build(self, work):
+        """
+        Run work(conn) that builds an index on an autocommit connection:
+        CREATE INDEX CONCURRENTLY keeps the table writable during the build
+        but cannot run inside a transaction block. The DROP before each
+        build clears the invalid leftover of one that failed.
+        """
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            return work(conn)
+
+    def _fts_search(self, conn, table: str, columns: List[str], query: str, limit: int):
+        vector = self._text_vector(columns)
+        result = conn.execute(text(
+            f"SELECT t.*, ts_rank({vector}, q) AS _rank "
+            f"FROM {table} AS t, websearch_to_tsquery('{self.TEXT_SEARCH_CONFIG}', :query) AS q "
+            f"WHERE {vector} @@ q ORDER BY _rank DESC LIMIT :limit"
+        ), {"query": query, "limit": limit})
+        return [dict(row._mapping) for row in result]
+
+    def _like_search(self, conn, table: str, columns: List[str], query: str, limit: int):
+        """Substring scan; _rank is the number of matching columns."""
+        matches = [f"t.{c} {self.LIKE_OPERATOR} :pattern" for c in columns]
+        rank = " + ".join(f"(CASE WHEN {m} THEN 1 ELSE 0 END)" for m in matches)
+        result = conn.execute(text(
+            f"SELECT t.*, {rank} AS _rank FROM {table} AS t "
+            f"WHERE {' OR '.join(matches)} ORDER BY _rank DESC LIMIT :limit"
+        ), {"pattern": f"%{query}%", "limit": limit})
+        return [dict(row._mapping) for row in result]
+
+    # ---------------- Vector search ----------------
+
+    # pgvector distance operator and HNSW operator class per metric
+    PGVECTOR_OPERATORS = {
+        "cosine": ("<=>", "vector_cosine_ops"),
+        "dot": ("<#>", "vector_ip_ops"),
+        "l2": ("<->", "vector_l2_ops"),
+    }
+    # Index candidates per requested row when filters may reject some of them
+    VECTOR_FILTER_OVERSAMPLING = 10
+
+    def vector_search(
+        self,
+        table: str,
+        column: str,
+        embedding: List[float],
+        k: int = 10,
+        *,
+        filters: Optional[Dict[str, Any]] = None,
+        metric: str = "cosine",
+        exact: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        pgvector's distance operators (and its HNSW index unless exact) when
+        column is a vector column. Otherwise column holds float32 blobs or
+        JSON arrays scored with NumPy, block by block, or through the IVF
+        index create_vector_index() writes.
+        """
+        check_vector_args(column, metric, k)
+        filters = filters or {}
+        if filters:
+            check_columns(list(filters))
+        with self._read_conn() as conn:
+            if self._is_pgvector(conn, table, column):
+                return self._pgvector_search(conn, table, column, embedding, k, filters, metric, exact)
+            query = query_vector(embedding)
+            key = self._vector_key(conn, table)
+            index = None
+            if key and not exact:
+                index = load_index(self._vector_index_path(table, column, metric))
+                if index and index.meta.get("key_column") != key:
+                    index = None
+            return nearest(
+                query, k, metric, column,
+                blocks=lambda after: self._vector_blocks(conn, table, column, key, filters, after, len(query)),
+                fetch=(lambda keys: self._rows_by_key(conn, table, key, keys, filters)) if key else None,
+                index=index,
+                oversampling=self.VECTOR_FILTER_OVERSAMPLING if filters else 1,
+            )
+
+    def create_vector_index(self, table: str, column: str, metric: str = "cosine") -> Dict[str, Any]:
+        """
+        An HNSW index for pgvector columns. Otherwise an IVF index file of
+        the column's vectors, keyed by the primary key: rows deleted or
+        changed later are rescored from the table, rows added later are found
+        when the key is an increasing integer, anything else needs a rebuild.
+        """
+        check_vector_args(column, metric, 1)
+        start = time.monotonic()
+        with self._read_conn() as conn:
+            pgvector = self._is_pgvector(conn, table, column)
+        if pgvector:
+            name = vector_index_name(table, column, metric)
+            opclass = self.PGVECTOR_OPERATORS[metric][1]
+
+            def build(conn):
+                if self._valid_index(conn, name):
+                    return False
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY {name} ON {table} USING hnsw ({column} {opclass})"
+                ))
+                return True
+
+            details = {"kind": "hnsw", "index": name, "created": self._run_index_build(build)}
+        else:
+            with self._read_conn() as conn:
+                key = self._vector_key(conn, table)
+                if key is None:
+                    raise ValueError(f"A vector index needs a single-column primary key on {table}")
+                keys, matrix = collect_vectors(self._vector_blocks(conn, table, column, key, {}, None))
+            index = IVFIndex.build(
+                self._vector_index_path(table, column, metric), keys, matrix, metric,
+                {"table": table, "column": column, "key_column": key},
+            )
+            details = {
+                "kind": "ivf",
+                "index": index.path,
+                "vectors": index.meta["vectors"],
+                "lists": index.meta["lists"],
+                "probes": index.probes(),
+            }
+        report = {
+            "table": table,
+            "column": column,
+            "metric": metric,
+            **details,
+            "build_seconds": round(time.monotonic() - start, 3),
+        }
+        queries = [as_vector(row.get(column)) for row in self.sample_rows(table, BENCHMARK_QUERIES)]
+        report.update(benchmark_index(
+            lambda query, exact: self.vector_search(table, column, query, metric=metric, exact=exact),
+            [query for query in queries if query is not None],
+        ))
+        return report
+
+    def _is_pgvector(self, conn, table: str, column: str) -> bool:
+        type_name = conn.execute(text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = to_regclass(:table) AND attname = :column AND NOT attisdropped"
+        ), {"table": table, "column": column}).scalar()
+        return bool(type_name) and type_name.startswith("vector")
+
+    def _pgvector_search(self, conn, table, column, embedding, k, filters, metric, exact):
+        operator = self.PGVECTOR_OPERATORS[metric][0]
+        distance = f"t.{column} {operator} CAST(:_embedding AS vector)"
+        # <#> is the negated inner product
+        score = f"1 - ({distance})" if metric == "cosine" else f"-({distance})"
+        conditions = [f"t.{c} = :_f_{c}" for c in filters]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        params.update({"_embedding": json.dumps([float(x) for x in embedding]), "_k": k})
+        if exact:
+            # Without index scans the ORDER BY is an exact sort
+            conn.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+        elif k > 40:
+            # An HNSW scan returns at most ef_search (default 40) rows
+            conn.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(k)})
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        result = conn.execute(text(
+            f"SELECT t.*, {score} AS _score FROM {table} AS t{where} ORDER BY {distance} LIMIT :_k"
+        ), params)
+        return [
+            {name: value for name, value in row._mapping.items() if name != column}
+            for row in result
+        ]
+
+    def _vector_key(self, conn, table: str) -> Optional[str]:
+        """Column that identifies rows for index lookups: a single-column primary key."""
+        key = inspect(conn).get_pk_constraint(table).get("constrained_columns") or []
+        return key[0] if len(key) == 1 else None
+
+    def _vector_index_root(self) -> str:
+        """This database's directory under INDEX_DIR."""
+        url = make_url(self.db_url).render_as_string(hide_password=True)
+        return os.path.join(INDEX_DIR, hashlib.sha1(url.encode()).hexdigest()[:12])
+
+    def _vector_index_path(self, table: str, column: str, metric: str) -> str:
+        return index_path(self._vector_index_root(), table, column, metric)
+
+    def _vector_blocks(self, conn, table, column, key, filters, after, dim=None):
+        """
+        (matrix, keys) per SCAN_BLOCK_ROWS rows matching filters (with key
+        above `after` unless it is None); without a key, (matrix, rows).
+        """
+        conditions = [f"{c} = :_f_{c}" for c in filters]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        if after is not None:
+            conditions.append(f"{key} > :_after")
+            params["_after"] = after
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        control = current_control()
+        result = conn.execution_options(stream_results=True).execute(
+            text(f"SELECT {f'{key}, {column}' if key else '*'} FROM {table}{where}"), params
+        )
+        while True:
+            if control:
+                control.check()
+            rows = result.fetchmany(SCAN_BLOCK_ROWS)
+            if not rows:
+                break
+            if key:
+                yield vector_block([row[1] for row in rows], [row[0] for row in rows], dim)
+            else:
+                rows = [dict(row._mapping) for row in rows]
+                yield vector_block([row.get(column) for row in rows], rows, dim)
+
+    def _rows_by_key(self, conn, table, key, keys, filters) -> Dict[Any, Dict[str, Any]]:
+        if not keys:
+            return {}
+        conditions = [f"t.{key} IN :_keys", *(f"t.{c} = :_f_{c}" for c in filters)]
+        params = {f"_f_{c}": v for c, v in filters.items()}
+        params["_keys"] = list(keys)
+        query = text(
+            f"SELECT t.{key} AS _vector_key, t.* FROM {table} AS t WHERE {' AND '.join(conditions)}"
+        ).bindparams(bindparam("_keys", expanding=True))
+        rows = {}
+        for row in conn.execute(query, params):
+            row = dict(row._mapping)
+            rows[row.pop("_vector_key")] = row
+        return rows
+
+    # ---------------- Parallel scans ----------------
+
+    # Upper bound on a scan's degree of parallelism
+    MAX_SCAN_PARALLELISM = 16
+
+    def parallel_scan(self, query: str, *, parallelism: int = 4, ordered: bool = False, batch_size: int = 1000):
+        """
+        Read a whole table (name or SELECT * FROM table) as key ranges, each
+        streamed by fetch_many on its own pooled connection. ordered=True
+        yields the ranges in key order. Each range is its own transaction, so
+        rows changed during the scan may be seen in either state.
+        """
+        table = scan_table(query)
+        parallelism = max(
+            1, min(parallelism, self.MAX_SCAN_PARALLELISM, self.concurrency_limits()["read"])
+        )
+        with self._read_conn() as conn:
+            key, ranges = self._scan_ranges(conn, table, parallelism)
+        order = f" ORDER BY {key}" if ordered and key else ""
+        partitions = [
+            functools.partial(
+                self.fetch_many,
+                f"SELECT * FROM {table}" + (f" WHERE {cond}" if cond else "") + order,
+                batch_size,
+            )
+            for cond in ranges
+        ]
+        return merge_partitions(partitions, parallelism, ordered)
+
+    def _scan_ranges(self, conn, table: str, parts: int):
+        """
+        (order key, range conditions): integer primary key ranges, else ctid
+        page ranges (TID range scans, PostgreSQL 14+; older servers filter a
+        sequential scan per range).
+        """
+        key = self._integer_key(conn, table)
+        if key:
+            return key, self._key_ranges(conn, table, key, parts)
+        pages = conn.execute(text(
+            "SELECT pg_relation_size(to_regclass(:table)) / current_setting('block_size')::int"
+        ), {"table": table}).scalar()
+        if not pages:
+            return "ctid", [None]
+        return "ctid", [
+            range_condition("ctid", low, high, lambda page: f"'({page},0)'::tid")
+            for low, high in integer_ranges(0, pages - 1, parts)
+        ]
+
+    def _key_ranges(self, conn, table: str, key: str, parts: int) -> List[Optional[str]]:
+        low, high = conn.execute(text(
+            f"SELECT (SELECT MIN({key}) FROM {table}), (SELECT MAX({key}) FROM {table})"
+        )).one()
+        if low is None:
+            return [None]
+        return [range_condition(key, lo, hi) for lo, hi in integer_ranges(low, high, parts)]
+
     def raw_client(self):
         return self.engine
@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from adapters.base import DatabaseAdapter, create_adapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTION = "default"
+
+# create_adapter options a connection entry may set besides db_type / db_url
+ADAPTER_OPTIONS = ("replica_urls", "replica_strategy", "max_replica_lag", "attach", "attach_mode", "data_dir")
+
+
+def load_connection_config(path: str) -> Dict[str, Any]:
+    """
+    Read a connections file (JSON, or YAML when PyYAML is installed):
+
+        {
+          "default": "orders",
+          "idle_timeout": 300,
+          "connections": {
+            "orders": {"db_type": "postgres", "db_url": "postgresql://...${ORDERS_PW}@..."},
+            "events": {"db_type": "mongo", "db_url": "mongodb://...", "description": "..."}
+          }
+        }
+
+    ${VAR} references in db_url / replica_urls / attach are expanded from the
+    environment so secrets need not live in the file.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML connection files require PyYAML (pip install pyyaml)")
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+
+    connections = config.get("connections") if isinstance(config, dict) else None
+    if not connections:
+        raise ValueError(f"{path} defines no connections")
+    for name, entry in connections.items():
+        if "db_type" not in entry or "db_url" not in entry:
+            raise ValueError(f"Connection '{name}' needs db_type and db_url")
+        entry["db_url"] = os.path.expandvars(entry["db_url"])
+        if entry.get("replica_urls"):
+            entry["replica_urls"] = [os.path.expandvars(u) for u in entry["replica_urls"]]
+        if entry.get("attach"):
+            entry["attach"] = {alias: os.path.expandvars(u) for alias, u in entry["attach"].items()}
+    return config
+
+
+class ConnectionRegistry:
+    """
+    Named database connections served by one MCP server.
+
+    Adapters are created on first use and closed again (pools disposed)
+    after idle_timeout seconds without calls, unless a call is running or a
+    transaction is open on them. A background reaper does the closing.
+    """
+
+    def __init__(
+        self,
+        connections: Dict[str, Dict[str, Any]],
+        default: Optional[str] = None,
+        idle_timeout: Optional[float] = 300.0,
+    ):
+        if default is not None and default not in connections:
+            raise ValueError(f"Default connection '{default}' is not defined")
+        self.configs = connections
+        self.default = default or (next(iter(connections)) if len(connections) == 1 else None)
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, Dict[str, Any]] = {
+            name: {
+                "adapter": None,
+                "in_use": 0,
+                "last_used": time.monotonic(),
+                "lock": threading.Lock(),
+            }
+            for name in connections
+        }
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_file(cls, path: str) -> "ConnectionRegistry":
+        config = load_connection_config(path)
+        return cls(
+            config["connections"],
+            default=config.get("default"),
+            idle_timeout=config.get("idle_timeout", 300.0),
+        )
+
+    @classmethod
+    def single(cls, db_type: str, db_url: str, **options) -> "ConnectionRegistry":
+        """The classic one-database server: a lone connection named 'default', never idled out."""
+        return cls(
+            {DEFAULT_CONNECTION: {"db_type": db_type, "db_url": db_url, **options}},
+            idle_timeout=None,
+        )
+
+    def resolve(self, name: Optional[str]) -> str:
+        if name is None:
+            if self.default is None:
+                raise ValueError(
+                    f"Several connections are configured; pass connection (one of: {', '.join(self.configs)})"
+                )
+            return self.default
+        if name not in self.configs:
+            raise ValueError(f"Unknown connection: {name}. Available: {', '.join(self.configs)}")
+        return name
+
+    def acquire(self, name: Optional[str]) -> DatabaseAdapter:
+        """Adapter for a call, opened if needed; pair with release()."""
+        name = self.resolve(name)
+        entry = self._entries[name]
+        with entry["lock"]:
+            if entry["adapter"] is None:
+                config = self.configs[name]
+                logger.info("Opening connection %s (%s)", name, config["db_type"])
+                entry["adapter"] = create_adapter(
+                    config["db_type"],
+                    config["db_url"],
+                    **{k: config[k] for k in ADAPTER_OPTIONS if k in config},
+                )
+            entry["in_use"] += 1
+            entry["last_used"] = time.monotonic()
+            adapter = entry["adapter"]
+        self._ensure_reaper()
+        return adapter
+
+    def release(self, name: Optional[str]) -> None:
+        entry = self._entries[self.resolve(name)]
+        with entry["lock"]:
+            entry["in_use"] -= 1
+            entry["last_used"] = time.monotonic()
+
+    def describe(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        described = []
+        for name, config in self.configs.items():
+            entry = self._entries[name]
+            described.append({
+                "name": name,
+                "db_type": config["db_type"],
+                "description": config.get("description"),
+                "default": name == self.default,
+                "open": entry["adapter"] is not None,
+                "calls_in_flight": entry["in_use"],
+                "idle_seconds": round(now - entry["last_used"], 1) if entry["adapter"] else None,
+            })
+        return described
+
+    def close_all(self) -> None:
+        self._stop.set()
+        for name, entry in self._entries.items():
+            with entry["lock"]:
+                adapter, entry["adapter"] = entry["adapter"], None
+            if adapter is not None:
+                self._close(name, adapter)
+
+    # ---------------- Idle closing ----------------
+
+    def _ensure_reaper(self) -> None:
+        if not self.idle_timeout or (self._reaper and self._reaper.is_alive()):
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(
+            target=self._reap_loop, name="connection-reaper", daemon=True
+        )
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(self.idle_timeout / 4, 0.05)
+        while not self._stop.wait(interval):
+            self.close_idle()
+
+    def close_idle(self) -> None:
+        now = time.monotonic()
+        for name, entry in self._entries.items():
+            with entry["lock"]:
+                adapter = entry["adapter"]
+                if (
+                    adapter is None
+                    or entry["in_use"]
+                    or now - entry["last_used"] <= self.idle_timeout
+                    or adapter.open_transactions()
+                ):
+                    continue
+                entry["adapter"] = None
+            logger.info("Closing idle connection %s", name)
+            self._close(name, adapter)
+
+    def _close(self, name: str, adapter: DatabaseAdapter) -> None:
+        try:
+            adapter.close()
+        except Exception as e:
+            logger.warning("Error closing connection %s: %s", name, e)
+
+
+# ---------------- Per-call adapter ----------------
+
+_current_adapter: ContextVar[Optional[DatabaseAdapter]] = ContextVar(
+    "current_adapter", default=None
+)
+_current_connection: ContextVar[Optional[str]] = ContextVar(
+    "current_connection", default=None
+)
+
+
+def current_connection() -> Optional[str]:
+    return _current_connection.get()
+
+
+@contextmanager
+def use_adapter(name: str, adapter: DatabaseAdapter):
+    adapter_token = _current_adapter.set(adapter)
+    name_token = _current_connection.set(name)
+    try:
+        yield adapter
+    finally:
+        _current_connection.reset(name_token)
+        _current_adapter.reset(adapter_token)
+
+
+class AdapterProxy:
+    """
+    Stands in for "the adapter" in the tool modules: attribute access goes
+    to the adapter of the connection the current tool call selected.
+    """
+
+    def __getattr__(self, name: str):
+        adapter = _current_adapter.get()
+        if adapter is None:
+            raise RuntimeError("No connection selected for this call")
+        return getattr(adapter, name)
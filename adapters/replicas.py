@@ -0,0 +1,136 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+REPLICA_STRATEGIES = ("round_robin", "least_connections")
+
+
+class ReplicaRouter:
+    """
+    Picks the replica engine that serves a read.
+
+    Replicas are skipped while they are down (unreachable within the last
+    retry_after seconds) or lagging more than max_lag seconds behind the
+    primary. Lag is probed at most every lag_check_interval seconds per
+    replica with lag_probe(conn), which returns seconds of lag, or None if
+    the lag is unknown (e.g. replication stopped). Probes run on a
+    background thread, so a slow or hanging replica never delays a read;
+    choose() judges by the last probe, and a replica serves no reads until
+    its first probe has come back. choose() returns None when no replica
+    qualifies, and the caller reads from the primary.
+    """
+
+    def __init__(
+        self,
+        engines: Dict[str, Engine],
+        lag_probe: Callable[[Any], Optional[float]],
+        strategy: str = "round_robin",
+        max_lag: Optional[float] = 30.0,
+        lag_check_interval: float = 5.0,
+        retry_after: float = 30.0,
+    ):
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(
+                f"Unknown replica strategy: {strategy}. Expected one of: {', '.join(REPLICA_STRATEGIES)}"
+            )
+        self.strategy = strategy
+        self.lag_probe = lag_probe
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.retry_after = retry_after
+        self.replicas: List[Dict[str, Any]] = [
+            {
+                "name": make_url(url).render_as_string(hide_password=True),
+                "engine": engine,
+                "lag": None,
+                "checked_at": None,
+                "down_until": 0.0,
+                "probe": None,
+            }
+            for url, engine in engines.items()
+        ]
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        # Start the first lag probes now, so replicas are ready by the first read
+        for replica in self.replicas:
+            self._usable(replica)
+
+    def choose(self) -> Optional[Engine]:
+        candidates = [r for r in self.replicas if self._usable(r)]
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda r: self._checked_out(r["engine"]))["engine"]
+        return candidates[next(self._turn) % len(candidates)]["engine"]
+
+    def owns(self, engine: Engine) -> bool:
+        return any(r["engine"] is engine for r in self.replicas)
+
+    def mark_down(self, engine: Engine, error: Exception) -> None:
+        for replica in self.replicas:
+            if replica["engine"] is engine:
+                replica["down_until"] = time.monotonic() + self.retry_after
+                logger.warning(
+                    "Replica %s unavailable, reading from other replicas / primary for %.0fs: %s",
+                    replica["name"], self.retry_after, error,
+                )
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "url": r["name"],
+                "up": now >= r["down_until"],
+                "lag_seconds": r["lag"],
+                "connections": self._checked_out(r["engine"]),
+            }
+            for r in self.replicas
+        ]
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica["engine"].dispose()
+
+    def _usable(self, replica: Dict[str, Any]) -> bool:
+        now = time.monotonic()
+        if now < replica["down_until"]:
+            return False
+        if self.max_lag is None:
+            return True
+        with self._lock:
+            due = replica["checked_at"] is None or now - replica["checked_at"] >= self.lag_check_interval
+            if due:
+                # Claim the probe so concurrent readers don't all run it
+                replica["checked_at"] = now
+        if due:
+            replica["probe"] = threading.Thread(
+                target=self._probe_lag, args=(replica,), name="replica-lag-probe", daemon=True
+            )
+            replica["probe"].start()
+        lag = replica["lag"]
+        return lag is not None and lag <= self.max_lag and time.monotonic() >= replica["down_until"]
+
+    def _probe_lag(self, replica: Dict[str, Any]) -> None:
+        try:
+            with replica["engine"].connect() as conn:
+                replica["lag"] = self.lag_probe(conn)
+        except Exception as e:
+            replica["lag"] = None
+            self.mark_down(replica["engine"], e)
+            return
+        if replica["lag"] is None or replica["lag"] > self.max_lag:
+            logger.warning(
+                "Replica %s lag %s exceeds %.0fs; routing reads elsewhere",
+                replica["name"],
+                replica["lag"], self.max_lag,
+            )
+
+    def _checked_out(self, engine: Engine) -> int:
+        checkedout = getattr(engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
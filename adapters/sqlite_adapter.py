@@ -1,5 +1,237 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from adapters.deadlines import current_control
 from adapters.postgresql_adapter import PostgresAdapter
-from sqlalchemy import text, create_engine
+from adapters.text_search import text_index_name
+from adapters.timeseries import UNIT_SECONDS
+from sqlalchemy import event, text, create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteWriter:
+    """
+    Single writer thread owning one connection.
+
+    Write jobs (callables taking a connection) are queued; whatever has piled
+    up while the previous commit ran is applied in one transaction, so bursts
+    of small writes cost one fsync. If a job in the group fails, the group is
+    rolled back and its jobs are retried one by one so only the bad job fails.
+
+    Jobs that cannot run twice (e.g. ones consuming a one-shot iterator) are
+    submitted with replayable=False and always commit in a group of their own.
+    """
+
+    # How often a waiting submit() checks its deadline and the writer thread
+    POLL_SECONDS = 0.1
+
+    def __init__(self, engine: Engine, max_group: int = 256):
+        self.engine = engine
+        self.max_group = max_group
+        self._queue: "queue.Queue" = queue.Queue()
+        self._inflight: list = []
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, work, *, replayable: bool = True):
+        """
+        Queue work(conn) and block until it has been committed. The wait is
+        bounded by the calling tool's deadline: a job still queued when the
+        call expires or is cancelled is dropped, one already running is
+        waited for. Fails at once if the writer thread has stopped.
+        """
+        future: Future = Future()
+        self._queue.put((work, future, replayable))
+        control = current_control()
+        while True:
+            remaining_ms = control.remaining_ms() if control is not None else None
+            timeout = self.POLL_SECONDS
+            if remaining_ms is not None:
+                timeout = min(timeout, remaining_ms / 1000)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeout:
+                pass
+            if control is not None and (control.cancelled or control.expired()) and future.cancel():
+                control.check()
+            if not self._thread.is_alive() and future.cancel():
+                raise RuntimeError("SQLite writer thread has stopped")
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            self._serve()
+        except Exception:
+            logger.exception("SQLite writer thread failed")
+        finally:
+            # Nothing will run what is still queued or in flight
+            error = RuntimeError("SQLite writer thread has stopped")
+            pending = list(self._inflight)
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    pending.append(job)
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _serve(self) -> None:
+        with self.engine.connect() as conn:
+            held = None
+            while True:
+                job = held or self._queue.get()
+                held = None
+                if job is None:
+                    return
+                jobs = [job]
+                stop = False
+                while job[2] and len(jobs) < self.max_group:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stop = True
+                        break
+                    if not job[2]:
+                        # Commit the group first; the job runs alone next
+                        held = job
+                        break
+                    jobs.append(job)
+                # Jobs whose callers gave up while queued are dropped
+                jobs = [job for job in jobs if job[1].set_running_or_notify_cancel()]
+                self._inflight = jobs
+                if jobs:
+                    self._commit_group(conn, jobs)
+                self._inflight = []
+                if stop:
+                    return
+
+    def _commit_group(self, conn, jobs) -> None:
+        try:
+            with conn.begin():
+                results = [work(conn) for work, _, _ in jobs]
+        except Exception as e:
+            if len(jobs) == 1:
+                jobs[0][1].set_exception(e)
+            else:
+                for job in jobs:
+                    self._commit_group(conn, [job])
+            return
+        for (_, future, _), result in zip(jobs, results):
+            future.set_result(result)
+
+
+class SQLiteSnapshot:
+    """
+    Copy of a SQLite file held in a shared-cache in-memory database.
+
+    The copy is made with the backup API, a few pages per step so writers
+    aren't locked out for the whole copy. engine() checks (at most once per
+    check_interval) whether the file changed - PRAGMA data_version on a probe
+    connection plus the mtimes of the file and its WAL - and builds a fresh
+    snapshot next to the old one before swapping it in. When the database is
+    larger than max_bytes no snapshot is kept and engine() returns None.
+    """
+
+    BACKUP_STEP_PAGES = 1024
+
+    def __init__(self, path: str, max_bytes: int, check_interval: float = 1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._probe = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._anchor: Optional[sqlite3.Connection] = None
+        self._version = None
+        self._checked_at = 0.0
+        self._generation = 0
+
+    def engine(self) -> Optional[Engine]:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    version = self._file_version()
+                    if version != self._version:
+                        self._reload()
+                        self._version = version
+                    self._checked_at = time.monotonic()
+        return self._engine
+
+    def close(self) -> None:
+        with self._lock:
+            self._swap(None, None)
+            self._probe.close()
+
+    def _file_version(self):
+        data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        mtimes = tuple(
+            os.stat(p).st_mtime_ns if os.path.exists(p) else None
+            for p in (self.path, f"{self.path}-wal")
+        )
+        return data_version, mtimes
+
+    def _size(self) -> int:
+        page_count = self._probe.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._probe.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def _reload(self) -> None:
+        size = self._size()
+        if size > self.max_bytes:
+            if self._engine is not None:
+                logger.warning(
+                    "%s is %d bytes, over the snapshot cap of %d; serving reads from the file",
+                    self.path, size, self.max_bytes,
+                )
+            self._swap(None, None)
+            return
+
+        self._generation += 1
+        uri = f"file:mcp_snapshot_{id(self)}_{self._generation}?mode=memory&cache=shared"
+        # The anchor keeps the in-memory database alive between reads
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            source.backup(anchor, pages=self.BACKUP_STEP_PAGES)
+        except Exception:
+            anchor.close()
+            raise
+        finally:
+            source.close()
+
+        engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+            poolclass=QueuePool,
+        )
+        self._swap(engine, anchor)
+
+    def _swap(self, engine, anchor) -> None:
+        old_engine, old_anchor = self._engine, self._anchor
+        self._engine, self._anchor = engine, anchor
+        if old_engine is not None:
+            old_engine.dispose()
+        if old_anchor is not None:
+            old_anchor.close()
 
 
 class SQLiteAdapter(PostgresAdapter):
@@ -7,16 +239,171 @@ class SQLiteAdapter(PostgresAdapter):
     SQLite adapter for local / embedded DBs.
     DB URL example:
     sqlite:///./app.db or sqlite:////absolute/path/to/database.db
+
+    Append ?snapshot=true (and optionally &snapshot_max_mb=N) to serve reads
+    from an in-memory copy of the file that reloads when the file changes.
+
+    Performance mode is on by default and switches the file to WAL journaling
+    for good: -wal / -shm files appear next to it, also when it is only read.
+    Append ?performance=false to leave the journal mode alone.
     """
     
+    # SQLITE_MAX_VARIABLE_NUMBER default was raised from 999 in 3.32
+    MAX_BIND_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+    # Pragmas applied to every connection in performance mode
+    PERFORMANCE_PRAGMAS = {
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
+    READER_POOL_SIZE = 4
+    # Shadow tables FTS5 creates next to each full-text table
+    FTS5_SHADOW_SUFFIXES = ("_data", "_idx", "_content", "_docsize", "_config")
+    SNAPSHOT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, db_url: str, performance: bool = True, **replica_options):
+        url = make_url(db_url)
+        self.snapshot_enabled = url.query.get("snapshot", "").lower() in ("1", "true", "yes")
+        self.snapshot_max_bytes = int(
+            float(url.query.get("snapshot_max_mb", 0)) * 1024 * 1024
+        ) or self.SNAPSHOT_MAX_BYTES
+        if url.query.get("performance", "").lower() in ("0", "false", "no"):
+            performance = False
+        # Our own options must not reach the sqlite3 driver
+        url = url.difference_update_query(["snapshot", "snapshot_max_mb", "performance"])
+
+        super().__init__(url.render_as_string(hide_password=False), **replica_options)
+        self.performance = performance
+        self.read_engine: Optional[Engine] = None
+        self._writer: Optional[SQLiteWriter] = None
+        self._snapshot: Optional[SQLiteSnapshot] = None
+
     def connect(self) -> None:
-        """SQLite-specific connection without pooling (not needed for file-based DB)"""
+        """
+        SQLite-specific connection.
+        In performance mode (file databases only) the database is switched to
+        WAL, reads go through a pool of read-only connections and autocommit
+        writes are funnelled through a single group-committing writer.
+        """
         self.engine = create_engine(
             self.db_url,
             connect_args={"check_same_thread": False},  # Allow multi-threaded access
             pool_pre_ping=True,
         )
-    
+        self._connect_replicas()
+
+        path = make_url(self.db_url).database
+        if not path or path == ":memory:":
+            return
+
+        if self.snapshot_enabled:
+            # Make sure the file exists before the read-only probe opens it
+            with self.engine.connect():
+                pass
+            self._snapshot = SQLiteSnapshot(path, self.snapshot_max_bytes)
+
+        if not self.performance:
+            return
+
+        event.listen(self.engine, "connect", self._apply_pragmas)
+        with self.engine.connect() as conn:
+            # WAL is persistent; readers no longer block behind writers
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        self.read_engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            ),
+            poolclass=QueuePool,
+            pool_size=self.READER_POOL_SIZE,
+            max_overflow=self.READER_POOL_SIZE,
+        )
+        event.listen(self.read_engine, "connect", self._apply_pragmas)
+        self._writer = SQLiteWriter(self.engine)
+
+    def _create_replica_engine(self, url: str) -> Engine:
+        """Replicas (e.g. copies kept in sync by litestream) are opened read-only."""
+        path = make_url(url).database
+        engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            ),
+            poolclass=QueuePool,
+            pool_size=self.READER_POOL_SIZE,
+            max_overflow=self.READER_POOL_SIZE,
+        )
+        if self.performance:
+            event.listen(engine, "connect", self._apply_pragmas)
+        return engine
+
+    def _replica_lag(self, conn):
+        """SQLite has no replication protocol to ask; replicas are trusted to be current."""
+        conn.exec_driver_sql("SELECT 1")
+        return 0.0
+
+    def _apply_pragmas(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in self.PERFORMANCE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    def close(self) -> None:
+        if self._snapshot:
+            self._snapshot.close()
+        if self._writer:
+            self._writer.close()
+        if self.read_engine:
+            self.read_engine.dispose()
+        super().close()
+
+    def _reader(self) -> Engine:
+        if self._snapshot:
+            engine = self._snapshot.engine()
+            if engine is not None:
+                return engine
+        if self.replicas:
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica
+        return self.read_engine or self.engine
+
+    # VM instructions between progress handler calls
+    PROGRESS_HANDLER_OPS = 10000
+
+    @contextmanager
+    def _deadline_scope(self, conn, control):
+        """No statement timeout in SQLite: a progress handler aborts the query instead"""
+        dbapi_connection = conn.connection.dbapi_connection
+        dbapi_connection.set_progress_handler(
+            lambda: 1 if control.cancelled or control.expired() else 0,
+            self.PROGRESS_HANDLER_OPS,
+        )
+        try:
+            yield
+        finally:
+            dbapi_connection.set_progress_handler(None, 0)
+
+    def _interrupt(self, conn) -> None:
+        conn.connection.dbapi_connection.interrupt()
+
+    def _run_write(self, work, tx_id: Optional[str] = None, *, replayable: bool = True):
+        """Autocommit writes go through the writer queue; transactions run on their own connection."""
+        if tx_id is None and self._writer:
+            return self._writer.submit(work, replayable=replayable)
+        return super()._run_write(work, tx_id)
+
+    def concurrency_limits(self):
+        """
+        Reads are bounded by the reader pool. Writes are serialized by the
+        writer thread anyway; letting a few queue up lets it group-commit them.
+        """
+        return {"read": self.READER_POOL_SIZE, "write": 4, "schema": 1}
+
     def capabilities(self):
         """SQLite has limited transaction support and no advanced features"""
         return {
@@ -29,13 +416,13 @@ class SQLiteAdapter(PostgresAdapter):
     
     def explain_query(self, query: str):
         """SQLite uses EXPLAIN QUERY PLAN"""
-        with self.engine.connect() as conn:
+        with self._read_conn() as conn:
             result = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"))
             return [dict(row._mapping) for row in result]
     
     def get_indexes(self, table: str):
         """SQLite-specific index query"""
-        with self.engine.connect() as conn:
+        with self._connect_reader() as conn:
             # Get index list
             result = conn.execute(text(f"PRAGMA index_list('{table}')"))
             indexes = []
@@ -49,16 +436,222 @@ class SQLiteAdapter(PostgresAdapter):
                 })
             return indexes
     
-    def begin_transaction(self):
-        """SQLite transaction handling"""
-        self._tx = self.engine.begin()
-    
-    def commit(self):
-        """Commit SQLite transaction"""
-        if hasattr(self, '_tx'):
-            self._tx.commit()
-    
-    def rollback(self):
-        """Rollback SQLite transaction"""
-        if hasattr(self, '_tx'):
-            self._tx.rollback()
+    def _text_index_tables(self, conn) -> set:
+        """FTS5 tables built by create_text_index, with the shadow tables FTS5 keeps for each."""
+        names = set()
+        for (name,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name LIKE '%\\_fts' ESCAPE '\\' AND sql LIKE 'CREATE VIRTUAL TABLE%fts5%'"
+        )):
+            names.add(name)
+            names.update(name + suffix for suffix in self.FTS5_SHADOW_SUFFIXES)
+        return names
+
+    def _table_names(self, inspector) -> List[str]:
+        """Text index tables are internal; listing them would only confuse the schema."""
+        hidden = self._text_index_tables(inspector.bind)
+        return [name for name in inspector.get_table_names() if name not in hidden]
+
+    def _collect_table_stats(self, table: str) -> Dict[str, Any]:
+        """
+        sqlite_stat1 (written by ANALYZE) gives the row count and, per index,
+        the average rows per leading-column value. Without it the rowid range
+        is used as an upper bound. Sizes need the dbstat virtual table.
+        """
+        with self._read_conn() as conn:
+            if table in self._text_index_tables(conn) or not conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :table"),
+                {"table": table},
+            ).first():
+                raise ValueError(f"Table not found: {table}")
+
+            try:
+                stat_rows = conn.execute(
+                    text("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = :table"),
+                    {"table": table},
+                ).all()
+            except Exception:
+                # No ANALYZE has run yet: sqlite_stat1 does not exist
+                stat_rows = []
+
+            rows, columns = None, {}
+            for idx, stat in stat_rows:
+                numbers = [int(x) for x in stat.split() if x.isdigit()]
+                if not numbers:
+                    continue
+                rows = numbers[0]
+                if idx and len(numbers) > 1 and numbers[1]:
+                    leading = conn.execute(text(f"PRAGMA index_info('{idx}')")).first()
+                    if leading:
+                        columns[leading[2]] = {"distinct_estimate": round(rows / numbers[1])}
+            source = "sqlite_stat1"
+
+            if rows is None:
+                try:
+                    low, high = conn.execute(text(
+                        f"SELECT (SELECT MIN(rowid) FROM {table}), (SELECT MAX(rowid) FROM {table})"
+                    )).one()
+                    rows = high - low + 1 if low is not None else 0
+                    source = "rowid range (run ANALYZE for estimates)"
+                except Exception:
+                    source = "none (WITHOUT ROWID table; run ANALYZE)"
+
+            try:
+                total_bytes = conn.execute(
+                    text("SELECT SUM(pgsize) FROM dbstat WHERE name = :table"),
+                    {"table": table},
+                ).scalar()
+            except Exception:
+                # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+                total_bytes = None
+
+        return {
+            "table": table,
+            "estimated_rows": rows,
+            "total_bytes": total_bytes,
+            "columns": columns,
+            "source": source,
+        }
+
+    def sample_rows(self, table: str, n: int = 10) -> List[Dict[str, Any]]:
+        """Random rowid lookups; WITHOUT ROWID and small tables are shuffled."""
+        rows = self.get_table_stats(table).get("estimated_rows")
+        with self._read_conn() as conn:
+            if rows and rows > self.SMALL_TABLE_ROWS:
+                try:
+                    return self._sample_by_key(conn, table, "rowid", n)
+                except Exception:
+                    # WITHOUT ROWID table
+                    pass
+            return self._shuffled_rows(conn, table, n)
+
+    def _bucket_expression(self, column: str, count: int, unit: str) -> str:
+        """
+        strftime on the time column, which may hold ISO text or Unix
+        seconds: months / years by format, other units by epoch arithmetic
+        (weeks start Monday).
+        """
+        moment = (
+            f"(CASE WHEN typeof({column}) IN ('integer', 'real') "
+            f"THEN datetime({column}, 'unixepoch') ELSE {column} END)"
+        )
+        if unit == "month":
+            return f"strftime('%Y-%m-01 00:00:00', {moment})"
+        if unit == "year":
+            return f"strftime('%Y-01-01 00:00:00', {moment})"
+        seconds = count * UNIT_SECONDS[unit]
+        # The epoch was a Thursday; shift week buckets to start on Monday
+        offset = 345600 if unit == "week" else 0
+        return (
+            f"datetime((CAST(strftime('%s', {moment}) AS INTEGER) - {offset}) / {seconds} "
+            f"* {seconds} + {offset}, 'unixepoch')"
+        )
+
+    # Case-insensitive for ASCII
+    LIKE_OPERATOR = "LIKE"
+
+    def _run_index_build(self, work):
+        """Index builds are writes like any other, on the writer thread."""
+        return self._run_write(work)
+
+    def _has_text_index(self, conn, table: str, columns: List[str]) -> bool:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": text_index_name(table, columns)},
+        ).first() is not None
+
+    def _build_text_index(self, conn, table: str, columns: List[str]) -> None:
+        """
+        External-content FTS5 table over the rowids of table, filled once
+        and kept in sync by triggers.
+        """
+        fts = text_index_name(table, columns)
+        cols = ", ".join(columns)
+        new = ", ".join(f"new.{c}" for c in columns)
+        old = ", ".join(f"old.{c}" for c in columns)
+        for statement in (
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='rowid')",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END",
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); END",
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END",
+        ):
+            conn.execute(text(statement))
+
+    def _fts_search(self, conn, table: str, columns: List[str], query: str, limit: int):
+        """bm25 ranking; every word of query is quoted so FTS5 syntax can't break the search."""
+        fts = text_index_name(table, columns)
+        terms = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        result = conn.execute(text(
+            f"SELECT t.*, -bm25({fts}) AS _rank FROM {fts} JOIN {table} AS t ON t.rowid = {fts}.rowid "
+            f"WHERE {fts} MATCH :terms ORDER BY _rank DESC LIMIT :limit"
+        ), {"terms": terms, "limit": limit})
+        return [dict(row._mapping) for row in result]
+
+    def _is_pgvector(self, conn, table: str, column: str) -> bool:
+        return False
+
+    def _vector_key(self, conn, table: str):
+        """rowid; WITHOUT ROWID tables fall back to a single-column primary key."""
+        try:
+            conn.execute(text(f"SELECT rowid FROM {table} LIMIT 0"))
+            return "rowid"
+        except Exception:
+            return super()._vector_key(conn, table)
+
+    def _vector_index_root(self) -> str:
+        """Vector indexes of a database file live next to it, in <file>.vectors/"""
+        path = make_url(self.db_url).database
+        if not path or path == ":memory:":
+            return super()._vector_index_root()
+        return f"{path}.vectors"
+
+    def _scan_ranges(self, conn, table: str, parts: int):
+        """rowid ranges; WITHOUT ROWID tables fall back to an integer primary key."""
+        try:
+            return "rowid", self._key_ranges(conn, table, "rowid", parts)
+        except Exception:
+            pass
+        key = self._integer_key(conn, table)
+        if key:
+            return key, self._key_ranges(conn, table, key, parts)
+        return None, [None]
+
+    def _upsert_chunk(self, conn, table, columns, conflict_keys, chunk):
+        """SQLite has no xmax, so count matching keys before the upsert"""
+        existing = self._count_existing(conn, table, conflict_keys, chunk)
+
+        values, params = self._values_clause(columns, chunk)
+        updates = [c for c in columns if c not in conflict_keys]
+        if updates:
+            action = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+        else:
+            action = "DO NOTHING"
+
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+            f"ON CONFLICT ({', '.join(conflict_keys)}) {action}"
+        )
+        conn.execute(text(query), params)
+        return len(chunk) - existing, existing
+
+    def _load_chunk(self, conn, table, chunk):
+        """
+        No COPY in SQLite: a raw executemany with positional parameters
+        inside the single load transaction skips SQLAlchemy's per-row work.
+        """
+        columns = list(chunk[0].keys())
+        placeholders = ", ".join("?" for _ in columns)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                [tuple(row[c] for c in columns) for row in chunk],
+            )
+        finally:
+            cursor.close()
+        return len(chunk)
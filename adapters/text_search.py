@@ -0,0 +1,60 @@
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][\w$]*$")
+_WORD = re.compile(r"[^\W\d_]{4,}")
+
+# Timed runs per method when comparing full-text search with LIKE
+COMPARE_RUNS = 3
+
+
+def check_columns(columns: List[str]) -> None:
+    if not columns:
+        raise ValueError("columns must name at least one column")
+    for name in columns:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid column name: {name!r}")
+
+
+def check_search_query(query: str) -> None:
+    """An empty query matches nothing anywhere and is a syntax error to FTS5."""
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("query must contain at least one search term")
+
+
+def text_index_name(table: str, columns: List[str]) -> str:
+    """Name of the full-text index (or FTS table) covering columns of table."""
+    return f"{table.replace('.', '_')}_{'_'.join(columns)}_fts"
+
+
+def sample_term(values: List[Any]) -> Optional[str]:
+    """A word (4+ letters) from sampled column values, to benchmark searches with."""
+    for value in values:
+        if isinstance(value, str):
+            match = _WORD.search(value)
+            if match:
+                return match.group(0)
+    return None
+
+
+def best_ms(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    """Fastest of COMPARE_RUNS runs of fn in milliseconds, and its last result."""
+    best, result = None, None
+    for _ in range(COMPARE_RUNS):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 2), result
+
+
+def speedup_report(term: str, fts_ms: float, like_ms: float, fts_hits: int, like_hits: int) -> Dict[str, Any]:
+    return {
+        "sample_query": term,
+        "fts_ms": fts_ms,
+        "like_ms": like_ms,
+        "speedup": round(like_ms / fts_ms, 1) if fts_ms else None,
+        "fts_hits": fts_hits,
+        "like_hits": like_hits,
+    }
@@ -0,0 +1,114 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Seconds per fixed-length bucket unit; months and years vary in length
+UNIT_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
+CALENDAR_UNITS = {"month", "year"}
+
+AGGREGATES = {"avg", "min", "max", "sum", "count"}
+
+_BUCKET = re.compile(r"^\s*(\d+)?\s*([a-z]+?)s?\s*$", re.IGNORECASE)
+_IDENTIFIER = re.compile(r"^[A-Za-z_][\w$]*$")
+
+
+def parse_bucket(bucket: str) -> Tuple[int, str]:
+    """'5 minutes' -> (5, 'minute'); 'hour' -> (1, 'hour')."""
+    match = _BUCKET.match(bucket or "")
+    unit = match.group(2).lower() if match else None
+    if unit not in UNIT_SECONDS and unit not in CALENDAR_UNITS:
+        raise ValueError(
+            f"Invalid bucket: {bucket!r}. Use '<n> <unit>' with unit one of "
+            f"{', '.join([*UNIT_SECONDS, *sorted(CALENDAR_UNITS)])}"
+        )
+    count = int(match.group(1) or 1)
+    if count < 1:
+        raise ValueError(f"Invalid bucket: {bucket!r}")
+    if unit in CALENDAR_UNITS and count != 1:
+        raise ValueError(f"{unit} buckets must be '1 {unit}'")
+    return count, unit
+
+
+def check_downsample_args(time_column: str, value_columns: List[str], agg: str) -> None:
+    for name in [time_column, *value_columns]:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid column name: {name!r}")
+    if not value_columns:
+        raise ValueError("value_columns must name at least one column")
+    if agg not in AGGREGATES:
+        raise ValueError(f"Invalid agg: {agg!r}. Use one of {', '.join(sorted(AGGREGATES))}")
+
+
+def _x(value: Any, index: int) -> float:
+    """Numeric x coordinate of a bucket (epoch seconds), or its index."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return float(index)
+
+
+def lttb(xs: List[float], ys: List[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of the series (first and last point always kept).
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:max(threshold, 0)]
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle corner
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def reduce_points(
+    rows: List[Dict[str, Any]],
+    value_column: str,
+    max_points: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    At most max_points rows, chosen by LTTB on value_column (rows where it
+    is null are dropped first). Rows are returned whole, in time order.
+    """
+    if not max_points or len(rows) <= max_points:
+        return rows
+    rows = [row for row in rows if row.get(value_column) is not None]
+    xs = [_x(row["bucket"], i) for i, row in enumerate(rows)]
+    ys = [float(row[value_column]) for row in rows]
+    return [rows[i] for i in lttb(xs, ys, max_points)]
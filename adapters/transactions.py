@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionRegistry:
+    """
+    Tracks open transactions by id.
+
+    Each entry holds a backend specific handle (a bound connection, a Mongo
+    session, ...). Entries that stay idle longer than idle_timeout seconds are
+    removed by a background reaper and passed to on_expire, which is expected
+    to roll them back and release the underlying connection.
+    """
+
+    def __init__(
+        self,
+        on_expire: Callable[[Any], None],
+        idle_timeout: float = 60.0,
+    ):
+        self.on_expire = on_expire
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def open(self, handle: Any) -> str:
+        tx_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[tx_id] = {
+                "handle": handle,
+                "last_used": time.monotonic(),
+                "lock": threading.Lock(),
+            }
+        self._ensure_reaper()
+        return tx_id
+
+    def resolve(self, tx_id: Optional[str]) -> str:
+        """Return tx_id, or the only open transaction when tx_id is None."""
+        if tx_id is not None:
+            return tx_id
+        with self._lock:
+            if len(self._entries) == 1:
+                return next(iter(self._entries))
+            if not self._entries:
+                raise ValueError("No open transaction")
+        raise ValueError("Several transactions are open; pass tx_id explicitly")
+
+    @contextmanager
+    def use(self, tx_id: str):
+        """Hold a transaction's handle for the duration of one operation."""
+        entry = self._get(tx_id)
+        with entry["lock"]:
+            try:
+                yield entry["handle"]
+            finally:
+                entry["last_used"] = time.monotonic()
+
+    def pop(self, tx_id: str) -> Any:
+        with self._lock:
+            entry = self._entries.pop(tx_id, None)
+        if entry is None:
+            raise ValueError(f"Unknown or expired transaction: {tx_id}")
+        # Wait for an in-flight operation on this transaction to finish
+        with entry["lock"]:
+            return entry["handle"]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def close_all(self) -> None:
+        self._stop.set()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self.on_expire(entry["handle"])
+
+    def _get(self, tx_id: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(tx_id)
+        if entry is None:
+            raise ValueError(f"Unknown or expired transaction: {tx_id}")
+        return entry
+
+    # ---------------- Idle reaping ----------------
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(
+            target=self._reap_loop, name="tx-reaper", daemon=True
+        )
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(self.idle_timeout / 4, 0.05)
+        while not self._stop.wait(interval):
+            self.reap_idle()
+
+    def reap_idle(self) -> None:
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for tx_id, entry in list(self._entries.items()):
+                idle = now - entry["last_used"] > self.idle_timeout
+                # Skip entries with an operation in flight
+                if idle and entry["lock"].acquire(blocking=False):
+                    del self._entries[tx_id]
+                    expired.append(entry)
+                    entry["lock"].release()
+        for entry in expired:
+            try:
+                self.on_expire(entry["handle"])
+            except Exception as e:
+                logger.warning("Error rolling back idle transaction: %s", e)
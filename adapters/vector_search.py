@@ -0,0 +1,444 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+METRICS = ("cosine", "dot", "l2")
+
+# Vectors scored per matrix product in exact scans
+SCAN_BLOCK_ROWS = 8192
+# Where indexes of server databases are kept (SQLite keeps them next to its file)
+INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_indexes")
+# Inverted lists: about sqrt(vectors), trained on this many points per list
+MAX_LISTS = 4096
+TRAIN_POINTS_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+# Lists scanned per search, as a fraction of all lists (at least MIN_PROBES)
+PROBE_FRACTION = 1 / 16
+MIN_PROBES = 8
+# Sampled rows whose vectors, perturbed, are the queries comparing an index
+# with an exact scan
+BENCHMARK_QUERIES = 5
+# Noise added to those vectors, relative to their per-dimension RMS
+BENCHMARK_NOISE = 0.1
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][\w$]*$")
+
+Block = Tuple[Any, List[Any]]
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("Vector search requires numpy (pip install numpy)")
+    return numpy
+
+
+def check_vector_args(column: str, metric: str, k: int) -> None:
+    if not _IDENTIFIER.match(column):
+        raise ValueError(f"Invalid column name: {column!r}")
+    if metric not in METRICS:
+        raise ValueError(f"Invalid metric: {metric!r}. Use one of {', '.join(METRICS)}")
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+
+def vector_index_name(table: str, column: str, metric: str) -> str:
+    return f"{table.replace('.', '_')}_{column}_{metric}_vec"
+
+
+def as_vector(value: Any):
+    """
+    float32 vector from a stored value: a float32 blob, a JSON array
+    string (also pgvector's text form) or a list; None if it is neither.
+    """
+    np = require_numpy()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.float32) if len(value) % 4 == 0 else None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if isinstance(value, (list, tuple)):
+        try:
+            return np.asarray(value, dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def vector_block(values: List[Any], payloads: List[Any], dim: Optional[int] = None) -> Block:
+    """
+    (matrix, payloads) for the values holding dim-long vectors; dim
+    defaults to the first vector's. Equal-length blobs are joined into the
+    matrix without a per-row conversion.
+    """
+    np = require_numpy()
+    if dim is not None and values and all(
+        isinstance(v, (bytes, memoryview)) and len(v) == dim * 4 for v in values
+    ):
+        return np.frombuffer(b"".join(values), dtype=np.float32).reshape(len(values), dim), payloads
+    rows, kept = [], []
+    for value, payload in zip(values, payloads):
+        vector = as_vector(value)
+        if vector is None or vector.ndim != 1 or not len(vector):
+            continue
+        if dim is None:
+            dim = len(vector)
+        if len(vector) == dim:
+            rows.append(vector)
+            kept.append(payload)
+    if not rows:
+        return np.empty((0, dim or 0), dtype=np.float32), []
+    return np.stack(rows), kept
+
+
+def collect_vectors(blocks: Iterable[Block]) -> Tuple[List[Any], Any]:
+    """Keys and one matrix of all blocks; blocks of another dimension than the first are skipped."""
+    np = require_numpy()
+    keys, matrices = [], []
+    for matrix, block_keys in blocks:
+        if block_keys and (not matrices or matrix.shape[1] == matrices[0].shape[1]):
+            keys.extend(block_keys)
+            matrices.append(matrix)
+    if not matrices:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return keys, np.concatenate(matrices)
+
+
+def similarity(matrix, query, metric: str):
+    """Higher is closer: cosine similarity, inner product, or negated L2 distance."""
+    np = require_numpy()
+    products = matrix @ query
+    if metric == "dot":
+        return products
+    squares = np.einsum("ij,ij->i", matrix, matrix)
+    if metric == "cosine":
+        norms = np.sqrt(squares) * np.linalg.norm(query)
+        return products / np.where(norms == 0, 1, norms)
+    return -np.sqrt(np.maximum(squares - 2 * products + query @ query, 0))
+
+
+class TopK:
+    """The k best-scoring payloads pushed so far, kept with argpartition."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores = None
+        self.payloads: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def push(self, scores, payloads: List[Any]) -> None:
+        np = require_numpy()
+        if not len(payloads):
+            return
+        if self.scores is not None:
+            scores = np.concatenate([self.scores, scores])
+            payloads = self.payloads + list(payloads)
+        if len(payloads) > self.k:
+            keep = np.argpartition(-scores, self.k - 1)[:self.k]
+            scores = scores[keep]
+            payloads = [payloads[i] for i in keep]
+        self.scores, self.payloads = scores, list(payloads)
+
+    def best(self) -> List[Tuple[float, Any]]:
+        if self.scores is None:
+            return []
+        order = require_numpy().argsort(-self.scores)
+        return [(float(self.scores[i]), self.payloads[i]) for i in order]
+
+
+# ---------------- IVF index ----------------
+
+def _normalized(matrix):
+    np = require_numpy()
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _nearest_centroids(matrix, centroids):
+    """Index of the closest centroid (L2) of every row, computed in blocks."""
+    np = require_numpy()
+    squares = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+        block = matrix[start:start + SCAN_BLOCK_ROWS]
+        out[start:start + len(block)] = np.argmin(squares - 2 * (block @ centroids.T), axis=1)
+    return out
+
+
+def _kmeans(sample, lists: int, spherical: bool, rng):
+    """Lloyd's iterations from random sample points; empty lists keep their centroid."""
+    np = require_numpy()
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = _nearest_centroids(sample, centroids)
+        counts = np.bincount(assign, minlength=lists)
+        filled = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(sample[np.argsort(assign, kind="stable")], starts, axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        if spherical:
+            centroids = _normalized(centroids)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inverted-file index of one column's vectors, stored as a directory of
+    .npy files: k-means centroids, and the vectors grouped by their nearest
+    centroid in one file that searches memory-map. A search scores the
+    centroids, then only the vectors of the closest lists. Cosine indexes
+    hold unit vectors, so they are searched by inner product.
+    """
+
+    def __init__(self, path: str, meta: Dict[str, Any], centroids, vectors, keys, offsets):
+        self.path = path
+        self.meta = meta
+        self.centroids = centroids
+        self.vectors = vectors
+        self.keys = keys
+        self.offsets = offsets
+
+    @property
+    def max_key(self) -> Any:
+        """Largest key indexed, for catching rows added since the build; None if keys are unordered."""
+        return self.meta.get("max_key")
+
+    @classmethod
+    def build(cls, path: str, keys: List[Any], matrix, metric: str, meta: Dict[str, Any]) -> "IVFIndex":
+        """
+        Train, write and return the index of matrix (one row per key). The
+        directory is written under a temporary name and swapped in whole.
+        Integer keys record max_key; callers may set it in meta otherwise.
+        """
+        np = require_numpy()
+        if not len(matrix):
+            raise ValueError("No vectors to index")
+        spherical = metric == "cosine"
+        if spherical:
+            matrix = _normalized(matrix)
+        lists = max(1, min(int(len(matrix) ** 0.5), MAX_LISTS))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(matrix), lists * TRAIN_POINTS_PER_LIST)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        centroids = _kmeans(sample, lists, spherical, rng)
+
+        assign = _nearest_centroids(matrix, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=lists))])
+        keys = np.asarray(keys)
+        if keys.dtype.kind in "iu":
+            keys = keys.astype(np.int64)
+            meta = {**meta, "max_key": int(keys.max())}
+        else:
+            keys = keys.astype(str)
+
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp)
+        try:
+            vectors = np.lib.format.open_memmap(
+                os.path.join(tmp, "vectors.npy"), mode="w+", dtype=np.float32, shape=matrix.shape
+            )
+            for start in range(0, len(order), SCAN_BLOCK_ROWS):
+                chunk = order[start:start + SCAN_BLOCK_ROWS]
+                vectors[start:start + len(chunk)] = matrix[chunk]
+            vectors.flush()
+            del vectors
+            np.save(os.path.join(tmp, "centroids.npy"), centroids)
+            np.save(os.path.join(tmp, "keys.npy"), keys[order])
+            np.save(os.path.join(tmp, "offsets.npy"), offsets)
+            meta = {
+                **meta,
+                "metric": metric,
+                "dim": int(matrix.shape[1]),
+                "vectors": int(len(matrix)),
+                "lists": lists,
+                "built_at": time.time(),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IVFIndex"]:
+        np = require_numpy()
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            return cls(
+                path,
+                meta,
+                np.load(os.path.join(path, "centroids.npy")),
+                np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "keys.npy")),
+                np.load(os.path.join(path, "offsets.npy")),
+            )
+        except FileNotFoundError:
+            return None
+
+    def probes(self) -> int:
+        lists = len(self.centroids)
+        return min(lists, max(MIN_PROBES, round(lists * PROBE_FRACTION)))
+
+    def search(self, query, k: int) -> List[Any]:
+        """Keys of the (approximately) k nearest vectors, best first."""
+        np = require_numpy()
+        metric = self.meta["metric"]
+        if metric == "cosine":
+            query = query / (np.linalg.norm(query) or 1)
+            metric = "dot"
+        lists = np.argsort(-similarity(self.centroids, query, metric))[:self.probes()]
+        spans = [(self.offsets[j], self.offsets[j + 1]) for j in lists]
+        positions = np.concatenate([np.arange(s, e) for s, e in spans if e > s] or [np.arange(0)])
+        positions.sort()
+        top = TopK(k)
+        top.push(similarity(self.vectors[positions], query, metric), positions.tolist())
+        return [self.keys[position].item() for _, position in top.best()]
+
+
+_loaded: Dict[str, Tuple[float, IVFIndex]] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_index(path: str) -> Optional[IVFIndex]:
+    """The index at path, reloaded when it has been rebuilt; None if there is none."""
+    try:
+        version = os.stat(os.path.join(path, "meta.json")).st_mtime
+    except FileNotFoundError:
+        return None
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+    index = IVFIndex.load(path)
+    if index is not None:
+        with _loaded_lock:
+            _loaded[path] = (version, index)
+    return index
+
+
+def index_path(root: str, table: str, column: str, metric: str) -> str:
+    return os.path.join(root, f"{vector_index_name(table, column, metric)}.ivf")
+
+
+# ---------------- Search ----------------
+
+def nearest(
+    query,
+    k: int,
+    metric: str,
+    column: str,
+    blocks: Callable[[Any], Iterator[Block]],
+    fetch: Optional[Callable[[List[Any]], Dict[Any, Dict[str, Any]]]],
+    index: Optional[IVFIndex] = None,
+    oversampling: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    The k rows closest to query, best first, with `_score` and without
+    the vector column.
+
+    blocks(after) yields (matrix, keys) over the rows matching the filters,
+    only keys above `after` unless it is None; fetch(keys) returns
+    {key: row} for those of keys that exist and match the filters. Without
+    fetch, blocks yields the rows themselves as payloads.
+
+    With an index, k * oversampling candidates come from the index and are
+    rescored from their current rows, then rows added since the build are
+    scanned exactly. If the filters leave fewer than k, the whole table is
+    scanned instead.
+    """
+    top = TopK(k)
+    rows: Dict[Any, Dict[str, Any]] = {}
+    if index is not None and fetch is not None:
+        rows = fetch(index.search(query, k * oversampling))
+        matrix, keys = vector_block([row.get(column) for row in rows.values()], list(rows), len(query))
+        if keys:
+            top.push(similarity(matrix, query, metric), keys)
+        if index.max_key is not None:
+            for matrix, keys in blocks(index.max_key):
+                top.push(similarity(matrix, query, metric), keys)
+    if index is None or fetch is None or len(top) < k:
+        top = TopK(k)
+        for matrix, payloads in blocks(None):
+            top.push(similarity(matrix, query, metric), payloads)
+
+    best = top.best()
+    if fetch is not None:
+        missing = [key for _, key in best if key not in rows]
+        if missing:
+            rows.update(fetch(missing))
+        best = [(score, rows[key]) for score, key in best if key in rows]
+    results = []
+    for score, row in best:
+        row = {name: value for name, value in row.items() if name != column}
+        row["_score"] = score
+        results.append(row)
+    return results
+
+
+def query_vector(embedding: Iterable[float]):
+    np = require_numpy()
+    query = np.asarray(list(embedding), dtype=np.float32)
+    if query.ndim != 1 or not len(query):
+        raise ValueError("embedding must be a non-empty list of numbers")
+    return query
+
+
+def _identity(row: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in row.items() if k != "_score"}, sort_keys=True, default=str)
+
+
+def perturbed(vectors: List[Any], noise: float = BENCHMARK_NOISE, seed: int = 0) -> List[Any]:
+    """
+    Copies of vectors with Gaussian noise added. A stored vector used as a
+    query is its own nearest neighbour and sits in the list it was assigned
+    to, which overstates recall; a nearby point does not.
+    """
+    np = require_numpy()
+    rng = np.random.default_rng(seed)
+    queries = []
+    for vector in vectors:
+        scale = noise * (float(np.linalg.norm(vector)) / len(vector) ** 0.5 or 1.0)
+        queries.append((vector + rng.normal(0, scale, len(vector))).astype(np.float32))
+    return queries
+
+
+def benchmark_index(search: Callable[[Any, bool], List[Dict[str, Any]]], queries: List[Any], k: int = 10) -> Dict[str, Any]:
+    """
+    Mean recall@k and latency of search(query, exact=False) against
+    search(query, exact=True) over perturbed copies of the sample vectors,
+    so no query is itself an indexed row.
+    """
+    recalls, index_ms, exact_ms = [], [], []
+    for query in perturbed(queries):
+        start = time.perf_counter()
+        approximate = search(query, False)
+        index_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        exact = search(query, True)
+        exact_ms.append((time.perf_counter() - start) * 1000)
+        if exact:
+            found = {_identity(row) for row in approximate}
+            recalls.append(sum(1 for row in exact if _identity(row) in found) / len(exact))
+    if not recalls:
+        return {}
+    return {
+        "benchmark_queries": len(recalls),
+        f"recall_at_{k}": round(sum(recalls) / len(recalls), 3),
+        "index_ms": round(sum(index_ms) / len(index_ms), 2),
+        "exact_ms": round(sum(exact_ms) / len(exact_ms), 2),
+    }
@@ -0,0 +1,89 @@
+"""
+Compare N separate update_rows calls with one apply_batch call carrying the
+same N updates, through the real stdio MCP server on a SQLite database.
+
+    python benchmarks/apply_batch.py --ops 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_database(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, qty INTEGER, note TEXT)")
+    conn.executemany(
+        "INSERT INTO items (id, qty, note) VALUES (?, ?, ?)",
+        [(n, 0, "") for n in range(rows)],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def timed_calls(session: ClientSession, ops: int) -> tuple:
+    start = time.perf_counter()
+    for n in range(ops):
+        result = await session.call_tool(
+            "update_rows",
+            {"table": "items", "filters": {"id": n}, "data": {"qty": 1, "note": "per-call"}},
+        )
+        assert not result.isError, result
+    per_call = time.perf_counter() - start
+
+    batch = [
+        {"op": "update", "table": "items", "filters": {"id": n},
+         "data": {"qty": 2, "note": "batched"}}
+        for n in range(ops)
+    ]
+    start = time.perf_counter()
+    result = await session.call_tool("apply_batch", {"operations": batch})
+    assert not result.isError, result
+    batched = time.perf_counter() - start
+    return per_call, batched
+
+
+async def run(ops: int, path: str) -> None:
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "mcp_server", "--db-type", "sqlite", "--db-url", f"sqlite:///{path}"],
+        cwd=ROOT,
+    )
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                per_call, batched = await timed_calls(session, ops)
+
+    conn = sqlite3.connect(path)
+    changed = conn.execute("SELECT COUNT(*) FROM items WHERE qty = 2").fetchone()[0]
+    conn.close()
+    assert changed == ops, f"apply_batch updated {changed} of {ops} rows"
+
+    print(f"{ops} x update_rows   {per_call * 1000:9.1f} ms  ({per_call * 1000 / ops:.2f} ms/op)")
+    print(f"1 x apply_batch     {batched * 1000:9.1f} ms  ({batched * 1000 / ops:.2f} ms/op)")
+    print(f"speedup: {per_call / batched:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        create_database(path, args.rows)
+        anyio.run(run, args.ops, path)
+
+
+if __name__ == "__main__":
+    main()
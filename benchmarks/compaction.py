@@ -0,0 +1,104 @@
+"""
+Size of the second LLM call with and without tool-result compaction, for a
+--rows row (50k by default) execute_query result.
+
+    python benchmarks/compaction.py --rows 50000
+    python benchmarks/compaction.py --rows 50000 --llm   # needs OPENAI_API_KEY, MODEL_NAME
+
+Without --llm only prompt tokens and compaction time are measured; with it
+the second call is sent to the model for both prompts and timed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_digest import estimate_tokens  # noqa: E402
+
+QUESTION = "What is the total amount per status for last month's orders?"
+
+
+def query_result(rows: int) -> str:
+    statuses = ("paid", "refunded", "pending", "shipped")
+    return json.dumps([
+        {
+            "id": n,
+            "customer": f"customer-{n % 3000}",
+            "amount": round((n * 37) % 10_000 / 100, 2),
+            "status": statuses[n % 4],
+            "created_at": f"2024-05-{n % 28 + 1:02d}T{n % 24:02d}:{n % 60:02d}:00",
+        }
+        for n in range(rows)
+    ])
+
+
+def second_call(content: str):
+    arguments = json.dumps({"query": "SELECT * FROM orders WHERE created_at >= '2024-05-01'"})
+    return [
+        {"role": "system", "content": "You are a database assistant with access to database tools."},
+        {"role": "user", "content": QUESTION},
+        {"role": "assistant", "content": "", "tool_calls": [{
+            "id": "call_0", "type": "function",
+            "function": {"name": "execute_query", "arguments": arguments},
+        }]},
+        {"role": "tool", "tool_call_id": "call_0", "content": content},
+    ]
+
+
+def prompt_tokens(messages) -> int:
+    return sum(
+        estimate_tokens(message["content"])
+        + (estimate_tokens(json.dumps(message["tool_calls"])) if "tool_calls" in message else 0)
+        for message in messages
+    )
+
+
+async def timed_completion(llm, model: str, messages) -> str:
+    start = time.perf_counter()
+    try:
+        await llm.chat.completions.create(model=model, messages=messages, max_tokens=200)
+    except Exception as e:
+        return f"failed after {time.perf_counter() - start:.2f}s ({type(e).__name__}: {e})"
+    return f"{time.perf_counter() - start:.2f}s"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--llm", action="store_true", help="also time the second call on the model")
+    args = parser.parse_args()
+
+    if not args.llm:
+        # The manager builds an OpenAI client it does not use here
+        os.environ.setdefault("OPENAI_API_KEY", "unused")
+    from mcp_client import MODEL_NAME, MCPClientManager
+
+    manager = MCPClientManager()
+    raw = query_result(args.rows)
+
+    start = time.perf_counter()
+    compacted = manager.compact_tool_result("execute_query", raw)
+    compact_ms = (time.perf_counter() - start) * 1000
+
+    before, after = second_call(raw), second_call(compacted)
+    print(f"result: {args.rows:,} rows, {len(raw) / 1e6:.1f} MB of JSON")
+    print(f"second-call prompt tokens  before {prompt_tokens(before):>10,}  "
+          f"after {prompt_tokens(after):>7,}")
+    print(f"compaction time            {compact_ms:8.1f} ms")
+
+    if args.llm:
+        import anyio
+
+        async def run():
+            print(f"second-call latency ({MODEL_NAME})")
+            print(f"  before: {await timed_completion(manager.llm, MODEL_NAME, before)}")
+            print(f"  after:  {await timed_completion(manager.llm, MODEL_NAME, after)}")
+
+        anyio.run(run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput of the export_query tool on a large SQLite table: builds a table
+of --rows rows (10M by default) and exports it to CSV, NDJSON and Parquet.
+
+    python benchmarks/export_sqlite.py --rows 10000000
+"""
+import argparse
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.sqlite_adapter import SQLiteAdapter  # noqa: E402
+from tests.fakes import FakeMCP  # noqa: E402
+from tools.file_tools import register_file_tools  # noqa: E402
+
+
+def create_table(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, user_id INTEGER, "
+        "kind TEXT, amount REAL, created_at TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO events VALUES (?, ?, ?, ?, ?)",
+        (
+            (n, n % 50_000, ("view", "click", "buy")[n % 3], n * 0.01,
+             f"2024-01-{n % 28 + 1:02d}T{n % 24:02d}:00:00")
+            for n in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--formats", default="csv,ndjson,parquet")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        create_table(db_path, args.rows)
+        print(f"built {args.rows:,} rows in {time.perf_counter() - start:.1f}s, "
+              f"peak RSS {peak_rss_mb():.0f} MB")
+
+        adapter = SQLiteAdapter(f"sqlite:///{db_path}")
+        adapter.connect()
+        tools = FakeMCP()
+        register_file_tools(tools, adapter)
+        try:
+            for file_format in args.formats.split(","):
+                out = os.path.join(tmp, f"events.{file_format}")
+                result = tools.tools["export_query"](
+                    "SELECT * FROM events", out, batch_size=args.batch_size
+                )
+                if isinstance(result, str):
+                    sys.exit(result)
+                print(
+                    f"{file_format:<8} {result['rows']:>11,} rows  {result['seconds']:7.1f}s  "
+                    f"{result['rows_per_second']:>9,} rows/s  "
+                    f"{result['bytes'] / 1e6:8.0f} MB  peak RSS {peak_rss_mb():.0f} MB"
+                )
+                os.remove(out)
+        finally:
+            adapter.close()
+
+
+if __name__ == "__main__":
+    main()
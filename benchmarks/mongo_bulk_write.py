@@ -0,0 +1,91 @@
+"""
+Compare MongoAdapter's per-call write path (one insert / update / delete
+call per row) with a single bulk_write of the same mixed operations. The
+ops touch disjoint documents, so ordered and unordered runs do the same work.
+
+    MONGO_URL=mongodb://localhost:27017/bench python benchmarks/mongo_bulk_write.py --rows 10000
+
+Needs a reachable MongoDB; the collection is dropped before and after.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.mongo_adapter import MongoAdapter  # noqa: E402
+
+COLLECTION = "bench_bulk_write"
+
+
+def seed_documents(rows: int):
+    """Documents present before each run: rows to update, then rows to delete."""
+    return [{"_id": n, "n": n, "tag": "seeded"} for n in range(2 * rows)]
+
+
+def mixed_ops(rows: int):
+    """
+    Inserts, updates and deletes of disjoint documents, so every op is
+    independent of the others and unordered execution does the same work
+    as the sequential per-call path.
+    """
+    ops = [
+        {"op": "insert", "document": {"_id": n, "n": n, "tag": "new"}}
+        for n in range(2 * rows, 3 * rows)
+    ]
+    ops += [
+        {"op": "update", "filter": {"_id": n}, "update": {"tag": "updated"}}
+        for n in range(rows)
+    ]
+    ops += [{"op": "delete", "filter": {"_id": n}} for n in range(rows, 2 * rows)]
+    return ops
+
+
+def per_call(adapter: MongoAdapter, ops) -> None:
+    for op in ops:
+        if op["op"] == "insert":
+            adapter.insert(COLLECTION, op["document"])
+        elif op["op"] == "update":
+            adapter.update(COLLECTION, op["filter"], op["update"])
+        else:
+            adapter.delete(COLLECTION, op["filter"])
+
+
+def timed(label: str, adapter: MongoAdapter, fn, ops, rows: int) -> float:
+    adapter.db[COLLECTION].drop()
+    adapter.db[COLLECTION].insert_many(seed_documents(rows))
+    start = time.perf_counter()
+    fn(ops)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.2f}s  {len(ops) / elapsed:10.0f} ops/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    url = os.environ.get("MONGO_URL")
+    if not url:
+        sys.exit("Set MONGO_URL to a MongoDB connection string")
+
+    adapter = MongoAdapter(url)
+    adapter.connect()
+    ops = mixed_ops(args.rows)
+    try:
+        rows = args.rows
+        slow = timed("per-call", adapter, lambda o: per_call(adapter, o), ops, rows)
+        ordered = timed("bulk_write ordered", adapter,
+                        lambda o: adapter.bulk_write(COLLECTION, o, ordered=True), ops, rows)
+        unordered = timed("bulk_write unordered", adapter,
+                          lambda o: adapter.bulk_write(COLLECTION, o, ordered=False), ops, rows)
+        print(f"speedup: ordered {slow / ordered:.1f}x, unordered {slow / unordered:.1f}x")
+    finally:
+        adapter.db[COLLECTION].drop()
+        adapter.close()
+
+
+if __name__ == "__main__":
+    main()
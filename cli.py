@@ -5,15 +5,94 @@ def parse_args():
 
     parser.add_argument(
         "--db-url",
-        required=True,
-        help="Database connection string"
+        help=(
+            "Database connection string. SQLite files are switched to WAL journaling "
+            "(persistent; -wal/-shm files appear next to the database) unless the URL "
+            "ends in ?performance=false"
+        )
     )
 
     parser.add_argument(
         "--db-type",
-        required=True,
-        choices=["postgres", "mysql", "sqlite", "mongo"],
+        choices=["postgres", "mysql", "sqlite", "mongo", "duckdb"],
         help="Database type"
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--config",
+        help="JSON/YAML file of named connections to serve instead of --db-type/--db-url"
+    )
+
+    parser.add_argument(
+        "--replica-url",
+        action="append",
+        default=[],
+        dest="replica_urls",
+        help="Read replica connection string (repeatable; SQL databases only)"
+    )
+
+    parser.add_argument(
+        "--replica-strategy",
+        choices=["round_robin", "least_connections"],
+        default="round_robin",
+        help="How reads are spread across replicas"
+    )
+
+    parser.add_argument(
+        "--max-replica-lag",
+        type=float,
+        default=30.0,
+        help="Seconds of replication lag after which a replica stops serving reads"
+    )
+
+    parser.add_argument(
+        "--attach",
+        action="append",
+        default=[],
+        metavar="NAME=URL",
+        help="Attach a SQLite, Postgres or DuckDB database under NAME (repeatable; DuckDB only)"
+    )
+
+    parser.add_argument(
+        "--attach-mode",
+        choices=["scan", "snapshot"],
+        default="scan",
+        help="Query attached databases in place, or copy their tables into DuckDB at startup"
+    )
+
+    parser.add_argument(
+        "--data-dir",
+        default=None,
+        help=(
+            "The only directory DuckDB queries may read files from or export to "
+            "(DuckDB only; without it queries reach no files)"
+        )
+    )
+
+    parser.add_argument(
+        "--query-timeout-ms",
+        type=int,
+        default=None,
+        help="Default per-call query deadline in milliseconds (a call's _meta.timeout_ms overrides it)"
+    )
+
+    parser.add_argument(
+        "--queue-timeout-ms",
+        type=int,
+        default=5000,
+        help="How long a call may wait for a free slot before failing with a busy error"
+    )
+
+    args = parser.parse_args()
+    if not args.config and not (args.db_url and args.db_type):
+        parser.error("either --config or both --db-type and --db-url are required")
+    if args.config and (args.db_url or args.db_type or args.replica_urls or args.attach or args.data_dir):
+        parser.error("--config cannot be combined with --db-type/--db-url/--replica-url/--attach/--data-dir")
+    attach = {}
+    for spec in args.attach:
+        name, sep, url = spec.partition("=")
+        if not sep or not name or not url:
+            parser.error(f"--attach expects NAME=URL, got {spec!r}")
+        attach[name] = url
+    args.attach = attach
+    return args
@@ -10,6 +10,7 @@ import SuccessMessage from "./components/SuccessMessage";
 function App() {
   const [query, setQuery] = useState("");
   const [response, setResponse] = useState(""); // 🔥 string instead of object
+  const [results, setResults] = useState([]); // tool results streamed as rows
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [success, setSuccess] = useState(null);
@@ -24,6 +25,7 @@ function App() {
     setError(null);
     setSuccess(null);
     setResponse(""); // reset previous response
+    setResults([]);
 
     try {
       const res = await fetch(
@@ -46,29 +48,76 @@ function App() {
 
       let buffer = "";
 
+      const handleEvent = (event, data) => {
+        switch (event) {
+          case "tool_started":
+            setResults((prev) => [
+              ...prev,
+              { id: data.id, tool: data.tool, columns: [], rows: [], finished: false },
+            ]);
+            break;
+          case "rows":
+            // Columnar chunk: one array of values per column
+            setResults((prev) =>
+              prev.map((r) => {
+                if (r.id !== data.id) return r;
+                const count = data.values[0]?.length ?? 0;
+                const rows = [];
+                for (let i = 0; i < count; i++) {
+                  const row = {};
+                  data.columns.forEach((col, c) => {
+                    row[col] = data.values[c][i];
+                  });
+                  rows.push(row);
+                }
+                return { ...r, columns: data.columns, rows: [...r.rows, ...rows] };
+              }),
+            );
+            break;
+          case "tool_finished":
+            setResults((prev) =>
+              prev.map((r) => (r.id === data.id ? { ...r, ...data, finished: true } : r)),
+            );
+            break;
+          case "token":
+            // 🔥 Append token safely (no batching issue)
+            setResponse((prev) => prev + data.text);
+            break;
+          default:
+            break;
+        }
+      };
+
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
         buffer += decoder.decode(value, { stream: true });
 
-        const lines = buffer.split("\n");
-        buffer = lines.pop(); // preserve incomplete line
-
-        for (let line of lines) {
-          if (line.startsWith("data:")) {
-            const data = line.replace(/^data:\s?/, "");
-
-            if (data === "[DONE]") {
-              setLoading(false);
-              return;
+        // Events are separated by a blank line
+        const events = buffer.split("\n\n");
+        buffer = events.pop(); // preserve incomplete event
+
+        for (let block of events) {
+          let event = "message";
+          let data = "";
+          for (let line of block.split("\n")) {
+            if (line.startsWith("event:")) {
+              event = line.replace(/^event:\s?/, "");
+            } else if (line.startsWith("data:")) {
+              data += line.replace(/^data:\s?/, "");
             }
+          }
 
-            // 🔥 Append token safely (no batching issue)
-            setResponse((prev) => prev + data);
+          if (event === "done") {
+            setLoading(false);
+            return;
           }
+          if (!data) continue;
+          handleEvent(event, JSON.parse(data));
         }
       }
+      setLoading(false);
     } catch (err) {
       setError(err.message);
       setLoading(false);
@@ -103,6 +152,7 @@ function App() {
     setIsConnected(false);
     setDbInfo(null);
     setResponse("");
+    setResults([]);
     setError(null);
     setQuery("");
   };
@@ -157,7 +207,9 @@ function App() {
             </div>
           )}
 
-          {response && <ResponseDisplay response={response} />}
+          {(response || results.length > 0) && (
+            <ResponseDisplay response={response} results={results} />
+          )}
         </div>
       </div>
     </div>
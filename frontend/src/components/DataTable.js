@@ -1,12 +1,12 @@
 import React from 'react';
 import './DataTable.css';
 
-function DataTable({ data }) {
+function DataTable({ data, columns: columnNames, totalRows }) {
   if (!data || !Array.isArray(data) || data.length === 0) {
     return <div className="no-data">No data to display</div>;
   }
 
-  const columns = Object.keys(data[0]);
+  const columns = columnNames?.length ? columnNames : Object.keys(data[0]);
 
   return (
     <div className="table-wrapper">
@@ -34,6 +34,7 @@ function DataTable({ data }) {
       </table>
       <div className="table-footer">
         Showing {data.length} row{data.length !== 1 ? 's' : ''}
+        {totalRows > data.length && ` of ${totalRows}`}
       </div>
     </div>
   );
@@ -3,7 +3,7 @@ import { Table, List, Code } from "lucide-react";
 import "./ResponseDisplay.css";
 import DataTable from "./DataTable";
 
-function ResponseDisplay({ response }) {
+function ResponseDisplay({ response, results = [] }) {
   const [viewMode, setViewMode] = useState("auto");
 
   const detectResponseType = () => {
@@ -62,6 +62,20 @@ function ResponseDisplay({ response }) {
     return JSON.stringify(response, null, 2);
   };
 
+  // Tables streamed straight from tool results, ahead of the LLM's summary
+  const renderResults = () =>
+    results
+      .filter((r) => r.rows.length > 0)
+      .map((r) => (
+        <div key={r.id} className="tool-result">
+          <div className="tool-result-header">
+            {r.tool}
+            {r.finished && ` · ${r.elapsed_ms} ms`}
+          </div>
+          <DataTable data={r.rows} columns={r.columns} totalRows={r.row_count} />
+        </div>
+      ));
+
   const renderContent = () => {
     if (responseType === "table") {
       const data = getDisplayData();
@@ -110,7 +124,10 @@ function ResponseDisplay({ response }) {
           </button>
         </div>
       </div>
-      <div className="response-content">{renderContent()}</div>
+      <div className="response-content">
+        {renderResults()}
+        {response && renderContent()}
+      </div>
     </div>
   );
 }
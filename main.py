@@ -1,8 +1,10 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from mcp_client import MCPClientManager
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
+from typing import Optional
+from result_digest import parse_rows
 
 client_manager = MCPClientManager()
 
@@ -63,13 +65,28 @@ async def connect(request: ConnectRequest):
 from fastapi.responses import StreamingResponse
 
 @app.post("/query/stream")
-async def stream_query(payload: QueryRequest):
+async def stream_query(payload: QueryRequest, request: Request):
     return StreamingResponse(
-        client_manager.process_query_stream(payload.query),
+        client_manager.process_query_stream(
+            payload.query, is_disconnected=request.is_disconnected
+        ),
         media_type="text/event-stream",
     )
 
 
+@app.get("/api/results/{handle}")
+async def get_result(handle: str, offset: int = 0, limit: Optional[int] = None):
+    """Full result of a tool call the LLM only saw as a digest (rows paged by offset / limit)."""
+    entry = client_manager.results.get(handle)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    rows = parse_rows(entry["content"])
+    if rows is None:
+        return {"tool": entry["tool"], "content": entry["content"]}
+    end = None if limit is None else offset + limit
+    return {"tool": entry["tool"], "row_count": len(rows), "rows": rows[offset:end]}
+
+
 @app.get("/api/status")
 async def status():
     return {"connected": client_manager.connected}
\ No newline at end of file
@@ -1,13 +1,27 @@
+import hashlib
 import json
 import os
 import sys
+import time
+import uuid
+from collections import deque
 from contextlib import AsyncExitStack
 from typing import Optional
+import anyio
 from fastapi import HTTPException
 from openai import AsyncOpenAI
-from mcp import ClientSession, StdioServerParameters
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from dotenv import load_dotenv
+from plan_cache import PlanCache
+from result_digest import (
+    ResultStore,
+    columnar_chunks,
+    digest_result,
+    estimate_tokens,
+    parse_rows,
+    schema_digest,
+)
 
 
 
@@ -15,13 +29,98 @@ load_dotenv(override=True)
 
 # MODEL_NAME = "gpt-4o-mini"
 MODEL_NAME = os.getenv("MODEL_NAME")
+# Per tool call deadline sent to the server as _meta.timeout_ms
+TOOL_TIMEOUT_MS = int(os.getenv("TOOL_TIMEOUT_MS", "30000"))
+DISCONNECT_POLL_SECONDS = 0.5
+# Tool results above this many tokens reach the LLM as a digest
+TOOL_RESULT_TOKEN_BUDGET = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "4000"))
+# Set to an embedding model name to let the plan cache match reworded questions
+PLAN_CACHE_EMBEDDING_MODEL = os.getenv("PLAN_CACHE_EMBEDDING_MODEL")
+# How often the schema is re-hashed to detect changes that invalidate cached plans
+SCHEMA_CHECK_SECONDS = float(os.getenv("SCHEMA_CHECK_SECONDS", "60"))
+# Tabular tool results go to the frontend in `rows` events of this many rows
+ROWS_CHUNK_SIZE = int(os.getenv("ROWS_CHUNK_SIZE", "500"))
+# Rows streamed per tool call; the rest is fetched through /api/results/{handle}
+STREAM_MAX_ROWS = int(os.getenv("STREAM_MAX_ROWS", "10000"))
+# Schema overview put in the system prompt, trimmed to this many tokens
+SCHEMA_DIGEST_TOKEN_BUDGET = int(os.getenv("SCHEMA_DIGEST_TOKEN_BUDGET", "1500"))
+# Tool rounds per question, and the wall-clock budget for all of them; past
+# either limit the model must answer with what it has
+MAX_TOOL_STEPS = int(os.getenv("MAX_TOOL_STEPS", "4"))
+QUERY_BUDGET_SECONDS = float(os.getenv("QUERY_BUDGET_SECONDS", "60"))
+
+SYSTEM_PROMPT = """You are a database assistant with access to database tools.
+Always use tools when required."""
+
+SCHEMA_PROMPT = """
+Database schema (row counts are estimates):
+{digest}
+
+Query these tables directly; only call schema tools for details not shown above."""
+
+
+# _meta key tagging each tool call, so its JSON-RPC id can be looked up
+CALL_ID_META = "call_id"
+
+
+class RequestTracker:
+    """
+    Wraps the session's write stream and records the JSON-RPC id of every
+    outgoing request whose _meta carries CALL_ID_META, so a tool call can
+    be cancelled by id without reading the session's internal counter.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.request_ids = {}
+
+    async def send(self, message):
+        request = message.message.root
+        if isinstance(request, types.JSONRPCRequest):
+            call_id = ((request.params or {}).get("_meta") or {}).get(CALL_ID_META)
+            if call_id is not None:
+                self.request_ids[call_id] = request.id
+        await self._stream.send(message)
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._stream.__aexit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def tool_failed(result, content: str) -> bool:
+    """Tools fail either with an MCP error or with an "Error ..." text result."""
+    return bool(result.isError) or content.startswith("Error")
+
+
+def sse_event(event: str, data) -> str:
+    """One server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 class MCPClientManager:
-    def __init__(self):
+    def __init__(self, plan_cache: Optional[PlanCache] = None):
         self.exit_stack: Optional[AsyncExitStack] = None
         self.session: Optional[ClientSession] = None
+        self.requests: Optional[RequestTracker] = None
         self.llm = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.connected = False
+        # Full results of compacted tool calls, served to the frontend by handle
+        self.results = ResultStore()
+        # Tool calls chosen for earlier questions, replayed instead of asking the LLM
+        self.plans = plan_cache or PlanCache(
+            embed=self._embed if PLAN_CACHE_EMBEDDING_MODEL else None
+        )
+        self.connection_key: Optional[str] = None
+        self._schema_version: Optional[str] = None
+        self._schema_checked_at = 0.0
+        # (schema version, digest text) for the system prompt
+        self._schema_digest = None
 
     async def connect(self, db_type: str, db_url: str):
         if self.connected:
@@ -33,7 +132,8 @@ class MCPClientManager:
             "postgres": "postgres",
             "postgresql": "postgres",
             "mysql": "mysql",
-            "sqlite": "sqlite"
+            "sqlite": "sqlite",
+            "duckdb": "duckdb"
         }
         
         mapped_db_type = db_type_mapping.get(db_type.lower(), db_type)
@@ -56,12 +156,19 @@ class MCPClientManager:
                 stdio_client(server_params)
             )
 
+            self.requests = RequestTracker(write)
             self.session = await self.exit_stack.enter_async_context(
-                ClientSession(stdio, write)
+                ClientSession(stdio, self.requests)
             )
 
             await self.session.initialize()
             self.connected = True
+            # Identifies the database in plan cache keys without keeping the URL around
+            self.connection_key = hashlib.sha256(
+                f"{mapped_db_type}|{db_url}".encode()
+            ).hexdigest()[:16]
+            self._schema_version = None
+            self._schema_digest = None
             
             tools = (await self.session.list_tools()).tools
             return {"status": "connected", "tools": [t.name for t in tools]}
@@ -74,6 +181,7 @@ class MCPClientManager:
                     pass
                 self.exit_stack = None
             self.session = None
+            self.requests = None
             self.connected = False
             raise Exception(f"Failed to connect to database: {str(e)}")
 
@@ -87,8 +195,136 @@ class MCPClientManager:
             finally:
                 self.exit_stack = None
                 self.session = None
+                self.requests = None
                 self.connected = False
 
+    async def call_tool(self, name: str, arguments: dict, is_disconnected=None, timeout_ms=None):
+        """
+        Call a tool with a deadline (timeout_ms, default TOOL_TIMEOUT_MS). If
+        the caller is cancelled, or is_disconnected() reports the HTTP client
+        gone, the server is told to cancel the request, which interrupts the
+        running database query.
+        Returns None when the call was abandoned because of a disconnect.
+        """
+        if is_disconnected is None:
+            return await self._call_tool(name, arguments, timeout_ms)
+
+        result = None
+        async with anyio.create_task_group() as tg:
+
+            async def call():
+                nonlocal result
+                result = await self._call_tool(name, arguments, timeout_ms)
+                tg.cancel_scope.cancel()
+
+            async def watch():
+                while not await is_disconnected():
+                    await anyio.sleep(DISCONNECT_POLL_SECONDS)
+                tg.cancel_scope.cancel()
+
+            tg.start_soon(call)
+            tg.start_soon(watch)
+        return result
+
+    async def _call_tool(self, name: str, arguments: dict, timeout_ms=None):
+        call_id = uuid.uuid4().hex
+        requests = self.requests
+        try:
+            return await self.session.call_tool(
+                name,
+                arguments,
+                meta={"timeout_ms": timeout_ms or TOOL_TIMEOUT_MS, CALL_ID_META: call_id},
+            )
+        except anyio.get_cancelled_exc_class():
+            # Not recorded means the request never went out: nothing to cancel
+            request_id = requests.request_ids.get(call_id)
+            if request_id is not None:
+                with anyio.CancelScope(shield=True):
+                    await self._send_cancelled(request_id, "client disconnected")
+            raise
+        finally:
+            requests.request_ids.pop(call_id, None)
+
+    async def _send_cancelled(self, request_id: int, reason: str):
+        try:
+            await self.session.send_notification(
+                types.ClientNotification(
+                    types.CancelledNotification(
+                        params=types.CancelledNotificationParams(
+                            requestId=request_id, reason=reason
+                        )
+                    )
+                )
+            )
+        except Exception as e:
+            print(f"Warning: Could not cancel tool call {request_id}: {e}")
+
+    async def _embed(self, text: str):
+        response = await self.llm.embeddings.create(
+            model=PLAN_CACHE_EMBEDDING_MODEL, input=text
+        )
+        return response.data[0].embedding
+
+    async def schema_version(self) -> Optional[str]:
+        """
+        Hash of the database schema, recomputed at most every
+        SCHEMA_CHECK_SECONDS. When it changes, plans cached for the old
+        schema are dropped. None if the schema cannot be read.
+        """
+        now = time.monotonic()
+        if self._schema_version is not None and now - self._schema_checked_at < SCHEMA_CHECK_SECONDS:
+            return self._schema_version
+        try:
+            result = await self._call_tool("get_database_schema", {})
+        except Exception as e:
+            print(f"Warning: Could not read schema for the plan cache: {e}")
+            return None
+        if result.isError:
+            return None
+        schema = "".join(getattr(item, "text", str(item)) for item in result.content)
+        version = hashlib.sha256(schema.encode()).hexdigest()[:16]
+        if version != self._schema_version:
+            self.plans.invalidate(self.connection_key, keep_version=version)
+        self._schema_version, self._schema_checked_at = version, now
+        return version
+
+    async def schema_digest(self, schema_version: Optional[str]) -> Optional[str]:
+        """
+        Compact schema overview for the system prompt, rebuilt only when the
+        schema version changes. None if the overview cannot be read.
+        """
+        if schema_version is not None and self._schema_digest and self._schema_digest[0] == schema_version:
+            return self._schema_digest[1]
+        try:
+            result = await self._call_tool("get_schema_overview", {})
+        except Exception as e:
+            print(f"Warning: Could not read schema overview: {e}")
+            return None
+        if result.isError:
+            return None
+        try:
+            overview = json.loads("".join(getattr(item, "text", "") for item in result.content))
+        except ValueError:
+            return None
+        digest = schema_digest(overview, SCHEMA_DIGEST_TOKEN_BUDGET)
+        self._schema_digest = (schema_version, digest)
+        return digest
+
+    def compact_tool_result(self, tool_name: str, content: str, handle: Optional[str] = None) -> str:
+        """
+        Keep large tool results out of the LLM context: past the token budget
+        the result is stored under a handle (or the one given, if already
+        stored) and replaced by a digest.
+        """
+        tokens = estimate_tokens(content)
+        if tokens <= TOOL_RESULT_TOKEN_BUDGET:
+            return content
+        handle = handle or self.results.put(tool_name, content)
+        digest = digest_result(
+            content, handle=handle, tokens=tokens, token_budget=TOOL_RESULT_TOKEN_BUDGET
+        )
+        return json.dumps(digest, default=str)
+
     # async def process_query(self, query: str):
     #     if not self.connected or not self.session:
     #         raise HTTPException(status_code=400, detail="Not connected to database")
@@ -190,13 +426,19 @@ class MCPClientManager:
 
     #     return {"response": msg.content}
 
-    async def process_query_stream(self, query: str):
+    async def process_query_stream(self, query: str, is_disconnected=None):
         if not self.connected or not self.session:
             raise HTTPException(status_code=400, detail="Not connected to database")
 
-        system_prompt = """You are a database assistant with access to database tools.
-                        Always use tools when required."""
-        
+        started = time.monotonic()
+        schema_version = await self.schema_version()
+
+        # The schema up front spares the model a round of list_tables / get_table_columns
+        system_prompt = SYSTEM_PROMPT
+        digest = await self.schema_digest(schema_version)
+        if digest:
+            system_prompt += SCHEMA_PROMPT.format(digest=digest)
+
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": query}
@@ -220,95 +462,150 @@ class MCPClientManager:
                 }
             )
 
-        # STEP 1: Stream first LLM response (may contain tool calls)
-        stream = await self.llm.chat.completions.create(
-            model=MODEL_NAME,
-            messages=messages,
-            tools=tools_for_llm,
-            tool_choice="auto",
-            stream=True,
-        )
-
-        tool_calls = {}
-        assistant_content = ""
-
-        async for chunk in stream:
-            delta = chunk.choices[0].delta
-
-            # If content token
-            if delta.content:
-                assistant_content += delta.content
-                yield f"data: {delta.content}\n\n"
-
-            # If tool call streaming
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    idx = tool_call.index
-                    if idx not in tool_calls:
-                        tool_calls[idx] = {
-                            "id": tool_call.id,
-                            "name": tool_call.function.name,
-                            "arguments": ""
-                        }
-
-                    if tool_call.function.arguments:
-                        tool_calls[idx]["arguments"] += tool_call.function.arguments
-
-        # If no tool calls → done
-        if not tool_calls:
-            yield "data: [DONE]\n\n"
-            return
-
-        # STEP 2: Execute Tools
-        messages.append({
-            "role": "assistant",
-            "content": assistant_content,
-            "tool_calls": [
-                {
-                    "id": tc["id"],
-                    "type": "function",
-                    "function": {
-                        "name": tc["name"],
-                        "arguments": tc["arguments"]
-                    }
+        # A question asked before against the same schema reuses its tool calls
+        cached_plan = None
+        if schema_version is not None:
+            cached_plan = await self.plans.lookup(query, self.connection_key, schema_version)
+
+        # Row chunks not yet sent; interleaved with the LLM's tokens
+        pending_rows = deque()
+
+        step = 0
+        while True:
+            step += 1
+            tool_calls = {}
+            assistant_content = ""
+            remaining = QUERY_BUDGET_SECONDS - (time.monotonic() - started)
+
+            if step == 1 and cached_plan:
+                tool_calls = {
+                    i: {"id": f"cached_{i}", "name": call["name"], "arguments": call["arguments"]}
+                    for i, call in enumerate(cached_plan)
                 }
-                for tc in tool_calls.values()
-            ]
-        })
-
-        for tc in tool_calls.values():
-            tool_args = json.loads(tc["arguments"])
-            result = await self.session.call_tool(tc["name"], tool_args)
-
-            content_str = ""
-            if isinstance(result.content, list):
-                for item in result.content:
-                    if hasattr(item, "text"):
-                        content_str += item.text
-                    else:
-                        content_str += str(item)
             else:
-                content_str = str(result.content)
-
+                # Out of steps or time: no more tools, the model answers now
+                may_use_tools = step <= MAX_TOOL_STEPS and remaining > 0
+                options = (
+                    {"tools": tools_for_llm, "tool_choice": "auto"} if may_use_tools else {}
+                )
+                stream = await self.llm.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=messages,
+                    stream=True,
+                    **options,
+                )
+
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta
+
+                    # If content token
+                    if delta.content:
+                        assistant_content += delta.content
+                        yield sse_event("token", {"text": delta.content})
+
+                    # If tool call streaming
+                    if delta.tool_calls:
+                        for tool_call in delta.tool_calls:
+                            idx = tool_call.index
+                            if idx not in tool_calls:
+                                tool_calls[idx] = {
+                                    "id": tool_call.id,
+                                    "name": tool_call.function.name,
+                                    "arguments": ""
+                                }
+
+                            if tool_call.function.arguments:
+                                tool_calls[idx]["arguments"] += tool_call.function.arguments
+
+                    if pending_rows:
+                        yield pending_rows.popleft()
+
+            # No tool calls → the model has answered
+            if not tool_calls:
+                break
+
+            # Execute Tools
             messages.append({
-                "role": "tool",
-                "tool_call_id": tc["id"],
-                "content": content_str
+                "role": "assistant",
+                "content": assistant_content,
+                "tool_calls": [
+                    {
+                        "id": tc["id"],
+                        "type": "function",
+                        "function": {
+                            "name": tc["name"],
+                            "arguments": tc["arguments"]
+                        }
+                    }
+                    for tc in tool_calls.values()
+                ]
             })
 
-        # STEP 3: Stream final answer
-        final_stream = await self.llm.chat.completions.create(
-            model=MODEL_NAME,
-            messages=messages,
-            stream=True,
-        )
-
-        async for chunk in final_stream:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                yield f"data: {delta.content}\n\n"
-
-        yield "data: [DONE]\n\n"
-
-
-# client_manager = MCPClientManager()
\ No newline at end of file
+            all_succeeded = True
+            for tc in tool_calls.values():
+                tool_args = json.loads(tc["arguments"])
+                yield sse_event("tool_started", {"id": tc["id"], "tool": tc["name"], "arguments": tool_args})
+                start = time.monotonic()
+                # Tools may not run past the question's budget (but get at least a second)
+                remaining_ms = (QUERY_BUDGET_SECONDS - (start - started)) * 1000
+                timeout_ms = int(max(min(TOOL_TIMEOUT_MS, remaining_ms), 1000))
+                result = await self.call_tool(tc["name"], tool_args, is_disconnected, timeout_ms)
+                if result is None:
+                    # Client went away; the query was cancelled on the server
+                    return
+                elapsed_ms = round((time.monotonic() - start) * 1000, 1)
+
+                content_str = ""
+                if isinstance(result.content, list):
+                    for item in result.content:
+                        if hasattr(item, "text"):
+                            content_str += item.text
+                        else:
+                            content_str += str(item)
+                else:
+                    content_str = str(result.content)
+                if tool_failed(result, content_str):
+                    all_succeeded = False
+
+                # Tabular results go straight to the UI instead of through the LLM
+                rows = None if result.isError else parse_rows(content_str)
+                handle = None
+                if rows is not None and len(rows) > STREAM_MAX_ROWS:
+                    handle = self.results.put(tc["name"], content_str)
+                if rows:
+                    chunks = [
+                        sse_event("rows", {"id": tc["id"], **chunk})
+                        for chunk in columnar_chunks(rows[:STREAM_MAX_ROWS], ROWS_CHUNK_SIZE)
+                    ]
+                    yield chunks[0]
+                    pending_rows.extend(chunks[1:])
+                yield sse_event("tool_finished", {
+                    "id": tc["id"],
+                    "tool": tc["name"],
+                    "elapsed_ms": elapsed_ms,
+                    "is_error": bool(result.isError),
+                    "row_count": None if rows is None else len(rows),
+                    "truncated": handle is not None,
+                    "result_handle": handle,
+                })
+
+                content_str = self.compact_tool_result(tc["name"], content_str, handle)
+
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tc["id"],
+                    "content": content_str
+                })
+
+            # Only a plan whose calls all worked is worth replaying
+            if step == 1 and not cached_plan and schema_version is not None and all_succeeded:
+                await self.plans.store(
+                    query, self.connection_key, schema_version, list(tool_calls.values())
+                )
+
+        while pending_rows:
+            yield pending_rows.popleft()
+        yield sse_event("done", {"steps": step, "elapsed_ms": round((time.monotonic() - started) * 1000, 1)})
+
+
+# client_manager = MCPClientManager()
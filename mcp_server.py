@@ -7,12 +7,30 @@ from tools.pagination_tools import register_pagination_tools
 from tools.write_tools import register_write_tools
 from tools.transaction_tools import register_transaction_tools
 from tools.utility_tools import register_utility_tools
-from adapters.base import create_adapter
+from tools.file_tools import register_file_tools
+from tools.timeseries_tools import register_timeseries_tools
+from tools.search_tools import register_search_tools
+from tools.vector_tools import register_vector_tools
+from tools.connection_tools import register_connection_tools
+from tools.execution import CancellableTools
+from adapters.registry import AdapterProxy, ConnectionRegistry
 from cli import parse_args
 
 
-def create_server(adapter):
-    mcp = FastMCP("mcp-db-server")
+def create_server(connections, query_timeout_ms=None, queue_timeout_ms=5000):
+    server = FastMCP("mcp-db-server")
+    # Tools run off the event loop against the connection they name,
+    # bounded per workload, and stop their query when cancelled
+    mcp = CancellableTools(
+        server,
+        connections,
+        default_timeout_ms=query_timeout_ms,
+        queue_timeout=queue_timeout_ms / 1000,
+    )
+    # Resolves to the adapter of the calling tool's connection
+    adapter = AdapterProxy()
+
+    register_connection_tools(mcp, connections)
 
     register_system_tools(mcp, adapter)
     register_schema_tools(mcp, adapter)
@@ -22,19 +40,44 @@ def create_server(adapter):
     register_write_tools(mcp, adapter)
     register_transaction_tools(mcp, adapter)
     register_utility_tools(mcp, adapter)
+    register_file_tools(mcp, adapter)
+    register_timeseries_tools(mcp, adapter)
+    register_search_tools(mcp, adapter)
+    register_vector_tools(mcp, adapter)
 
-    return mcp
+    return server
 
 
 
 def mcp_server():
     args = parse_args()
 
-    adapter = create_adapter(args.db_type, args.db_url)
+    if args.config:
+        connections = ConnectionRegistry.from_file(args.config)
+    else:
+        connections = ConnectionRegistry.single(
+            args.db_type,
+            args.db_url,
+            replica_urls=args.replica_urls,
+            replica_strategy=args.replica_strategy,
+            max_replica_lag=args.max_replica_lag,
+            attach=args.attach,
+            attach_mode=args.attach_mode,
+            data_dir=args.data_dir,
+        )
+        # Fail at startup, as before, if the single database is unreachable
+        connections.acquire(None)
+        connections.release(None)
 
-    mcp = create_server(adapter)
+    mcp = create_server(
+        connections,
+        query_timeout_ms=args.query_timeout_ms,
+        queue_timeout_ms=args.queue_timeout_ms,
+    )
 
     # INFO :- THIS ACTUALLY STARTS THE MCP SERVER
+    # stdout carries the MCP protocol: server modules report through
+    # logging (stderr) and must never print()
     mcp.run()
 
 
@@ -0,0 +1,156 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Only plans made of these tools are cached: replaying them cannot change data
+CACHEABLE_TOOLS = {
+    "execute_query",
+    "aggregate_data",
+    "fetch_large_result",
+    "explain_query",
+    "downsample",
+    "search_text",
+    "get_database_schema",
+    "get_schema_overview",
+    "list_tables",
+    "get_table_columns",
+    "get_table_indexes",
+    "get_table_stats",
+    "sample_rows",
+}
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+def _numbers(text: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r"\d+(?:\.\d+)?", text))
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class PlanCache:
+    """
+    Tool calls the LLM chose for a question, replayed when the question comes
+    back so the tool-selection round trip can be skipped.
+
+    Entries are keyed by (connection, schema version, normalized question),
+    so a schema change makes old plans unreachable; invalidate() also drops
+    them. Least recently used entries are evicted past max_entries, and
+    entries expire after ttl_seconds.
+
+    With an embed function, a miss on the exact text falls back to the most
+    similar cached question of the same connection and schema version,
+    above similarity_threshold. Both questions must mention the same numbers,
+    so "top 10 customers" never replays the plan for "top 20 customers".
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        embed: Optional[Embedder] = None,
+        similarity_threshold: float = 0.92,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    async def lookup(
+        self, question: str, connection: str, schema_version: str
+    ) -> Optional[List[Dict[str, str]]]:
+        self._expire()
+        normalized = normalize_question(question)
+        key = (connection, schema_version, normalized)
+        entry = self._entries.get(key)
+
+        if entry is None and self.embed is not None:
+            key, entry = await self._most_similar(normalized, connection, schema_version)
+            if entry is not None:
+                self.similar_hits += 1
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry["tool_calls"]
+
+    async def store(
+        self,
+        question: str,
+        connection: str,
+        schema_version: str,
+        tool_calls: List[Dict[str, str]],
+    ) -> bool:
+        """Cache a plan; returns False when it isn't cacheable (writes, no tool calls)."""
+        if not tool_calls or any(call["name"] not in CACHEABLE_TOOLS for call in tool_calls):
+            return False
+        normalized = normalize_question(question)
+        embedding = await self.embed(normalized) if self.embed is not None else None
+        self._entries[(connection, schema_version, normalized)] = {
+            "tool_calls": [{"name": c["name"], "arguments": c["arguments"]} for c in tool_calls],
+            "embedding": embedding,
+            "numbers": _numbers(normalized),
+            "stored_at": time.monotonic(),
+        }
+        self._entries.move_to_end((connection, schema_version, normalized))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, connection: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """Drop a connection's plans (all plans without one), except those of keep_version."""
+        stale = [
+            key for key in self._entries
+            if (connection is None or key[0] == connection) and key[1] != keep_version
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+        }
+
+    async def _most_similar(self, normalized: str, connection: str, schema_version: str):
+        candidates = [
+            (key, entry) for key, entry in self._entries.items()
+            if key[0] == connection and key[1] == schema_version
+            and entry["embedding"] is not None
+            and entry["numbers"] == _numbers(normalized)
+        ]
+        if not candidates:
+            return None, None
+        embedding = await self.embed(normalized)
+        best_key, best_entry, best_score = None, None, self.similarity_threshold
+        for key, entry in candidates:
+            score = _cosine(embedding, entry["embedding"])
+            if score >= best_score:
+                best_key, best_entry, best_score = key, entry, score
+        return best_key, best_entry
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [k for k, e in self._entries.items() if e["stored_at"] < cutoff]:
+            del self._entries[key]
@@ -0,0 +1,217 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+# Tokenizing huge strings costs more than it saves; estimate those from length
+TOKENIZE_MAX_CHARS = 200_000
+CHARS_PER_TOKEN = 4
+
+DIGEST_HEAD_ROWS = 5
+DIGEST_TAIL_ROWS = 5
+# Longer cell values are cut in the digest's sample rows
+DIGEST_MAX_CELL_CHARS = 200
+# Distinct values are counted up to this many per column
+DISTINCT_CAP = 1000
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, else ~4 characters per token."""
+    global _encoding
+    if len(text) <= TOKENIZE_MAX_CHARS:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoding = False
+        if _encoding:
+            return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parse_rows(text: str) -> Optional[List[Dict[str, Any]]]:
+    """The result as a list of row dicts, or None if it isn't tabular JSON."""
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(value, dict) and isinstance(value.get("result"), list):
+        # Non-object tool outputs are wrapped as {"result": ...}
+        value = value["result"]
+    if isinstance(value, list) and all(isinstance(row, dict) for row in value):
+        return value
+    return None
+
+
+def columnar_chunks(rows: List[Dict[str, Any]], chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """
+    Rows as column-oriented chunks: {"columns": [...], "values": [[column 0
+    values], ...], "offset": n}. Columns are the union of all rows' keys, so
+    every chunk has the same columns; missing values are None.
+    """
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        yield {
+            "columns": columns,
+            "values": [[row.get(col) for row in chunk] for col in columns],
+            "offset": offset,
+        }
+
+
+def _trim(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > DIGEST_MAX_CELL_CHARS:
+        return value[:DIGEST_MAX_CELL_CHARS] + "..."
+    if isinstance(value, (dict, list)):
+        return _trim(json.dumps(value, default=str))
+    return value
+
+
+def column_summary(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per column: value types, null count, min / max and distinct count (capped)."""
+    columns: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        for name, value in row.items():
+            col = columns.setdefault(
+                name, {"types": set(), "nulls": 0, "min": None, "max": None, "distinct": set()}
+            )
+            if value is None:
+                col["nulls"] += 1
+                continue
+            col["types"].add(type(value).__name__)
+            if isinstance(value, (dict, list)):
+                continue
+            if len(col["distinct"]) <= DISTINCT_CAP:
+                col["distinct"].add(value)
+            try:
+                if col["min"] is None or value < col["min"]:
+                    col["min"] = value
+                if col["max"] is None or value > col["max"]:
+                    col["max"] = value
+            except TypeError:
+                # Mixed types in one column: min / max are meaningless
+                pass
+
+    summary = {}
+    for name, col in columns.items():
+        distinct = len(col["distinct"])
+        summary[name] = {
+            "types": sorted(col["types"]),
+            "nulls": col["nulls"],
+            "min": _trim(col["min"]),
+            "max": _trim(col["max"]),
+            "distinct": f">{DISTINCT_CAP}" if distinct > DISTINCT_CAP else distinct,
+        }
+    return summary
+
+
+def digest_result(text: str, *, handle: str, tokens: int, token_budget: int) -> Dict[str, Any]:
+    """
+    Compact stand-in for a tool result that is too large for the LLM context.
+    Tabular results get row count, column summary and head / tail rows;
+    anything else keeps its beginning and end, within the token budget.
+    """
+    digest: Dict[str, Any] = {
+        "compacted": True,
+        "result_handle": handle,
+        "original_tokens": tokens,
+        "note": (
+            "The full result was too large to include; this is a summary. "
+            "The user can see the full result. Answer from the summary, or run "
+            "a narrower / aggregated query if exact values are needed."
+        ),
+    }
+    rows = parse_rows(text)
+    if rows is None:
+        keep = max(token_budget * CHARS_PER_TOKEN // 2, 200)
+        digest["text_head"] = text[:keep]
+        digest["text_tail"] = text[-keep:]
+        return digest
+
+    head = rows[:DIGEST_HEAD_ROWS]
+    tail = rows[max(DIGEST_HEAD_ROWS, len(rows) - DIGEST_TAIL_ROWS):]
+    digest.update(
+        row_count=len(rows),
+        columns=column_summary(rows),
+        head=[{k: _trim(v) for k, v in row.items()} for row in head],
+        tail=[{k: _trim(v) for k, v in row.items()} for row in tail],
+    )
+    return digest
+
+
+class ResultStore:
+    """Full tool results behind their digest handles; least recently used are dropped first."""
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def put(self, tool_name: str, content: str) -> str:
+        handle = uuid.uuid4().hex
+        self._results[handle] = {
+            "tool": tool_name,
+            "content": content,
+            "created_at": time.time(),
+        }
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[Dict[str, Any]]:
+        entry = self._results.get(handle)
+        if entry is not None:
+            self._results.move_to_end(handle)
+        return entry
+
+
+def _table_line(table: str, entry: Dict[str, Any], max_columns: Optional[int]) -> str:
+    keys = set(entry.get("primary_key") or [])
+    columns = list(entry.get("columns", {}).items())
+    if max_columns is not None and len(columns) > max_columns:
+        # Key columns survive the cut; joins need them most
+        kept = [c for c in columns if c[0] in keys]
+        kept += [c for c in columns if c[0] not in keys][:max(max_columns - len(kept), 0)]
+        hidden = len(columns) - len(kept)
+        columns = kept
+    else:
+        hidden = 0
+    parts = [
+        f"{name} {col_type or '?'}{' PK' if name in keys else ''}"
+        for name, col_type in columns
+    ]
+    if hidden:
+        parts.append(f"+{hidden} more")
+    rows = entry.get("estimated_rows")
+    size = f" (~{rows} rows)" if rows is not None else ""
+    line = f"{table}{size}: {', '.join(parts)}"
+    for fk in entry.get("foreign_keys") or []:
+        line += f"; FK {fk}"
+    return line
+
+
+def schema_digest(overview: Dict[str, Any], token_budget: int) -> str:
+    """
+    One line per table (row estimate, typed columns, keys) for the system
+    prompt. Over the token budget, wide tables lose non-key columns first,
+    then trailing tables are left out and only counted.
+    """
+    tables = overview.get("tables", {})
+    total = overview.get("total_tables", len(tables))
+    for max_columns in (None, 20, 10, 5, 0):
+        lines = [_table_line(t, e, max_columns) for t, e in tables.items()]
+        if estimate_tokens("\n".join(lines)) <= token_budget:
+            break
+
+    kept, used = [], 0
+    for line in lines:
+        used += estimate_tokens(line) + 1
+        if used > token_budget:
+            break
+        kept.append(line)
+    if total > len(kept):
+        kept.append(f"... {total - len(kept)} more tables (use list_tables / get_table_columns)")
+    return "\n".join(kept)
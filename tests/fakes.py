@@ -0,0 +1,11 @@
+class FakeMCP:
+    """Collects the functions registered with @mcp.tool(...) by name."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, name=None, description=None, **kwargs):
+        def register(fn):
+            self.tools[name or fn.__name__] = fn
+            return fn
+        return register
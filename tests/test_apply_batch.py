@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+from adapters.sqlite_adapter import SQLiteAdapter
+
+FAILING_BATCH = [
+    {"op": "insert", "table": "items", "data": {"id": 1, "name": "a"}},
+    {"op": "insert", "table": "items", "data": {"id": 1, "name": "duplicate"}},
+]
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    path = tmp_path / "batch.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+
+    adapter = SQLiteAdapter(f"sqlite:///{path}")
+    adapter.connect()
+    yield adapter
+    adapter.close()
+
+
+def count_rows(adapter) -> int:
+    return adapter.execute_query("SELECT COUNT(*) AS n FROM items")[0]["n"]
+
+
+def test_failed_batch_is_rolled_back(adapter):
+    with pytest.raises(ValueError, match="^Batch rolled back"):
+        adapter.apply_batch(FAILING_BATCH)
+    assert count_rows(adapter) == 0
+
+
+def test_failed_batch_in_transaction_leaves_it_to_the_caller(adapter):
+    tx_id = adapter.begin_transaction()
+    with pytest.raises(ValueError, match=f"inside transaction {tx_id}, which is still open"):
+        adapter.apply_batch(FAILING_BATCH, tx_id=tx_id)
+    adapter.rollback(tx_id)
+    assert count_rows(adapter) == 0
@@ -0,0 +1,82 @@
+import threading
+
+import anyio
+
+from tests.fakes import FakeMCP
+from tools.execution import CancellableTools
+
+
+class FakeAdapter:
+    def concurrency_limits(self):
+        return {"read": 1, "write": 1, "schema": 1}
+
+
+class FakeConnections:
+    def __init__(self):
+        self.adapter = FakeAdapter()
+        self.in_use = 0
+
+    def resolve(self, name):
+        return name or "default"
+
+    def acquire(self, name):
+        self.in_use += 1
+        return self.adapter
+
+    def release(self, name):
+        self.in_use -= 1
+
+
+async def wait_for(condition, timeout=5.0):
+    with anyio.fail_after(timeout):
+        while not condition():
+            await anyio.sleep(0.01)
+
+
+def test_cancelled_call_keeps_slot_until_thread_finishes():
+    connections = FakeConnections()
+    tools = CancellableTools(FakeMCP(), connections)
+    started, finish = threading.Event(), threading.Event()
+
+    @tools.tool(name="slow_query")
+    def slow_query():
+        # Ignores the interrupt, like a driver that cannot be cancelled
+        started.set()
+        finish.wait()
+        return "done"
+
+    call = tools.mcp.tools["slow_query"]
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(call)
+            await wait_for(started.is_set)
+            tg.cancel_scope.cancel()
+
+        pool = tools._admission["default"].pools["read"]
+        assert pool.active == 1
+        assert connections.in_use == 1
+
+        finish.set()
+        await wait_for(lambda: pool.active == 0 and connections.in_use == 0)
+
+    try:
+        anyio.run(main)
+    finally:
+        finish.set()
+
+
+def test_finished_call_releases_slot():
+    connections = FakeConnections()
+    tools = CancellableTools(FakeMCP(), connections)
+
+    @tools.tool(name="quick_query")
+    def quick_query():
+        return "done"
+
+    async def main():
+        assert await tools.mcp.tools["quick_query"]() == "done"
+        assert tools._admission["default"].pools["read"].active == 0
+        assert connections.in_use == 0
+
+    anyio.run(main)
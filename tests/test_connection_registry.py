@@ -0,0 +1,124 @@
+import inspect
+import threading
+import time
+from typing import Optional
+
+import anyio
+
+from adapters.registry import ConnectionRegistry
+from tests.fakes import FakeMCP
+from tools.execution import CancellableTools
+
+IDLE = 0.05
+
+
+def registry(tmp_path, idle_timeout=IDLE):
+    """Two SQLite connections; the reaper may run alongside close_idle() calls."""
+    return ConnectionRegistry(
+        {
+            "main": {"db_type": "sqlite", "db_url": f"sqlite:///{tmp_path / 'main.db'}"},
+            "other": {"db_type": "sqlite", "db_url": f"sqlite:///{tmp_path / 'other.db'}"},
+        },
+        default="main",
+        idle_timeout=idle_timeout,
+    )
+
+
+def is_open(connections, name="main"):
+    return next(c["open"] for c in connections.describe() if c["name"] == name)
+
+
+def test_idle_connection_is_closed(tmp_path):
+    connections = registry(tmp_path)
+    connections.acquire("main")
+    connections.release("main")
+    time.sleep(IDLE * 2)
+    connections.close_idle()
+    assert not is_open(connections)
+    connections.close_all()
+
+
+def test_reaper_skips_connections_with_calls_in_flight(tmp_path):
+    connections = registry(tmp_path)
+    try:
+        connections.acquire("main")
+        time.sleep(IDLE * 4)
+        connections.close_idle()
+        assert is_open(connections)
+
+        connections.release("main")
+        deadline = time.monotonic() + 5
+        while is_open(connections) and time.monotonic() < deadline:
+            time.sleep(IDLE)
+        # The background reaper closed it once the call was done
+        assert not is_open(connections)
+    finally:
+        connections.close_all()
+
+
+def test_reaper_skips_connections_with_open_transactions(tmp_path):
+    connections = registry(tmp_path)
+    try:
+        adapter = connections.acquire("main")
+        tx_id = adapter.begin_transaction()
+        connections.release("main")
+        time.sleep(IDLE * 2)
+        connections.close_idle()
+        assert is_open(connections)
+
+        adapter.rollback(tx_id)
+        connections.close_idle()
+        assert not is_open(connections)
+    finally:
+        connections.close_all()
+
+
+def test_tools_gain_a_connection_argument(tmp_path):
+    tools = CancellableTools(FakeMCP(), registry(tmp_path, idle_timeout=None))
+
+    @tools.tool(name="count_rows")
+    def count_rows(table: str, limit: int = 10):
+        return table
+
+    parameter = inspect.signature(tools.mcp.tools["count_rows"]).parameters["connection"]
+    assert parameter.kind is inspect.Parameter.KEYWORD_ONLY
+    assert parameter.default is None
+    assert tools.mcp.tools["count_rows"].__annotations__["connection"] == Optional[str]
+
+
+def test_abandoned_call_keeps_its_connection_until_the_worker_ends(tmp_path):
+    connections = registry(tmp_path)
+    tools = CancellableTools(FakeMCP(), connections)
+    started, finish = threading.Event(), threading.Event()
+
+    @tools.tool(name="slow_query")
+    def slow_query():
+        started.set()
+        finish.wait()
+        return "done"
+
+    def in_use():
+        return next(c["calls_in_flight"] for c in connections.describe() if c["name"] == "other")
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(lambda: tools.mcp.tools["slow_query"](connection="other"))
+            await anyio.to_thread.run_sync(started.wait)
+            tg.cancel_scope.cancel()
+
+        # Cancelled, but the worker is still running on the adapter
+        assert in_use() == 1
+        await anyio.sleep(IDLE * 2)
+        connections.close_idle()
+        assert is_open(connections, "other")
+
+        finish.set()
+        with anyio.fail_after(5):
+            while in_use():
+                await anyio.sleep(0.01)
+
+    try:
+        anyio.run(main)
+    finally:
+        finish.set()
+        connections.close_all()
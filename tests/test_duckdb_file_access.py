@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("duckdb")
+
+from adapters.duckdb_adapter import DuckDBAdapter  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    (path / "rows.csv").write_text("id,name\n1,a\n2,b\n")
+    (tmp_path / "secret.txt").write_text("outside\n")
+    return path
+
+
+@pytest.fixture
+def adapter(tmp_path, data_dir):
+    adapter = DuckDBAdapter(f"duckdb:///{tmp_path / 'db.duckdb'}", data_dir=str(data_dir))
+    adapter.connect()
+    yield adapter
+    adapter.close()
+
+
+def test_queries_cannot_read_server_files(adapter, tmp_path):
+    with pytest.raises(Exception, match="Permission"):
+        adapter.execute_query("SELECT * FROM read_text('/etc/hostname')")
+    with pytest.raises(Exception, match="Permission"):
+        adapter.execute_query(f"SELECT * FROM read_csv('{tmp_path / 'secret.txt'}')")
+
+
+def test_parent_directory_paths_are_rejected(adapter, data_dir):
+    with pytest.raises(ValueError, match=r"\.\."):
+        adapter.execute_query(f"SELECT * FROM read_text('{data_dir}/../secret.txt')")
+
+
+def test_files_under_data_dir_stay_readable(adapter, data_dir):
+    rows = adapter.execute_query(f"SELECT id, name FROM '{data_dir / 'rows.csv'}' ORDER BY id")
+    assert [r["name"] for r in rows] == ["a", "b"]
+
+
+def test_settings_cannot_be_changed_back(adapter):
+    with pytest.raises(Exception):
+        adapter.conn.execute("SET enable_external_access = true")
+
+
+def test_no_data_dir_means_no_file_access_or_copy(tmp_path, data_dir):
+    adapter = DuckDBAdapter("duckdb:///:memory:")
+    adapter.connect()
+    try:
+        assert not adapter.capabilities()["copy_to_file"]
+        with pytest.raises(Exception, match="Permission"):
+            adapter.execute_query(f"SELECT * FROM '{data_dir / 'rows.csv'}'")
+    finally:
+        adapter.close()
+
+
+def test_table_stats_come_from_the_catalog(adapter):
+    cursor = adapter.conn.cursor()
+    cursor.execute("CREATE TABLE t AS SELECT range AS id FROM range(1000)")
+    cursor.close()
+    stats = adapter.get_table_stats("t")
+    assert stats["estimated_rows"] == 1000
+    assert stats["source"] == "duckdb_tables"
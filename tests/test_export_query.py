@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from tests.fakes import FakeMCP
+from tools.file_tools import register_file_tools
+
+
+class FailingAdapter:
+    """Yields one batch and then fails, like a query dying mid-export."""
+
+    def capabilities(self):
+        return {}
+
+    def fetch_many(self, query, batch_size=10000):
+        yield [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        raise RuntimeError("connection lost")
+
+
+class RowsAdapter:
+    def capabilities(self):
+        return {}
+
+    def fetch_many(self, query, batch_size=10000):
+        yield [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+
+
+def export_query(adapter):
+    mcp = FakeMCP()
+    register_file_tools(mcp, adapter)
+    return mcp.tools["export_query"]
+
+
+@pytest.mark.parametrize("name", ["out.csv", "out.ndjson"])
+def test_failed_export_leaves_no_file(tmp_path, name):
+    path = str(tmp_path / name)
+    result = export_query(FailingAdapter())("SELECT * FROM t", path)
+    assert result.startswith("Error exporting")
+    assert "connection lost" in result
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_overwrite_keeps_previous_file(tmp_path):
+    path = tmp_path / "out.csv"
+    path.write_text("id\n42\n")
+    result = export_query(FailingAdapter())("SELECT * FROM t", str(path), overwrite=True)
+    assert result.startswith("Error exporting")
+    assert path.read_text() == "id\n42\n"
+    assert os.listdir(tmp_path) == ["out.csv"]
+
+
+def test_export_renames_into_place(tmp_path):
+    path = tmp_path / "out.ndjson"
+    result = export_query(RowsAdapter())("SELECT * FROM t", str(path))
+    assert result["rows"] == 2
+    assert result["bytes"] == path.stat().st_size
+    assert os.listdir(tmp_path) == ["out.ndjson"]
@@ -0,0 +1,34 @@
+import bson
+from pymongo import UpdateOne
+
+from adapters.mongo_adapter import build_write_op, chunk_write_ops, estimate_op_size
+
+
+def pipeline_op(n: int) -> dict:
+    return {
+        "op": "update",
+        "filter": {"_id": n},
+        "update": [{"$set": {"payload": "x" * 1000}}],
+    }
+
+
+def test_estimate_counts_pipeline_updates():
+    op = pipeline_op(1)
+    assert estimate_op_size(op) >= len(bson.encode({"update": op["update"]}))
+
+
+def test_chunks_stay_under_byte_limit():
+    ops = [pipeline_op(n) for n in range(50)]
+    max_bytes = 10_000
+    chunks = list(chunk_write_ops(ops, max_bytes=max_bytes))
+    assert len(chunks) > 1
+    assert sum(len(chunk) for _, chunk in chunks) == len(ops)
+    for _, chunk in chunks:
+        encoded = sum(len(bson.encode({"op": op})) for op in chunk)
+        assert encoded <= max_bytes
+
+
+def test_pipeline_update_passes_through():
+    model = build_write_op(pipeline_op(1))
+    assert isinstance(model, UpdateOne)
+    assert model._doc == [{"$set": {"payload": "x" * 1000}}]
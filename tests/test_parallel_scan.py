@@ -0,0 +1,90 @@
+import threading
+import time
+
+import anyio
+import bson
+
+from adapters.mongo_adapter import id_type_bracket
+from adapters.parallel_scan import merge_partitions
+from tests.fakes import FakeMCP
+from tools.execution import CancellableTools
+
+
+class FakeAdapter:
+    def concurrency_limits(self):
+        return {"read": 3, "write": 1, "schema": 1}
+
+
+class FakeConnections:
+    adapter = FakeAdapter()
+
+    def resolve(self, name):
+        return name or "default"
+
+    def acquire(self, name):
+        return self.adapter
+
+    def release(self, name):
+        pass
+
+
+def counting_partitions(count):
+    """Partitions that record how many of them run at once."""
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def partition():
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        yield [{"n": 1}]
+
+    return [partition] * count, running
+
+
+def test_scan_workers_only_use_free_admission_slots():
+    tools = CancellableTools(FakeMCP(), FakeConnections())
+    started, finish = threading.Event(), threading.Event()
+    partitions, running = counting_partitions(6)
+
+    @tools.tool(name="slow_query")
+    def slow_query():
+        started.set()
+        finish.wait()
+
+    @tools.tool(name="scan")
+    def scan():
+        return sum(len(batch) for batch in merge_partitions(partitions, parallelism=6))
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(tools.mcp.tools["slow_query"])
+            await anyio.to_thread.run_sync(started.wait)
+            # 3 read slots: one for slow_query, one for the scan, one free
+            assert await tools.mcp.tools["scan"]() == 6
+            assert running["max"] == 2
+            pool = tools._admission["default"].pools["read"]
+            assert pool.active == 1
+            finish.set()
+        assert pool.active == 0
+
+    try:
+        anyio.run(main)
+    finally:
+        finish.set()
+
+
+def test_scan_outside_a_tool_call_uses_full_parallelism():
+    partitions, running = counting_partitions(4)
+    assert sum(len(batch) for batch in merge_partitions(partitions, parallelism=4)) == 4
+    assert running["max"] == 4
+
+
+def test_id_type_brackets():
+    assert id_type_bracket(1) == id_type_bracket(2.5) == id_type_bracket(bson.Int64(3))
+    assert id_type_bracket("a") != id_type_bracket(1)
+    assert id_type_bracket(True) != id_type_bracket(1)
+    assert id_type_bracket(bson.ObjectId()) != id_type_bracket("a")
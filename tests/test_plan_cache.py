@@ -0,0 +1,102 @@
+import re
+
+import anyio
+
+from plan_cache import PlanCache
+
+PLAN = [{"name": "execute_query", "arguments": '{"query": "SELECT 1"}'}]
+VOCABULARY = ["top", "customers", "by", "revenue", "show", "me", "the", "orders", "count", "list"]
+
+
+class WordEmbedder:
+    """Bag-of-words over a fixed vocabulary; digits carry no weight."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, text):
+        self.calls += 1
+        words = re.findall(r"[a-z]+", text)
+        return [float(words.count(word)) for word in VOCABULARY]
+
+
+def test_similar_question_hits_above_threshold():
+    cache = PlanCache(embed=WordEmbedder(), similarity_threshold=0.8)
+
+    async def main():
+        await cache.store("Top 10 customers by revenue", "main", "v1", PLAN)
+        assert await cache.lookup("Show top 10 customers by revenue?", "main", "v1") == PLAN
+        # Unrelated wording stays below the threshold
+        assert await cache.lookup("list 10 orders count", "main", "v1") is None
+
+    anyio.run(main)
+    assert cache.stats() == {"entries": 1, "hits": 1, "similar_hits": 1, "misses": 1}
+
+
+def test_different_numbers_never_match():
+    embedder = WordEmbedder()
+    cache = PlanCache(embed=embedder, similarity_threshold=0.5)
+
+    async def main():
+        await cache.store("Top 10 customers by revenue", "main", "v1", PLAN)
+        calls = embedder.calls
+        assert await cache.lookup("top 20 customers by revenue", "main", "v1") is None
+        # Filtered out before any embedding is computed
+        assert embedder.calls == calls
+
+    anyio.run(main)
+    assert cache.similar_hits == 0 and cache.misses == 1
+
+
+def test_similar_lookup_stays_within_connection_and_version():
+    cache = PlanCache(embed=WordEmbedder(), similarity_threshold=0.8)
+
+    async def main():
+        await cache.store("top customers by revenue", "main", "v1", PLAN)
+        assert await cache.lookup("show top customers by revenue", "other", "v1") is None
+        assert await cache.lookup("show top customers by revenue", "main", "v2") is None
+
+    anyio.run(main)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PlanCache(max_entries=2)
+
+    async def main():
+        await cache.store("first", "main", "v1", PLAN)
+        await cache.store("second", "main", "v1", PLAN)
+        # Touching "first" leaves "second" as the least recently used
+        assert await cache.lookup("first", "main", "v1") == PLAN
+        await cache.store("third", "main", "v1", PLAN)
+        assert await cache.lookup("second", "main", "v1") is None
+        assert await cache.lookup("first", "main", "v1") == PLAN
+        assert await cache.lookup("third", "main", "v1") == PLAN
+
+    anyio.run(main)
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_keeps_the_current_version():
+    cache = PlanCache()
+
+    async def main():
+        await cache.store("old plan", "main", "v1", PLAN)
+        await cache.store("new plan", "main", "v2", PLAN)
+        await cache.store("other plan", "other", "v1", PLAN)
+
+        assert cache.invalidate("main", keep_version="v2") == 1
+        assert await cache.lookup("old plan", "main", "v1") is None
+        assert await cache.lookup("new plan", "main", "v2") == PLAN
+        assert await cache.lookup("other plan", "other", "v1") == PLAN
+
+        assert cache.invalidate() == 2
+        assert cache.stats()["entries"] == 0
+
+    anyio.run(main)
+
+
+def test_write_plans_are_not_cached():
+    cache = PlanCache()
+    write = [{"name": "insert_rows", "arguments": "{}"}]
+    assert not anyio.run(cache.store, "add a row", "main", "v1", write)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import anyio
+import pytest
+
+from mcp_client import MCPClientManager
+from plan_cache import PlanCache
+
+QUESTION = "How many orders are there?"
+
+
+def chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeLLM:
+    """Asks for one execute_query call, then answers."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            call = SimpleNamespace(
+                index=0,
+                id="call_0",
+                function=SimpleNamespace(name="execute_query", arguments='{"query": "SELECT 1"}'),
+            )
+            chunks = [chunk(tool_calls=[call])]
+        else:
+            chunks = [chunk(content="There are 3 orders.")]
+
+        async def stream():
+            for item in chunks:
+                yield item
+
+        return stream()
+
+
+def manager_with_result(monkeypatch, text, is_error=False):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    manager = MCPClientManager(plan_cache=PlanCache())
+    manager.connected = True
+    manager.connection_key = "conn"
+    manager.llm = FakeLLM()
+
+    async def list_tools():
+        return SimpleNamespace(tools=[])
+
+    async def schema_version():
+        return "v1"
+
+    async def schema_digest(version):
+        return None
+
+    async def call_tool(name, arguments, is_disconnected=None, timeout_ms=None):
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], isError=is_error)
+
+    manager.session = SimpleNamespace(list_tools=list_tools)
+    manager.schema_version = schema_version
+    manager.schema_digest = schema_digest
+    manager.call_tool = call_tool
+    return manager
+
+
+def cached_plan(manager):
+    async def run():
+        async for _ in manager.process_query_stream(QUESTION):
+            pass
+        return await manager.plans.lookup(QUESTION, "conn", "v1")
+
+    return anyio.run(run)
+
+
+def test_successful_plan_is_stored(monkeypatch):
+    manager = manager_with_result(monkeypatch, '[{"count": 3}]')
+    plan = cached_plan(manager)
+    assert plan == [{"name": "execute_query", "arguments": '{"query": "SELECT 1"}'}]
+
+
+@pytest.mark.parametrize("text, is_error", [
+    ("Error executing query: no such table: orders", False),
+    ("no such table: orders", True),
+])
+def test_failed_plan_is_not_stored(monkeypatch, text, is_error):
+    manager = manager_with_result(monkeypatch, text, is_error)
+    assert cached_plan(manager) is None
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from adapters.replicas import ReplicaRouter
+
+
+@pytest.fixture
+def engines(tmp_path):
+    engines = {
+        f"sqlite:///{tmp_path / name}.db": create_engine(f"sqlite:///{tmp_path / name}.db")
+        for name in ("a", "b")
+    }
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def router(engines, lags=None, **options):
+    """A router whose probe reports lags[url] (0 by default) for each replica."""
+    lags = lags if lags is not None else {}
+    by_engine = {id(engine): url for url, engine in engines.items()}
+
+    def probe(conn):
+        return lags.get(by_engine[id(conn.engine)], 0.0)
+
+    router = ReplicaRouter(engines, probe, lag_check_interval=0.0, **options)
+    settle(router)
+    return router
+
+
+def settle(router):
+    """Wait for the background lag probes in flight."""
+    for replica in router.replicas:
+        if replica["probe"] is not None:
+            replica["probe"].join(5)
+
+
+def test_round_robin_alternates(engines):
+    r = router(engines)
+    picks = [r.choose() for _ in range(4)]
+    a, b = engines.values()
+    assert {picks[0], picks[1]} == {a, b}
+    assert picks[0] is picks[2] and picks[1] is picks[3]
+
+
+def test_least_connections_prefers_the_idle_replica(engines):
+    r = router(engines, strategy="least_connections")
+    a, b = engines.values()
+    with a.connect():
+        assert r.choose() is b
+    with b.connect():
+        assert r.choose() is a
+
+
+def test_lagging_replica_is_excluded(engines):
+    url_a, url_b = engines
+    lags = {url_a: 120.0}
+    r = router(engines, lags, max_lag=30.0)
+    assert {r.choose() for _ in range(4)} == {engines[url_b]}
+
+    lags[url_a] = 1.0
+    r.choose()
+    settle(r)
+    assert {r.choose() for _ in range(4)} == set(engines.values())
+
+
+def test_unknown_lag_excludes_the_replica(engines):
+    url_a, url_b = engines
+    r = router(engines, {url_a: None, url_b: None})
+    assert r.choose() is None
+
+
+def test_mark_down_fails_over(engines):
+    r = router(engines, retry_after=60.0)
+    a, b = engines.values()
+    r.mark_down(a, RuntimeError("connection refused"))
+    assert {r.choose() for _ in range(4)} == {b}
+    r.mark_down(b, RuntimeError("connection refused"))
+    assert r.choose() is None
+    assert [s["up"] for s in r.status()] == [False, False]
+
+
+def test_slow_probe_does_not_delay_choose(engines):
+    release = threading.Event()
+
+    def probe(conn):
+        release.wait(5)
+        return 0.0
+
+    try:
+        r = ReplicaRouter(engines, probe, lag_check_interval=0.0)
+        start = time.monotonic()
+        # No probe has come back yet, so reads go to the primary
+        assert r.choose() is None
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+    settle(r)
+    assert r.choose() in set(engines.values())
@@ -0,0 +1,42 @@
+import anyio
+from mcp import ClientSession, types
+from mcp.shared.message import SessionMessage
+
+from mcp_client import MCPClientManager, RequestTracker
+
+
+def test_cancelled_call_sends_its_own_request_id(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    manager = MCPClientManager()
+    sent = []
+
+    async def main():
+        _to_client, client_reads = anyio.create_memory_object_stream[SessionMessage](10)
+        client_writes, from_client = anyio.create_memory_object_stream[SessionMessage](10)
+        manager.requests = RequestTracker(client_writes)
+
+        async with ClientSession(client_reads, manager.requests) as session:
+            manager.session = session
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(manager._call_tool, "slow_query", {})
+                tg.start_soon(manager._call_tool, "other_query", {})
+                # The server never answers; collect both requests, then cancel
+                while len([m for m in sent if isinstance(m, types.JSONRPCRequest)]) < 2:
+                    sent.append((await from_client.receive()).message.root)
+                tg.cancel_scope.cancel()
+
+            while True:
+                with anyio.move_on_after(0.5):
+                    sent.append((await from_client.receive()).message.root)
+                    continue
+                break
+
+    anyio.run(main)
+
+    requests = {m.params["name"]: m.id for m in sent if isinstance(m, types.JSONRPCRequest)}
+    cancelled = sorted(
+        m.params["requestId"] for m in sent
+        if isinstance(m, types.JSONRPCNotification) and m.method == "notifications/cancelled"
+    )
+    assert cancelled == sorted(requests.values())
+    assert manager.requests.request_ids == {}
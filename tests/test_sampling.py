@@ -0,0 +1,25 @@
+from adapters.sqlite_adapter import SQLiteAdapter
+
+ROWS = 1000
+
+
+def test_key_lookups_are_not_biased_towards_low_keys(tmp_path):
+    adapter = SQLiteAdapter(f"sqlite:///{tmp_path / 'sample.db'}")
+    adapter.connect()
+    try:
+        with adapter.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            conn.exec_driver_sql(
+                f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROWS}) "
+                "INSERT INTO items SELECT i FROM n"
+            )
+        ids = []
+        with adapter._read_conn() as conn:
+            for _ in range(50):
+                sample = adapter._sample_by_key(conn, "items", "id", 10)
+                assert len(sample) == 10
+                ids += [row["id"] for row in sample]
+        # Uniform picks average about ROWS / 2; the lowest 10 of 40 about ROWS / 4
+        assert sum(ids) / len(ids) > ROWS * 0.4
+    finally:
+        adapter.close()
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from adapters.sqlite_adapter import SQLiteAdapter
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    path = tmp_path / "docs.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE docs (id INTEGER PRIMARY KEY, body TEXT)")
+    conn.executemany(
+        "INSERT INTO docs (body) VALUES (?)",
+        [(f"document number {n} about sqlite search",) for n in range(100)],
+    )
+    conn.commit()
+    conn.close()
+
+    adapter = SQLiteAdapter(f"sqlite:///{path}")
+    adapter.connect()
+    adapter.create_text_index("docs", ["body"])
+    yield adapter
+    adapter.close()
+
+
+def test_text_index_tables_are_hidden(adapter):
+    assert adapter.get_tables() == ["docs"]
+    assert list(adapter.get_schema()) == ["docs"]
+    described = adapter.describe_schema()
+    assert list(described["tables"]) == ["docs"]
+    assert described["total_tables"] == 1
+
+
+def test_text_index_tables_have_no_stats(adapter):
+    for table in ("docs_body_fts", "docs_body_fts_data", "docs_body_fts_idx"):
+        with pytest.raises(ValueError, match="Table not found"):
+            adapter.get_table_stats(table)
+    assert adapter.search_text("docs", ["body"], "sqlite", limit=5)
+
+
+@pytest.mark.parametrize("query", ["", "   "])
+def test_empty_search_is_rejected(adapter, query):
+    with pytest.raises(ValueError, match="search term"):
+        adapter.search_text("docs", ["body"], query)
+
+
+def test_blank_sample_query_falls_back_to_a_sampled_term(adapter):
+    report = adapter.create_text_index("docs", ["body"], sample_query="  ")
+    assert not report["created"]
+    assert report["sample_query"].strip()
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from adapters.deadlines import QueryCancelled, QueryControl, use_control
+from adapters.sqlite_adapter import SQLiteAdapter
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    path = tmp_path / "writer.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO items (id, name) VALUES (0, 'existing')")
+    conn.commit()
+    conn.close()
+
+    adapter = SQLiteAdapter(f"sqlite:///{path}")
+    adapter.connect()
+    yield adapter
+    adapter.close()
+
+
+def count_rows(adapter) -> int:
+    conn = sqlite3.connect(adapter.engine.url.database)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_grouped(adapter, calls):
+    """
+    Hold the writer on a blocking job until every call is queued, in order,
+    so they are picked up together. Returns each call's result or exception.
+    """
+    release = threading.Event()
+    blocker = threading.Thread(
+        target=adapter._writer.submit, args=(lambda conn: release.wait(),)
+    )
+    blocker.start()
+    while adapter._writer._queue.qsize():
+        time.sleep(0.01)
+
+    results = [None] * len(calls)
+
+    def call(index, fn):
+        try:
+            results[index] = fn()
+        except Exception as e:
+            results[index] = e
+
+    threads = []
+    for index, fn in enumerate(calls):
+        # Queue the calls in order
+        thread = threading.Thread(target=call, args=(index, fn))
+        thread.start()
+        threads.append(thread)
+        while adapter._writer._queue.qsize() <= index:
+            time.sleep(0.01)
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+    return results
+
+
+def test_failed_job_does_not_fail_its_group(adapter):
+    results = run_grouped(adapter, [
+        lambda: adapter.insert("items", {"id": 1, "name": "a"}),
+        lambda: adapter.insert("items", {"id": 0, "name": "duplicate"}),
+        lambda: adapter.insert("items", {"id": 2, "name": "b"}),
+    ])
+    assert isinstance(results[1], IntegrityError)
+    assert not isinstance(results[0], Exception)
+    assert not isinstance(results[2], Exception)
+    assert count_rows(adapter) == 3
+
+
+def test_bulk_load_is_not_replayed_after_group_failure(adapter):
+    rows = 500
+
+    def chunks():
+        for start in range(1, rows + 1, 100):
+            yield [{"id": n, "name": f"row {n}"} for n in range(start, start + 100)]
+
+    results = run_grouped(adapter, [
+        lambda: adapter.bulk_load("items", chunks()),
+        lambda: adapter.insert("items", {"id": 0, "name": "duplicate"}),
+    ])
+    assert results[0] == rows
+    assert isinstance(results[1], IntegrityError)
+    assert count_rows(adapter) == rows + 1
+
+
+def test_queued_write_is_dropped_when_the_call_expires(adapter):
+    started, release = threading.Event(), threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait()
+
+    blocker = threading.Thread(target=adapter._writer.submit, args=(block,))
+    blocker.start()
+    # Once the blocker runs, the insert below can only queue behind it
+    started.wait()
+    try:
+        with use_control(QueryControl(200)):
+            with pytest.raises(QueryCancelled):
+                adapter.insert("items", {"id": 1, "name": "late"})
+    finally:
+        release.set()
+        blocker.join()
+    adapter.insert("items", {"id": 2, "name": "after"})
+    assert count_rows(adapter) == 2
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_writes_fail_once_the_writer_thread_is_gone(adapter):
+    def crash(conn):
+        raise SystemExit
+
+    with pytest.raises(RuntimeError, match="writer thread has stopped"):
+        adapter._writer.submit(crash)
+    with pytest.raises(RuntimeError, match="writer thread has stopped"):
+        adapter.insert("items", {"id": 1, "name": "a"})
+
+
+def test_performance_mode_can_be_turned_off(tmp_path):
+    path = tmp_path / "plain.db"
+    sqlite3.connect(path).close()
+    adapter = SQLiteAdapter(f"sqlite:///{path}?performance=false")
+    adapter.connect()
+    try:
+        assert adapter.get_tables() == []
+        assert adapter.execute_query("PRAGMA journal_mode")[0]["journal_mode"] == "delete"
+    finally:
+        adapter.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["plain.db"]
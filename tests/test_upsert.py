@@ -0,0 +1,38 @@
+import sqlite3
+
+import pytest
+
+from adapters.sqlite_adapter import SQLiteAdapter
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    path = tmp_path / "upsert.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TABLE pairs (a INTEGER, b INTEGER, name TEXT, PRIMARY KEY (a, b))")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", [(n, "old") for n in range(500)])
+    conn.executemany("INSERT INTO pairs VALUES (?, ?, ?)", [(n, n, "old") for n in range(500)])
+    conn.commit()
+    conn.close()
+
+    adapter = SQLiteAdapter(f"sqlite:///{path}")
+    adapter.connect()
+    yield adapter
+    adapter.close()
+
+
+def test_upsert_more_than_a_thousand_rows(adapter):
+    rows = [{"id": n, "name": "new"} for n in range(2500)]
+    assert adapter.upsert("items", rows, ["id"]) == {"inserted": 2000, "updated": 500, "skipped": 0}
+    assert adapter.execute_query("SELECT COUNT(*) AS n FROM items WHERE name = 'new'")[0]["n"] == 2500
+
+
+def test_upsert_composite_key(adapter):
+    rows = [{"a": n, "b": n, "name": "new"} for n in range(2500)]
+    assert adapter.upsert("pairs", rows, ["a", "b"]) == {"inserted": 2000, "updated": 500, "skipped": 0}
+
+
+def test_key_only_upsert_reports_skipped(adapter):
+    rows = [{"id": n} for n in range(400, 1600)]
+    assert adapter.upsert("items", rows, ["id"]) == {"inserted": 1100, "updated": 0, "skipped": 100}
@@ -0,0 +1,26 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from adapters.vector_search import benchmark_index, perturbed  # noqa: E402
+
+
+def test_benchmark_queries_are_not_the_sampled_vectors():
+    stored = [np.arange(1, 9, dtype=np.float32), np.ones(8, dtype=np.float32)]
+    seen = []
+
+    def search(query, exact):
+        seen.append(query)
+        return [{"id": 1}]
+
+    benchmark_index(search, stored)
+    assert len(seen) == 4
+    for original, query in zip(stored, seen[::2]):
+        assert not np.array_equal(original, query)
+        # Still a nearby point, so the recall figure stays meaningful
+        assert np.linalg.norm(query - original) < 0.5 * np.linalg.norm(original)
+
+
+def test_perturbed_is_repeatable():
+    vectors = [np.ones(16, dtype=np.float32)]
+    assert np.array_equal(perturbed(vectors)[0], perturbed(vectors)[0])
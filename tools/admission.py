@@ -0,0 +1,205 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+import anyio
+
+# Workload class of each tool; tools not listed are reads.
+# "control" tools never touch the database and bypass admission.
+TOOL_WORKLOADS = {
+    "get_database_schema": "schema",
+    "get_schema_overview": "schema",
+    "list_tables": "schema",
+    "get_table_columns": "schema",
+    "get_table_indexes": "schema",
+    "get_table_stats": "schema",
+    "health_check": "schema",
+    "insert_row": "write",
+    "bulk_insert": "write",
+    "update_rows": "write",
+    "delete_rows": "write",
+    "bulk_write": "write",
+    "upsert_rows": "write",
+    "apply_batch": "write",
+    "import_file": "write",
+    "create_text_index": "write",
+    "create_vector_index": "write",
+    "begin_transaction": "write",
+    "commit_transaction": "write",
+    "rollback_transaction": "write",
+    "get_capabilities": "control",
+    "get_raw_client": "control",
+    "get_server_metrics": "control",
+    "list_connections": "control",
+}
+
+# Exponential moving average weight for wait / service times
+EWMA_ALPHA = 0.2
+
+
+class ServerBusy(Exception):
+    """Raised when a call cannot be admitted; carries a retry hint."""
+
+    def __init__(self, workload: str, reason: str, retry_after: float):
+        self.workload = workload
+        self.retry_after = retry_after
+        super().__init__(
+            f"Server busy: {workload} {reason}; retry after {retry_after:.1f}s"
+        )
+
+
+class WorkloadPool:
+    """
+    Admission for one workload class: at most max_concurrent calls run,
+    at most max_queue wait (each for at most queue_timeout seconds), and a
+    freed slot goes to the next client session in round-robin order so one
+    busy session cannot starve the others.
+
+    All state is touched from the event loop only, so no locking is needed.
+    The pool's CapacityLimiter bounds the worker threads of its class.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limiter = anyio.CapacityLimiter(self.max_concurrent)
+
+        self.active = 0
+        self.queued = 0
+        self._waiters: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_ms_avg = 0.0
+        self.wait_ms_max = 0.0
+        self.service_ms_avg = 0.0
+
+    def retry_after(self) -> float:
+        """Rough time until a new call would be admitted, in seconds."""
+        service = max(self.service_ms_avg, 10.0) / 1000
+        rounds = math.ceil((self.queued + 1) / self.max_concurrent)
+        return round(service * rounds, 1)
+
+    async def acquire(self, session: Hashable) -> None:
+        start = time.monotonic()
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            self._record_admit(start)
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServerBusy(self.name, f"queue full ({self.queued} waiting)", self.retry_after())
+
+        waiter = anyio.Event()
+        self._waiters.setdefault(session, deque()).append(waiter)
+        self.queued += 1
+        try:
+            with anyio.move_on_after(self.queue_timeout):
+                await waiter.wait()
+        except BaseException:
+            # Cancelled while queued: give back a slot that was already handed over
+            if waiter.is_set():
+                self.release()
+            else:
+                self._forget(session, waiter)
+            raise
+
+        if not waiter.is_set():
+            self._forget(session, waiter)
+            self.timed_out += 1
+            raise ServerBusy(
+                self.name,
+                f"no capacity within {self.queue_timeout:.1f}s",
+                self.retry_after(),
+            )
+        self._record_admit(start)
+
+    def claim_idle(self, wanted: int) -> int:
+        """
+        Take up to `wanted` free slots at once, for a running call that
+        spreads its work over more connections. Never waits and never
+        takes a slot a queued call is waiting for; returns how many it got,
+        each to be given back with release().
+        """
+        if self.queued:
+            return 0
+        claimed = max(0, min(wanted, self.max_concurrent - self.active))
+        self.active += claimed
+        return claimed
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            self.service_ms_avg += EWMA_ALPHA * (service_seconds * 1000 - self.service_ms_avg)
+        waiter = self._next_waiter()
+        if waiter is None:
+            self.active -= 1
+        else:
+            # Hand the slot straight to the next session's oldest waiter
+            waiter.set()
+
+    def _next_waiter(self) -> Optional[anyio.Event]:
+        if not self._waiters:
+            return None
+        session, waiters = next(iter(self._waiters.items()))
+        waiter = waiters.popleft()
+        self.queued -= 1
+        # Rotate: the session goes to the back of the line
+        del self._waiters[session]
+        if waiters:
+            self._waiters[session] = waiters
+        return waiter
+
+    def _forget(self, session: Hashable, waiter: anyio.Event) -> None:
+        waiters = self._waiters.get(session)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[session]
+
+    def _record_admit(self, start: float) -> None:
+        wait_ms = (time.monotonic() - start) * 1000
+        self.admitted += 1
+        self.wait_ms_avg += EWMA_ALPHA * (wait_ms - self.wait_ms_avg)
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "sessions_waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_avg": round(self.wait_ms_avg, 2),
+            "wait_ms_max": round(self.wait_ms_max, 2),
+            "service_ms_avg": round(self.service_ms_avg, 2),
+        }
+
+
+class AdmissionController:
+    """One WorkloadPool per workload class, sized from the adapter's limits."""
+
+    # Waiting calls allowed per running slot
+    QUEUE_FACTOR = 4
+
+    def __init__(self, limits: Dict[str, int], queue_timeout: float = 5.0):
+        self.pools = {
+            name: WorkloadPool(name, limit, limit * self.QUEUE_FACTOR, queue_timeout)
+            for name, limit in limits.items()
+        }
+
+    def pool_for(self, tool_name: str) -> Optional[WorkloadPool]:
+        workload = TOOL_WORKLOADS.get(tool_name, "read")
+        if workload == "control":
+            return None
+        return self.pools.get(workload) or self.pools["read"]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: pool.metrics() for name, pool in self.pools.items()}
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, List, Optional
 
 
 def register_aggregation_tools(mcp, adapter):
@@ -8,11 +8,27 @@ def register_aggregation_tools(mcp, adapter):
         description=(
             "Run aggregation queries. "
             "SQL: GROUP BY / aggregate query. "
-            "MongoDB: aggregation pipeline."
+            "MongoDB: aggregation pipeline. "
+            "Optionally restrict the returned fields / rows; "
+            "MongoDB also accepts allow_disk_use, max_time_ms and read_preference "
+            "(e.g. 'secondaryPreferred' to keep heavy reads off the primary)."
         )
     )
     def aggregate_data(
         table: str,
         pipeline: Any,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        allow_disk_use: bool = False,
+        max_time_ms: Optional[int] = None,
+        read_preference: Optional[str] = None,
     ):
-        return adapter.aggregate(table, pipeline)
+        return adapter.aggregate(
+            table,
+            pipeline,
+            limit=limit,
+            fields=fields,
+            allow_disk_use=allow_disk_use,
+            max_time_ms=max_time_ms,
+            read_preference=read_preference,
+        )
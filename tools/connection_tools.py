@@ -0,0 +1,12 @@
+def register_connection_tools(mcp, connections):
+
+    @mcp.tool(
+        name="list_connections",
+        description=(
+            "List the databases this server can reach. "
+            "Pass a name as the `connection` argument of any other tool; "
+            "without it the default connection is used."
+        )
+    )
+    def list_connections() -> list:
+        return connections.describe()
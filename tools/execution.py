@@ -0,0 +1,197 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import anyio
+from fastmcp.exceptions import ToolError
+from fastmcp.server.dependencies import get_context
+
+from adapters.deadlines import QueryControl, use_control
+from adapters.parallel_scan import use_slot_claim
+from adapters.registry import ConnectionRegistry, current_connection, use_adapter
+from tools.admission import AdmissionController, ServerBusy
+
+logger = logging.getLogger(__name__)
+
+# Tools about the server itself rather than one database: no connection argument
+SERVER_TOOLS = {"list_connections"}
+
+
+class CancellableTools:
+    """
+    Registers tools on a FastMCP server so every call runs in a worker thread
+    under a QueryControl, against the connection it names.
+
+    Sync tools would otherwise block the event loop, so the server could not
+    even read the client's notifications/cancelled until the query finished.
+    Running them in a thread keeps the loop free; when the call is cancelled
+    (cancel notification, client gone) control.cancel() interrupts the
+    database statement and the worker thread is abandoned. An abandoned
+    thread keeps its admission slot and connection reference until it
+    actually returns, so a call that ignores the interrupt still counts.
+
+    The deadline is the request's _meta.timeout_ms, or default_timeout_ms.
+
+    Every tool gets an optional `connection` argument selecting one of the
+    registry's connections; the tool modules see that connection's adapter
+    through an AdapterProxy. Each connection has its own AdmissionController:
+    a call must first get a slot in its workload's pool (read / write /
+    schema) and runs on that pool's threads; calls that cannot be admitted
+    fail fast with a "busy, retry after" error. A parallel scan's extra
+    workers take further free slots of the same pool, or do not start.
+    """
+
+    def __init__(
+        self,
+        mcp,
+        connections: ConnectionRegistry,
+        default_timeout_ms: Optional[int] = None,
+        queue_timeout: float = 5.0,
+    ):
+        self.mcp = mcp
+        self.connections = connections
+        self.default_timeout_ms = default_timeout_ms
+        self.queue_timeout = queue_timeout
+        self._admission: Dict[str, AdmissionController] = {}
+
+    def tool(self, *args, **kwargs):
+        register = self.mcp.tool(*args, **kwargs)
+
+        def decorator(fn):
+            name = kwargs.get("name") or fn.__name__
+            if name in SERVER_TOOLS:
+                return register(fn)
+            return register(self._cancellable(fn, name))
+
+        return decorator
+
+    def __getattr__(self, name):
+        return getattr(self.mcp, name)
+
+    def admission_metrics(self) -> Dict[str, dict]:
+        """Admission metrics of the connection the current call selected."""
+        admission = self._admission.get(current_connection())
+        return admission.metrics() if admission else {}
+
+    def _admission_for(self, connection: str, adapter) -> AdmissionController:
+        if connection not in self._admission:
+            self._admission[connection] = AdmissionController(
+                adapter.concurrency_limits(), queue_timeout=self.queue_timeout
+            )
+        return self._admission[connection]
+
+    def _request(self):
+        """(timeout_ms, session key) of the call being served."""
+        try:
+            ctx = get_context()
+            meta = ctx.request_context.meta
+            session = ctx.session_id
+        except (RuntimeError, ValueError, AttributeError):
+            meta, session = None, None
+        timeout_ms = getattr(meta, "timeout_ms", None) if meta is not None else None
+        return int(timeout_ms) if timeout_ms else self.default_timeout_ms, session
+
+    @staticmethod
+    def _release_from_worker(release, tool_name: str) -> None:
+        """Run release() on the event loop from an abandoned worker thread."""
+        try:
+            anyio.from_thread.run_sync(release)
+        except RuntimeError:
+            # The event loop is gone (server shutting down)
+            logger.debug("Could not release the slot of abandoned tool call %s", tool_name)
+
+    def _cancellable(self, fn, tool_name: str):
+        @functools.wraps(fn)
+        async def run_tool(*args, connection: Optional[str] = None, **kwargs):
+            timeout_ms, session = self._request()
+            try:
+                name = self.connections.resolve(connection)
+                # Opening a connection for the first time may block
+                adapter = await anyio.to_thread.run_sync(self.connections.acquire, name)
+            except ValueError as e:
+                raise ToolError(str(e))
+
+            try:
+                pool = self._admission_for(name, adapter).pool_for(tool_name)
+                if pool is not None:
+                    try:
+                        await pool.acquire(session)
+                    except ServerBusy as e:
+                        raise ToolError(str(e))
+            except BaseException:
+                self.connections.release(name)
+                raise
+
+            # The deadline starts once the call is admitted
+            control = QueryControl(timeout_ms)
+            start = time.monotonic()
+            # pending -> running -> finished; a cancel turns pending into
+            # cancelled (never run) and running into abandoned
+            lock = threading.Lock()
+            state = {"phase": "pending"}
+
+            def release():
+                if pool is not None:
+                    pool.release(time.monotonic() - start)
+                self.connections.release(name)
+
+            def claim_slots(wanted):
+                """Free slots of the call's pool for the extra workers of a parallel scan."""
+                claimed = anyio.from_thread.run_sync(pool.claim_idle, wanted)
+
+                def give_back():
+                    for _ in range(claimed):
+                        self._release_from_worker(pool.release, tool_name)
+
+                return claimed, give_back
+
+            def run():
+                with lock:
+                    if state["phase"] == "cancelled":
+                        return None
+                    state["phase"] = "running"
+                try:
+                    claim = claim_slots if pool is not None else None
+                    with use_adapter(name, adapter), use_control(control), use_slot_claim(claim):
+                        return fn(*args, **kwargs)
+                finally:
+                    with lock:
+                        abandoned = state["phase"] == "abandoned"
+                        state["phase"] = "finished"
+                    if abandoned:
+                        self._release_from_worker(release, tool_name)
+
+            try:
+                return await anyio.to_thread.run_sync(
+                    run,
+                    abandon_on_cancel=True,
+                    limiter=pool.limiter if pool is not None else None,
+                )
+            except anyio.get_cancelled_exc_class():
+                logger.info("Tool call %s cancelled; interrupting its query", tool_name)
+                control.cancel()
+                with lock:
+                    state["phase"] = "abandoned" if state["phase"] == "running" else "cancelled"
+                raise
+            finally:
+                # An abandoned worker may still be using the connection; it
+                # gives back the slot and the connection itself when it ends
+                if state["phase"] != "abandoned":
+                    release()
+
+        # Advertise the extra argument in the tool's input schema
+        signature = inspect.signature(fn)
+        run_tool.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(
+                "connection",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=None,
+                annotation=Optional[str],
+            ),
+        ])
+        run_tool.__annotations__ = {**fn.__annotations__, "connection": Optional[str]}
+        return run_tool
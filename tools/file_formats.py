@@ -0,0 +1,280 @@
+import csv
+import datetime
+import decimal
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+FILE_FORMATS = ("csv", "ndjson", "parquet")
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+}
+
+
+def detect_format(path: str, file_format: Optional[str] = None) -> str:
+    if file_format:
+        file_format = file_format.lower()
+        if file_format == "jsonl":
+            file_format = "ndjson"
+    else:
+        file_format = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_format not in FILE_FORMATS:
+        raise ValueError(
+            f"Unsupported file format for {path}. Expected one of: {', '.join(FILE_FORMATS)}"
+        )
+    return file_format
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet support requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+# ---------------- Reading ----------------
+
+def read_chunks(path: str, file_format: str, chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield a file's records as lists of at most chunk_size dicts."""
+    if file_format == "parquet":
+        pyarrow = _require_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+# ---------------- Type coercion ----------------
+
+TRUE_STRINGS = {"true", "t", "yes", "y", "1"}
+FALSE_STRINGS = {"false", "f", "no", "n", "0"}
+
+
+def coerce_value(value: Any, python_type: Optional[type]) -> Any:
+    """
+    Convert a value read from a file to a column's python type.
+    Only strings are converted (CSV yields nothing else); an empty string
+    becomes NULL for non-text columns.
+    """
+    if not isinstance(value, str) or python_type in (None, str):
+        return value
+    if value == "":
+        return None
+    if python_type is bool:
+        lowered = value.strip().lower()
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+        raise ValueError(f"Cannot convert {value!r} to a boolean")
+    if python_type is int:
+        return int(value)
+    if python_type is float:
+        return float(value)
+    # Dates, decimals, ... are left to the database to parse
+    return value
+
+
+def infer_value(value: Any) -> Any:
+    """Best-effort typing of a CSV string for schemaless targets."""
+    if not isinstance(value, str) or value == "":
+        return value
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+class RowMapper:
+    """
+    Rename file columns via mapping and fit records to the target table.
+
+    With a known schema (column_types) only table columns are kept, values
+    are coerced to the column types and every row gets the same columns
+    (those seen in the first chunk), as the SQL bulk paths require.
+    Without one, records keep all their fields and CSV strings are inferred.
+    """
+
+    def __init__(
+        self,
+        column_types: Optional[Dict[str, Optional[type]]] = None,
+        mapping: Optional[Dict[str, str]] = None,
+    ):
+        self.column_types = column_types
+        self.mapping = mapping or {}
+        self.columns: Optional[List[str]] = None
+        self.ignored = set()
+
+    def map_chunk(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        renamed = [
+            {self.mapping.get(k, k): v for k, v in record.items()}
+            for record in records
+        ]
+        if self.column_types is None:
+            return [{k: infer_value(v) for k, v in record.items()} for record in renamed]
+
+        if self.columns is None:
+            seen = {k for record in renamed for k in record}
+            self.columns = [c for c in self.column_types if c in seen]
+            self.ignored = seen - set(self.columns)
+            if not self.columns:
+                raise ValueError("None of the file's columns match the table's columns")
+
+        return [
+            {c: coerce_value(record.get(c), self.column_types[c]) for c in self.columns}
+            for record in renamed
+        ]
+
+
+# ---------------- Writing ----------------
+
+def _type_name(value: Any) -> str:
+    return type(value).__name__
+
+
+class ChunkWriter(ABC):
+    """Append row chunks to a file; the column set comes from the first chunk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self.schema: Dict[str, str] = {}
+
+    def _update_schema(self, rows: List[Dict[str, Any]]) -> None:
+        """Record each column's type from its first non-null value."""
+        if self.schema and "NoneType" not in self.schema.values():
+            return
+        for row in rows:
+            for column, value in row.items():
+                if self.schema.get(column, "NoneType") == "NoneType":
+                    self.schema[column] = _type_name(value)
+
+    @abstractmethod
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """Append one chunk of rows."""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush and close the file."""
+        pass
+
+
+class CSVChunkWriter(ChunkWriter):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                self._file, fieldnames=list(rows[0].keys()), extrasaction="ignore"
+            )
+            self._writer.writeheader()
+        self._update_schema(rows)
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class NDJSONChunkWriter(ChunkWriter):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        self._update_schema(rows)
+        for row in rows:
+            self._file.write(json.dumps(row, default=str))
+            self._file.write("\n")
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetChunkWriter(ChunkWriter):
+    """Each chunk becomes one row group, so memory stays bounded by the chunk size."""
+
+    ARROW_NATIVE = (bool, int, float, str, bytes)
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._pa = _require_pyarrow()
+        self._writer = None
+        self._arrow_schema = None
+
+    def _arrow_safe(self, value):
+        if value is None or isinstance(value, self.ARROW_NATIVE):
+            return value
+        if isinstance(value, (datetime.date, datetime.time, decimal.Decimal)):
+            return value
+        # ObjectId, UUID, nested documents, ...
+        return json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value)
+
+    def write(self, rows):
+        if not rows:
+            return
+        pa = self._pa
+        rows = [{k: self._arrow_safe(v) for k, v in row.items()} for row in rows]
+        if self._arrow_schema is None:
+            inferred = pa.Table.from_pylist(rows).schema
+            # All-null columns in the first chunk would be typed null forever
+            self._arrow_schema = pa.schema([
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in inferred
+            ])
+            self._writer = pa.parquet.ParquetWriter(self.path, self._arrow_schema)
+            self.schema = {f.name: str(f.type) for f in self._arrow_schema}
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._arrow_schema))
+        self.rows += len(rows)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif not os.path.exists(self.path):
+            # No rows: still leave an (empty) file behind
+            open(self.path, "wb").close()
+
+
+CHUNK_WRITERS = {
+    "csv": CSVChunkWriter,
+    "ndjson": NDJSONChunkWriter,
+    "parquet": ParquetChunkWriter,
+}
+
+
+def open_writer(path: str, file_format: str) -> ChunkWriter:
+    return CHUNK_WRITERS[file_format](path)
@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Union
+
+from tools.file_formats import RowMapper, detect_format, open_writer, read_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def register_file_tools(mcp, adapter):
+
+    @mcp.tool(
+        name="import_file",
+        description=(
+            "Stream a local CSV, NDJSON or Parquet file into a table or collection "
+            "using the database's bulk load path. "
+            "Optional mapping renames file columns to table columns. "
+            "Returns row count and throughput; the file contents are not returned."
+        )
+    )
+    def import_file(
+        table: str,
+        path: str,
+        format: Optional[str] = None,
+        mapping: Optional[Dict[str, str]] = None,
+        chunk_size: int = 5000,
+        tx_id: Optional[str] = None,
+    ):
+        try:
+            file_format = detect_format(path, format)
+            schemaless = not adapter.capabilities().get("schema_introspection")
+            mapper = RowMapper(
+                None if schemaless else adapter.get_column_types(table),
+                mapping,
+            )
+            start = time.monotonic()
+            progress = {"rows": 0}
+
+            def chunks():
+                for records in read_chunks(path, file_format, chunk_size):
+                    rows = mapper.map_chunk(records)
+                    yield rows
+                    progress["rows"] += len(rows)
+                    elapsed = time.monotonic() - start
+                    logger.info(
+                        "import_file %s: %d rows, %.0f rows/s",
+                        table, progress["rows"], progress["rows"] / max(elapsed, 1e-9),
+                    )
+
+            loaded = adapter.bulk_load(table, chunks(), tx_id=tx_id)
+            elapsed = time.monotonic() - start
+            return {
+                "table": table,
+                "format": file_format,
+                "rows": loaded,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(loaded / max(elapsed, 1e-9)),
+                "ignored_columns": sorted(mapper.ignored),
+            }
+        except Exception as e:
+            return f"Error importing {path} into {table}: {str(e)}"
+
+    @mcp.tool(
+        name="export_query",
+        description=(
+            "Run a READ query and stream its full result into a local CSV, NDJSON "
+            "or Parquet file. Use this instead of fetch_large_result for big results. "
+            "Returns only a summary (rows, bytes, schema, duration). "
+            "parallelism > 1 reads a whole table (SQL: table name or SELECT * FROM "
+            "table; MongoDB: {'collection', 'filter'}) as key ranges over several "
+            "connections at once; ordered=true keeps key order."
+        )
+    )
+    def export_query(
+        query: Union[str, Dict[str, Any]],
+        path: str,
+        format: Optional[str] = None,
+        batch_size: int = 10000,
+        overwrite: bool = False,
+        parallelism: int = 1,
+        ordered: bool = False,
+    ):
+        # Write next to the target and rename on success, so a failed export
+        # never leaves a partial file (or destroys the one being replaced)
+        tmp_path = path + ".tmp"
+        try:
+            file_format = detect_format(path, format)
+            if os.path.exists(path) and not overwrite:
+                return f"Error exporting to {path}: file exists (pass overwrite=true to replace it)"
+
+            start = time.monotonic()
+            capabilities = adapter.capabilities()
+            if parallelism <= 1 and capabilities.get("copy_to_file"):
+                copied = adapter.copy_to_file(query, tmp_path, file_format)
+                rows, schema = copied["rows"], copied["schema"]
+            elif parallelism <= 1 and file_format == "csv" and capabilities.get("copy_export"):
+                with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                    copied = adapter.copy_to_csv(query, f)
+                rows, schema = copied["rows"], {c: None for c in copied["columns"]}
+            else:
+                writer = open_writer(tmp_path, file_format)
+                try:
+                    if parallelism > 1:
+                        batches = adapter.parallel_scan(
+                            query, parallelism=parallelism, ordered=ordered, batch_size=batch_size
+                        )
+                    else:
+                        batches = adapter.fetch_many(query, batch_size=batch_size)
+                    for batch in batches:
+                        writer.write(batch)
+                finally:
+                    writer.close()
+                rows, schema = writer.rows, writer.schema
+            os.replace(tmp_path, path)
+
+            elapsed = time.monotonic() - start
+            return {
+                "path": path,
+                "format": file_format,
+                "rows": rows,
+                "bytes": os.path.getsize(path),
+                "schema": schema,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / max(elapsed, 1e-9)) if rows else 0,
+            }
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return f"Error exporting to {path}: {str(e)}"
@@ -7,14 +7,26 @@ def register_pagination_tools(mcp, adapter):
         name="fetch_large_result",
         description=(
             "Fetch large query results in batches to avoid memory issues. "
-            "Returns data incrementally."
+            "Returns data incrementally. "
+            "MongoDB accepts {'collection', 'filter'} or {'collection', 'pipeline'}. "
+            "parallelism > 1 reads a whole table (SQL: table name or SELECT * FROM "
+            "table; MongoDB: {'collection', 'filter'}) as key ranges over several "
+            "connections at once; ordered=true keeps key order."
         )
     )
     def fetch_large_result(
         query: Union[str, Dict[str, Any]],
         batch_size: int = 1000,
+        parallelism: int = 1,
+        ordered: bool = False,
     ):
+        if parallelism > 1:
+            batches = adapter.parallel_scan(
+                query, parallelism=parallelism, ordered=ordered, batch_size=batch_size
+            )
+        else:
+            batches = adapter.fetch_many(query, batch_size=batch_size)
         results = []
-        for batch in adapter.fetch_many(query, batch_size=batch_size):
+        for batch in batches:
             results.extend(batch)
         return results
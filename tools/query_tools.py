@@ -8,7 +8,10 @@ def register_query_tools(mcp, adapter):
         description=(
             "Execute a READ query on the database. "
             "SQL databases accept SQL strings. "
-            "MongoDB accepts structured query objects."
+            "MongoDB accepts structured query objects: "
+            "{'collection', 'filter', 'projection', 'sort', 'skip', 'limit', "
+            "'hint', 'collation', 'max_time_ms', 'batch_size', "
+            "'read_preference', 'max_staleness_seconds'}."
         )
     )
     def execute_query(
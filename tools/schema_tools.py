@@ -1,3 +1,9 @@
+# Upper bound on sample_rows' n; larger reads belong to export_query
+MAX_SAMPLE_ROWS = 1000
+# Tables described by get_schema_overview; the rest are only counted
+MAX_OVERVIEW_TABLES = 200
+
+
 def register_schema_tools(mcp, adapter):
 
     @mcp.tool(
@@ -7,6 +13,17 @@ def register_schema_tools(mcp, adapter):
     def get_database_schema():
         return adapter.get_schema()
 
+    @mcp.tool(
+        name="get_schema_overview",
+        description=(
+            "Compact overview of every table or collection: column types, "
+            "primary / foreign keys and estimated row counts (from catalog "
+            "statistics, no scans)"
+        )
+    )
+    def get_schema_overview():
+        return adapter.describe_schema(MAX_OVERVIEW_TABLES)
+
     @mcp.tool(
         name="list_tables",
         description="List all tables or collections in the database"
@@ -27,3 +44,26 @@ def register_schema_tools(mcp, adapter):
     )
     def get_table_indexes(table: str):
         return adapter.get_indexes(table)
+
+    @mcp.tool(
+        name="get_table_stats",
+        description=(
+            "Estimated row count, size and per-column distinct / null estimates "
+            "for a table or collection, read from the database's statistics "
+            "(no table scan; cached for a minute, refresh=true to re-read). "
+            "Use this instead of SELECT COUNT(*) to learn how big a table is."
+        )
+    )
+    def get_table_stats(table: str, refresh: bool = False):
+        return adapter.get_table_stats(table, refresh=refresh)
+
+    @mcp.tool(
+        name="sample_rows",
+        description=(
+            "Return about n random rows / documents of a table or collection "
+            "without scanning it (TABLESAMPLE, random key lookups or $sample). "
+            "Use this to preview what a large table looks like."
+        )
+    )
+    def sample_rows(table: str, n: int = 10):
+        return adapter.sample_rows(table, max(1, min(n, MAX_SAMPLE_ROWS)))
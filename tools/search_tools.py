@@ -0,0 +1,34 @@
+from typing import List, Optional
+
+# Upper bound on search_text's limit
+MAX_SEARCH_RESULTS = 500
+
+
+def register_search_tools(mcp, adapter):
+
+    @mcp.tool(
+        name="search_text",
+        description=(
+            "Full-text search for words in text columns / fields, most relevant first "
+            "(score in _rank). Uses the full-text index (PostgreSQL tsvector/GIN, SQLite "
+            "FTS5, MySQL FULLTEXT, MongoDB text index) when one exists, else a LIKE / "
+            "regex scan. Use this instead of execute_query with LIKE '%word%'."
+        )
+    )
+    def search_text(table: str, columns: List[str], query: str, limit: int = 20):
+        return adapter.search_text(table, columns, query, max(1, min(limit, MAX_SEARCH_RESULTS)))
+
+    @mcp.tool(
+        name="create_text_index",
+        description=(
+            "Build the full-text index search_text uses for these columns if it is "
+            "missing (GIN index, FTS5 table with sync triggers, FULLTEXT index or "
+            "MongoDB text index), then report a sample search's time with the index "
+            "against the LIKE scan."
+        )
+    )
+    def create_text_index(table: str, columns: List[str], sample_query: Optional[str] = None):
+        try:
+            return adapter.create_text_index(table, columns, sample_query)
+        except Exception as e:
+            return f"Error creating text index on {table}: {str(e)}"
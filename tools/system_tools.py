@@ -16,3 +16,18 @@ def register_system_tools(mcp: FastMCP, adapter):
     )
     def get_capabilities() -> dict:
         return adapter.capabilities()
+
+    @mcp.tool(
+        name="get_server_metrics",
+        description=(
+            "Admission control metrics per workload (read / write / schema): "
+            "running calls, queue depth, wait times and rejected calls; "
+            "plus read replica health and lag when replicas are configured"
+        )
+    )
+    def get_server_metrics() -> dict:
+        metrics = mcp.admission_metrics()
+        replicas = getattr(adapter, "replicas", None)
+        if replicas:
+            metrics["replicas"] = replicas.status()
+        return metrics
@@ -0,0 +1,40 @@
+from typing import List, Optional
+
+# Most points downsample returns unless the caller asks for fewer
+MAX_POINTS = 2000
+
+
+def register_timeseries_tools(mcp, adapter):
+
+    @mcp.tool(
+        name="downsample",
+        description=(
+            "Chart-ready time series: groups rows into time buckets in the database "
+            "('1 minute', '15 minutes', '1 hour', '1 day', '1 week', '1 month') and "
+            "returns agg (avg, min, max, sum, count) of each value column per bucket, "
+            "plus a sample count. range is [start, end] as ISO timestamps (either may "
+            "be null). At most max_points buckets are returned; larger results are "
+            "reduced with LTTB on the first value column, keeping the shape of the "
+            "curve. Use this instead of execute_query for plotting long time ranges."
+        )
+    )
+    def downsample(
+        table: str,
+        time_column: str,
+        value_columns: List[str],
+        bucket: str,
+        agg: str = "avg",
+        range: Optional[List[Optional[str]]] = None,
+        max_points: int = MAX_POINTS,
+    ):
+        start, end = (list(range or []) + [None, None])[:2]
+        return adapter.downsample(
+            table,
+            time_column,
+            value_columns,
+            bucket,
+            agg,
+            start=start,
+            end=end,
+            max_points=max(3, min(max_points, MAX_POINTS)),
+        )
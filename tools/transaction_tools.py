@@ -1,25 +1,32 @@
+from typing import Optional
+
+
 def register_transaction_tools(mcp, adapter):
 
     @mcp.tool(
         name="begin_transaction",
-        description="Begin a database transaction"
+        description=(
+            "Begin a database transaction and return its tx_id. "
+            "Pass tx_id to write tools to run them inside the transaction. "
+            "Idle transactions are rolled back automatically."
+        )
     )
     def begin_transaction():
-        adapter.begin_transaction()
-        return {"status": "transaction_started"}
+        tx_id = adapter.begin_transaction()
+        return {"status": "transaction_started", "tx_id": tx_id}
 
     @mcp.tool(
         name="commit_transaction",
-        description="Commit the current transaction"
+        description="Commit a transaction. tx_id may be omitted when only one is open."
     )
-    def commit_transaction():
-        adapter.commit()
+    def commit_transaction(tx_id: Optional[str] = None):
+        adapter.commit(tx_id)
         return {"status": "transaction_committed"}
 
     @mcp.tool(
         name="rollback_transaction",
-        description="Rollback the current transaction"
+        description="Rollback a transaction. tx_id may be omitted when only one is open."
     )
-    def rollback_transaction():
-        adapter.rollback()
+    def rollback_transaction(tx_id: Optional[str] = None):
+        adapter.rollback(tx_id)
         return {"status": "transaction_rolled_back"}
@@ -0,0 +1,50 @@
+from typing import Any, Dict, List, Optional
+
+# Upper bound on vector_search's k
+MAX_NEIGHBOURS = 100
+
+
+def register_vector_tools(mcp, adapter):
+
+    @mcp.tool(
+        name="vector_search",
+        description=(
+            "Nearest-neighbour search: the k rows / documents whose embedding column is "
+            "closest to `embedding` (metric cosine, dot or l2), best first with the "
+            "score in _score. filters are column = value conditions (a find() filter on "
+            "MongoDB). Embeddings are pgvector columns, float32 blobs or JSON arrays. "
+            "Uses the vector index when there is one; exact=True scores every row."
+        )
+    )
+    def vector_search(
+        table: str,
+        column: str,
+        embedding: List[float],
+        k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        metric: str = "cosine",
+        exact: bool = False,
+    ):
+        return adapter.vector_search(
+            table,
+            column,
+            embedding,
+            max(1, min(k, MAX_NEIGHBOURS)),
+            filters=filters,
+            metric=metric,
+            exact=exact,
+        )
+
+    @mcp.tool(
+        name="create_vector_index",
+        description=(
+            "Build the vector index vector_search uses for a column (HNSW for pgvector "
+            "columns, otherwise an IVF index file kept next to the database; an existing "
+            "file is rebuilt), then report its recall@10 and latency against an exact scan."
+        )
+    )
+    def create_vector_index(table: str, column: str, metric: str = "cosine"):
+        try:
+            return adapter.create_vector_index(table, column, metric)
+        except Exception as e:
+            return f"Error creating vector index on {table}: {str(e)}"
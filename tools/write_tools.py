@@ -1,55 +1,128 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 
 def register_write_tools(mcp, adapter):
 
     @mcp.tool(
         name="insert_row",
-        description="Insert a single row or document into a table or collection. Provide table name and data as a dictionary."
+        description="Insert a single row or document into a table or collection. Provide table name and data as a dictionary. Optional tx_id runs it inside a transaction."
     )
-    def insert_row(table: str, data: Dict[str, Any]):
+    def insert_row(table: str, data: Dict[str, Any], tx_id: Optional[str] = None):
         try:
-            adapter.insert(table, data)
+            adapter.insert(table, data, tx_id=tx_id)
             return f"Successfully inserted 1 row into {table}"
         except Exception as e:
             return f"Error inserting into {table}: {str(e)}"
 
     @mcp.tool(
         name="bulk_insert",
-        description="Insert multiple rows or documents. Provide table name and list of data dictionaries."
+        description="Insert multiple rows or documents. Provide table name and list of data dictionaries. Optional tx_id runs it inside a transaction."
     )
-    def bulk_insert(table: str, data: List[Dict[str, Any]]):
+    def bulk_insert(
+        table: str,
+        data: List[Dict[str, Any]],
+        tx_id: Optional[str] = None,
+    ):
         try:
-            adapter.bulk_insert(table, data)
+            adapter.bulk_insert(table, data, tx_id=tx_id)
             return f"Successfully inserted {len(data)} rows into {table}"
         except Exception as e:
             return f"Error bulk inserting into {table}: {str(e)}"
 
     @mcp.tool(
         name="update_rows",
-        description="Update rows or documents matching filters. Provide table name, filters dict, and data dict to update."
+        description="Update rows or documents matching filters. Provide table name, filters dict, and data dict to update. Optional tx_id runs it inside a transaction."
     )
     def update_rows(
         table: str,
         filters: Dict[str, Any],
         data: Dict[str, Any],
+        tx_id: Optional[str] = None,
     ):
         try:
-            adapter.update(table, filters, data)
+            adapter.update(table, filters, data, tx_id=tx_id)
             return f"Successfully updated rows in {table} matching filters: {filters}"
         except Exception as e:
             return f"Error updating {table}: {str(e)}"
 
     @mcp.tool(
         name="delete_rows",
-        description="Delete rows or documents matching filters. Provide table name and filters dict."
+        description="Delete rows or documents matching filters. Provide table name and filters dict. Optional tx_id runs it inside a transaction."
     )
     def delete_rows(
         table: str,
         filters: Dict[str, Any],
+        tx_id: Optional[str] = None,
     ):
         try:
-            adapter.delete(table, filters)
+            adapter.delete(table, filters, tx_id=tx_id)
             return f"Successfully deleted rows from {table} matching filters: {filters}"
         except Exception as e:
             return f"Error deleting from {table}: {str(e)}"
+
+    @mcp.tool(
+        name="bulk_write",
+        description=(
+            "Apply many mixed write operations in one call (MongoDB). "
+            "Each op is a dict: {'op': 'insert', 'document': {...}}, "
+            "{'op': 'update', 'filter': {...}, 'update': {...}, 'upsert': false}, "
+            "{'op': 'replace', 'filter': {...}, 'replacement': {...}} or "
+            "{'op': 'delete', 'filter': {...}}. "
+            "Unordered by default; returns counts and per-op errors."
+        )
+    )
+    def bulk_write(
+        table: str,
+        operations: List[Dict[str, Any]],
+        ordered: bool = False,
+        tx_id: Optional[str] = None,
+    ):
+        if not adapter.capabilities().get("bulk_write"):
+            return "Error: bulk_write is not supported for this database"
+        try:
+            return adapter.bulk_write(table, operations, ordered=ordered, tx_id=tx_id)
+        except Exception as e:
+            return f"Error running bulk write on {table}: {str(e)}"
+
+    @mcp.tool(
+        name="upsert_rows",
+        description=(
+            "Insert rows or documents, updating existing ones that match on conflict_keys. "
+            "Provide table name, list of data dictionaries and the key columns. "
+            "SQL tables need a unique index / primary key on conflict_keys."
+        )
+    )
+    def upsert_rows(
+        table: str,
+        rows: List[Dict[str, Any]],
+        conflict_keys: List[str],
+        tx_id: Optional[str] = None,
+    ):
+        try:
+            counts = adapter.upsert(table, rows, conflict_keys, tx_id=tx_id)
+            summary = f"{counts['inserted']} inserted, {counts['updated']} updated"
+            if counts.get("skipped"):
+                summary += f", {counts['skipped']} skipped (already present)"
+            return f"Successfully upserted {len(rows)} rows into {table}: {summary}"
+        except Exception as e:
+            return f"Error upserting into {table}: {str(e)}"
+
+    @mcp.tool(
+        name="apply_batch",
+        description=(
+            "Apply many insert / update / delete operations in one call and one transaction. "
+            "Each op is a dict: {'op': 'insert', 'table': ..., 'data': {...}}, "
+            "{'op': 'update', 'table': ..., 'filters': {...}, 'data': {...}} or "
+            "{'op': 'delete', 'table': ..., 'filters': {...}}. "
+            "Prefer this over repeated insert_row / update_rows / delete_rows calls. "
+            "Returns per-op results."
+        )
+    )
+    def apply_batch(
+        operations: List[Dict[str, Any]],
+        tx_id: Optional[str] = None,
+    ):
+        try:
+            return adapter.apply_batch(operations, tx_id=tx_id)
+        except Exception as e:
+            return f"Error applying batch: {str(e)}"